@@ -0,0 +1,102 @@
+import argparse
+import sys
+
+import numpy as np
+from scipy.stats import norm, t
+
+from analyze_graphs import compare_samples, remove_outliers
+
+# Default stopping parameters
+MIN_RUNS = 10
+MAX_RUNS = 30
+CONFIDENCE = 0.95
+
+# Exit codes of the command line check; any other code (e.g. 1 for a traceback) is a failure
+STOP_EXIT_CODE = 0
+CONTINUE_EXIT_CODE = 3
+
+
+def welch_interval(a, b, confidence=CONFIDENCE):
+    """Welch confidence interval for mean(b) - mean(a)."""
+    var_a, var_b = np.var(a, ddof=1) / len(a), np.var(b, ddof=1) / len(b)
+    se = np.sqrt(var_a + var_b)
+    diff = np.mean(b) - np.mean(a)
+    if se == 0:
+        # Samples without spread: the difference is exact (and the degrees of freedom undefined)
+        return diff, diff
+    df = (var_a + var_b) ** 2 / (var_a ** 2 / (len(a) - 1) + var_b ** 2 / (len(b) - 1))
+    half_width = t.ppf(0.5 + confidence / 2, df) * se
+    return diff - half_width, diff + half_width
+
+
+def hodges_lehmann_interval(a, b, confidence=CONFIDENCE):
+    """Distribution-free confidence interval for the shift b - a (the Mann-Whitney counterpart).
+
+    The bounds are the k-th smallest and k-th largest of the n1 * n2 pairwise
+    differences, with k (1-based) from the normal approximation of the U distribution.
+    """
+    diffs = np.sort(np.subtract.outer(np.asarray(b), np.asarray(a)).ravel())
+    n1, n2 = len(a), len(b)
+    k = int(np.floor(n1 * n2 / 2 - norm.ppf(0.5 + confidence / 2) * np.sqrt(n1 * n2 * (n1 + n2 + 1) / 12)))
+    k = min(max(k, 1), (len(diffs) + 1) // 2)
+    return diffs[k - 1], diffs[len(diffs) - k]
+
+
+def difference_interval(a, b, confidence=CONFIDENCE):
+    """Confidence interval on the energy difference, following the test perform_stat_tests would pick."""
+    result = compare_samples(a, b, alpha=1 - confidence)
+    if result["test_used"] == "Welch's t-test":
+        low, high = welch_interval(a, b, confidence)
+    else:
+        low, high = hodges_lehmann_interval(a, b, confidence)
+    return result["test_used"], float(low), float(high)
+
+
+def should_stop(a, b, target_width, min_runs=MIN_RUNS, max_runs=MAX_RUNS, confidence=CONFIDENCE):
+    """Decide whether a pair of configurations has enough runs.
+
+    Stops once the confidence interval on the difference is at most `target_width`
+    joules wide, or once either configuration reached `max_runs`.
+    Returns (stop, reason, interval) where interval is (test_used, low, high) or None.
+    """
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    if len(a) >= max_runs or len(b) >= max_runs:
+        return True, f"run budget of {max_runs} reached", None
+    if len(a) < min_runs or len(b) < min_runs:
+        return False, f"fewer than {min_runs} runs", None
+
+    a, b = remove_outliers(a), remove_outliers(b)
+    interval = difference_interval(a, b, confidence)
+    width = interval[2] - interval[1]
+    if width <= target_width:
+        return True, f"{confidence:.0%} CI width {width:.2f} J <= {target_width:.2f} J", interval
+    return False, f"{confidence:.0%} CI width {width:.2f} J > {target_width:.2f} J", interval
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check whether two result folders have enough runs. Exits "
+                    f"{STOP_EXIT_CODE} to stop, {CONTINUE_EXIT_CODE} to keep running.")
+    parser.add_argument("folder_a")
+    parser.add_argument("folder_b")
+    parser.add_argument("--benchmark", default="matrix_benchmark.py")
+    parser.add_argument("--mode", default="normal")
+    parser.add_argument("--target-width", type=float, required=True, help="target CI width in joules")
+    parser.add_argument("--min-runs", type=int, default=MIN_RUNS)
+    parser.add_argument("--max-runs", type=int, default=MAX_RUNS)
+    parser.add_argument("--confidence", type=float, default=CONFIDENCE)
+    args = parser.parse_args()
+
+    from run_catalog import load_runs, run_energy
+
+    samples = []
+    for folder in (args.folder_a, args.folder_b):
+        runs = load_runs(folder, benchmark=args.benchmark, mode=args.mode)
+        samples.append(run_energy(runs).dropna().to_numpy())
+
+    stop, reason, interval = should_stop(samples[0], samples[1], args.target_width,
+                                         args.min_runs, args.max_runs, args.confidence)
+    if interval is not None:
+        print(f"{interval[0]}: difference CI [{interval[1]:.2f}, {interval[2]:.2f}] J")
+    print(f"{'Stop' if stop else 'Continue'}: {reason} ({len(samples[0])} vs {len(samples[1])} runs)")
+    sys.exit(STOP_EXIT_CODE if stop else CONTINUE_EXIT_CODE)
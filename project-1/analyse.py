@@ -1,29 +1,31 @@
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from scipy.stats import shapiro, ttest_ind, zscore, mannwhitneyu
-import glob
 from pathlib import Path
 import os
 
+import footprint
+from figures import FIGURES_DIR, Figures
+from run_catalog import load_runs
+from trace_reader import reduce_trace
+
 # Function to extract energy consumption
 def get_energy_consumption(file_path):
-    df = pd.read_csv(file_path)
-    
+    # Streamed in chunks; counter wraparounds between the first and last row are corrected
+    energy_consumption = reduce_trace(file_path)["package_energy"]
+
     # Ensure the required column exists
-    if "PACKAGE_ENERGY (J)" not in df.columns:
+    if energy_consumption is None:
         raise ValueError(f"Missing 'package energy (J)' column in {file_path}")
-    
-    # Compute energy consumption as the difference between first and last row
-    energy_consumption = df["PACKAGE_ENERGY (J)"].iloc[-1] - df["PACKAGE_ENERGY (J)"].iloc[0]
     return energy_consumption
 
 # Load all runs for each Python version
 def load_experiment_results(folder_path):
-    files = glob.glob(os.path.join(folder_path, "*.csv"))
-    energy_values = [get_energy_consumption(file) for file in files]
-    return np.array(energy_values)
+    # Runs are reduced once and cached in the run catalog; only new or changed files are parsed
+    runs = load_runs(folder_path)
+    missing = runs[runs["package_energy"].isna()]
+    if len(missing):
+        raise ValueError(f"Missing 'package energy (J)' column in {missing['csv_path'].iloc[0]}")
+    return runs["package_energy"].to_numpy()
 
 def remove_outliers(data):
     z_scores = np.abs(zscore(data))
@@ -33,7 +35,10 @@ def remove_outliers(data):
 def cohen_d(x, y):
     return (np.mean(x) - np.mean(y)) / np.sqrt((np.std(x, ddof=1) ** 2 + np.std(y, ddof=1) ** 2) / 2)
 
-def plot_median_difference(energy_311, energy_314):
+def plot_median_difference(energy_311, energy_314, filename="median_energy_comparison.png", show=True):
+    # Plotting libraries are imported on first use to keep startup fast
+    import matplotlib.pyplot as plt
+
     # Compute medians and interquartile ranges (IQR)
     median_311 = np.median(energy_311)
     median_314 = np.median(energy_314)
@@ -71,10 +76,14 @@ def plot_median_difference(energy_311, energy_314):
     plt.tight_layout()
 
     # Save and show the plot
-    plt.savefig("median_energy_comparison.png", dpi=300)
-    plt.show()
+    plt.savefig(filename, dpi=300)
+    if show:
+        plt.show()
+
+def plot_mean_difference(energy_311, energy_314, filename="mean_energy_comparison.png", show=True):
+    # Plotting libraries are imported on first use to keep startup fast
+    import matplotlib.pyplot as plt
 
-def plot_mean_difference(energy_311, energy_314):
     # Compute means and standard deviations
     mean_311 = np.mean(energy_311)
     mean_314 = np.mean(energy_314)
@@ -128,10 +137,32 @@ def plot_mean_difference(energy_311, energy_314):
     plt.tight_layout()
 
     # Save and show the plot
-    plt.savefig("mean_energy_comparison.png", dpi=300)
-    plt.show()
+    plt.savefig(filename, dpi=300)
+    if show:
+        plt.show()
+
+def plot_energy_comparison(energy_311, energy_314, filename="energy_comparison.png", show=True):
+    # Plotting libraries are imported on first use to keep startup fast
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Visualization (Violin + Box Plot)
+    plt.figure(figsize=(10, 6))
+    sns.violinplot(data=[energy_311, energy_314], inner="box", palette=["blue", "orange"])
+    plt.xticks([0, 1], ["Python 3.11", "Python 3.14"])
+    plt.ylabel("Energy Consumption (J)")
+    plt.title("Energy Consumption Comparison (Python 3.11 vs 3.14)")
+    plt.grid()
+
+    # Save or Show the plot
+    plt.savefig(filename, dpi=300)
+    if show:
+        plt.show()
+
+def process_results(python_311_folder, python_314_folder, report_dir=None, workers=None, force=False):
+    # With report_dir, figures are rendered headless into a new report version (see figures.py)
+    figures = Figures(report_dir, workers, force)
 
-def process_results(python_311_folder, python_314_folder):
     # Load results
     energy_311 = load_experiment_results(python_311_folder)
     energy_314 = load_experiment_results(python_314_folder)
@@ -140,7 +171,7 @@ def process_results(python_311_folder, python_314_folder):
     energy_311 = remove_outliers(energy_311)
     energy_314 = remove_outliers(energy_314)
 
-    plot_median_difference(energy_311, energy_314)
+    figures.add(plot_median_difference, energy_311, energy_314, filename="median_energy_comparison.png")
 
     # Normality Test (Shapiro-Wilk)
     shapiro_311 = shapiro(energy_311)
@@ -149,17 +180,7 @@ def process_results(python_311_folder, python_314_folder):
     print(f"Shapiro-Wilk test for Python 3.11: W={shapiro_311.statistic}, p={shapiro_311.pvalue}")
     print(f"Shapiro-Wilk test for Python 3.14: W={shapiro_314.statistic}, p={shapiro_314.pvalue}")
 
-    # Visualization (Violin + Box Plot)
-    plt.figure(figsize=(10, 6))
-    sns.violinplot(data=[energy_311, energy_314], inner="box", palette=["blue", "orange"])
-    plt.xticks([0, 1], ["Python 3.11", "Python 3.14"])
-    plt.ylabel("Energy Consumption (J)")
-    plt.title("Energy Consumption Comparison (Python 3.11 vs 3.14)")
-    plt.grid()
-
-    # Save or Show the plot
-    plt.savefig("energy_comparison.png", dpi=300)
-    plt.show()
+    figures.add(plot_energy_comparison, energy_311, energy_314, filename="energy_comparison.png")
 
     # **Statistical Analysis**
     if shapiro_311.pvalue > 0.05 and shapiro_314.pvalue > 0.05:
@@ -200,7 +221,21 @@ def process_results(python_311_folder, python_314_folder):
         d = cohen_d(energy_311, energy_314)
         print(f"Cohen's d effect size: {d:.4f}")
 
+    return figures.render()
+
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare the package energy of Python 3.11 and 3.14 runs.")
+    parser.add_argument("--report", action="store_true",
+                        help="render all figures headless into a new version under --figures-dir "
+                             "instead of showing them")
+    parser.add_argument("--figures-dir", default=str(FIGURES_DIR))
+    parser.add_argument("--workers", type=int, help="processes rendering figures (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="re-render figures whose data did not change")
+    args = parser.parse_args()
+
+    footprint.report("analysis startup")
     PROJECT_ROOT = Path(__file__).resolve().parent
     output_dir = PROJECT_ROOT / "energy_results"
     os.makedirs(output_dir, exist_ok=True)
@@ -208,4 +243,4 @@ if __name__ == "__main__":
     # Define subdirectories for Python versions
     python311_dir = output_dir / "python3.11_runs"
     python314_dir = output_dir / "python3.14_runs"
-    process_results(python311_dir, python314_dir)
\ No newline at end of file
+    process_results(python311_dir, python314_dir, args.figures_dir if args.report else None, args.workers, args.force)
\ No newline at end of file
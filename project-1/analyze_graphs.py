@@ -1,12 +1,16 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from scipy.stats import shapiro, ttest_ind, mannwhitneyu
-import glob
 import os
 import re
 from pathlib import Path
+import footprint
+from bootstrap import bootstrap_ci
+from figures import FIGURES_DIR, Figures
+from config_matrix import mode_env
+from run_catalog import load_runs, run_energy_per_iteration, summary_path_for
+from size_sweep import SWEEP_RANGES, split_size_label
+from trace_reader import reduce_trace
 
 
 def cohen_d(x, y):
@@ -15,48 +19,84 @@ def cohen_d(x, y):
         (np.std(x, ddof=1) ** 2 + np.std(y, ddof=1) ** 2) / 2
     )
 
-def perform_stat_tests(energy_311, energy_314, alpha=0.05):
-    """Runs normality checks, picks an appropriate test, prints results & effect sizes."""
+def compare_samples(a, b, alpha=0.05):
+    """Runs normality checks, picks an appropriate test and returns the results & effect sizes.
+
+    Keys ending in _a / _b describe sample `a` / `b`; differences are b - a.
+    """
     # Normality test
-    shapiro_311 = shapiro(energy_311)
-    shapiro_314 = shapiro(energy_314)
-    print(f"Shapiro-Wilk for Python 3.11: W={shapiro_311.statistic:.3f}, p={shapiro_311.pvalue:.4f}")
-    print(f"Shapiro-Wilk for Python 3.14: W={shapiro_314.statistic:.3f}, p={shapiro_314.pvalue:.4f}")
+    shapiro_a = shapiro(a)
+    shapiro_b = shapiro(b)
 
     # Decide test based on normality
-    if shapiro_311.pvalue > alpha and shapiro_314.pvalue > alpha:
-        print("Both samples appear normally distributed; using Welch's t-test.")
-        stat, p_value = ttest_ind(energy_311, energy_314, equal_var=False)
+    if shapiro_a.pvalue > alpha and shapiro_b.pvalue > alpha:
+        stat, p_value = ttest_ind(a, b, equal_var=False)
         test_used = "Welch's t-test"
     else:
-        print("At least one sample not normal; using Mann-Whitney U test.")
-        stat, p_value = mannwhitneyu(energy_311, energy_314, alternative='two-sided')
+        stat, p_value = mannwhitneyu(a, b, alternative='two-sided')
         test_used = "Mann-Whitney U test"
 
-    print(f"{test_used} statistic={stat:.3f}, p-value={p_value:.4f}")
+    result = {
+        "shapiro_a": (float(shapiro_a.statistic), float(shapiro_a.pvalue)),
+        "shapiro_b": (float(shapiro_b.statistic), float(shapiro_b.pvalue)),
+        "test_used": test_used,
+        "statistic": float(stat),
+        "p_value": float(p_value),
+        "significant": bool(p_value < alpha),
+        "median_a": float(np.median(a)),
+        "median_b": float(np.median(b)),
+        "cles": None,
+        "cohen_d": None,
+    }
+    result["median_diff"] = result["median_b"] - result["median_a"]
+
+    if test_used == "Mann-Whitney U test":
+        N1, N2 = len(a), len(b)
+        result["cles"] = float(stat / (N1 * N2))
+
+    # If t-test, we can compute Cohen's d
+    if test_used == "Welch's t-test":
+        result["cohen_d"] = float(cohen_d(a, b))
+    return result
+
+def perform_stat_tests(energy_311, energy_314, alpha=0.05):
+    """Runs normality checks, picks an appropriate test, prints results & effect sizes."""
+    result = compare_samples(energy_311, energy_314, alpha)
+    print(f"Shapiro-Wilk for Python 3.11: W={result['shapiro_a'][0]:.3f}, p={result['shapiro_a'][1]:.4f}")
+    print(f"Shapiro-Wilk for Python 3.14: W={result['shapiro_b'][0]:.3f}, p={result['shapiro_b'][1]:.4f}")
 
-    if p_value < alpha:
+    if result["test_used"] == "Welch's t-test":
+        print("Both samples appear normally distributed; using Welch's t-test.")
+    else:
+        print("At least one sample not normal; using Mann-Whitney U test.")
+
+    print(f"{result['test_used']} statistic={result['statistic']:.3f}, p-value={result['p_value']:.4f}")
+
+    if result["significant"]:
         print("Significant difference detected between Python 3.11 and 3.14.")
     else:
         print("No significant difference detected between Python 3.11 and 3.14.")
 
-    
-    median_311 = np.median(energy_311)
-    median_314 = np.median(energy_314)
-    print(f"Median Python 3.11: {median_311:.2f}")
-    print(f"Median Python 3.14: {median_314:.2f}")
-    print(f"Median difference: {median_314 - median_311:.2f} J")
+    print(f"Median Python 3.11: {result['median_a']:.2f}")
+    print(f"Median Python 3.14: {result['median_b']:.2f}")
+    print(f"Median difference: {result['median_diff']:.2f} J")
 
-    if test_used == "Mann-Whitney U test":
-        N1, N2 = len(energy_311), len(energy_314)
-        percentage_pairs = stat / (N1 * N2)
-        print(f"Percentage of pairs supporting difference: {percentage_pairs*100:.2f}%")
-        print(f"Common Language Effect Size (CLES): {percentage_pairs:.3f}")
+    if result["cles"] is not None:
+        print(f"Percentage of pairs supporting difference: {result['cles']*100:.2f}%")
+        print(f"Common Language Effect Size (CLES): {result['cles']:.3f}")
 
-    # If t-test, we can compute Cohen's d
-    if test_used == "Welch's t-test":
-        d = cohen_d(energy_311, energy_314)
-        print(f"Cohen's d = {d:.3f}")
+    if result["cohen_d"] is not None:
+        print(f"Cohen's d = {result['cohen_d']:.3f}")
+
+    intervals = bootstrap_ci(energy_311, energy_314, confidence=1 - alpha, seed=0)
+    result["bootstrap_ci"] = intervals
+    level = (1 - alpha) * 100
+    print(f"{level:.0f}% bootstrap CI median difference: [{intervals['median_diff'][0]:.2f}, "
+          f"{intervals['median_diff'][1]:.2f}] J")
+    print(f"{level:.0f}% bootstrap CI mean difference: [{intervals['mean_diff'][0]:.2f}, "
+          f"{intervals['mean_diff'][1]:.2f}] J")
+    print(f"{level:.0f}% bootstrap CI CLES: [{intervals['cles'][0]:.3f}, {intervals['cles'][1]:.3f}]")
+    return result
 
 # Function to extract execution time from summary text file
 def get_execution_time(summary_file):
@@ -74,56 +114,161 @@ def get_execution_time(summary_file):
 
 # Function to extract system power and compute energy consumption
 def get_energy_consumption(csv_file, summary_file):
-    df = pd.read_csv(csv_file)
-    if "SYSTEM_POWER (Watts)" not in df.columns:
+    avg_power = reduce_trace(csv_file)["avg_system_power"]
+    if avg_power is None:
         raise ValueError(f"Missing 'SYSTEM_POWER (Watts)' column in {csv_file}")
-    
-    avg_power = df["SYSTEM_POWER (Watts)"].mean()
+
     execution_time = get_execution_time(summary_file)
     if execution_time is None:
         return None
     return avg_power * execution_time
 
 # Load experiment results based on mode
-def load_experiment_results(folder_path, mode):
-    csv_files = glob.glob(os.path.join(folder_path, f"*_python*_{mode}_*.csv"))
-    if not csv_files:
+def load_experiment_results(folder_path, mode, benchmark="matrix_benchmark.py"):
+    # Runs are reduced once and cached in the run catalog; only new or changed files are parsed
+    runs = load_runs(folder_path, benchmark=benchmark, mode=mode)
+    if runs.empty:
         print(f"Warning: No CSV files found for {mode} in {folder_path}")
         return np.array([])
-    
+
     energy_values = []
-    for csv_file in csv_files:
-        base_name = os.path.basename(csv_file)
-        # Extract the specific part needed for the summary file
-        csv_name_pattern = re.search(r"(matrix_benchmark\.py_python3\.\d+_\w+_run\d+)\.csv", base_name)
-        
-        if csv_name_pattern:
-            summary_filename = f"energybridge_output_{csv_name_pattern.group(1)}.txt"
-            summary_file = os.path.join(folder_path, summary_filename)
-            
-            if os.path.exists(summary_file):
-                energy = get_energy_consumption(csv_file, summary_file)
-                if energy is not None:
-                    energy_values.append(energy)
-                else:
-                    print(f"Warning: Energy computation failed for {csv_file}")
-            else:
-                print(f"Warning: Summary file missing for {csv_file}. Expected: {summary_file}")
+    for run in runs.itertuples():
+        if pd.isna(run.summary_path):
+            expected = os.path.basename(summary_path_for(run.csv_path))
+            print(f"Warning: Summary file missing for {run.csv_path}. Expected: {expected}")
+        elif pd.isna(run.avg_system_power) or pd.isna(run.duration):
+            print(f"Warning: Energy computation failed for {run.csv_path}")
         else:
-            print(f"Warning: Could not parse CSV filename pattern: {base_name}")
-    
+            energy_values.append(run.avg_system_power * run.duration)
+
     if not energy_values:
         print(f"Warning: No valid energy values computed for {mode} in {folder_path}")
     return np.array(energy_values)
 
+def available_modes(folders, benchmark="matrix_benchmark.py"):
+    """Modes (runtime configurations) found in the result filenames; normal and optimized first.
+
+    Size sweep runs (labels ending in -n<size>) are left to process_scaling.
+    """
+    modes = set()
+    for folder in folders:
+        if os.path.isdir(folder):
+            modes.update(mode for mode in load_runs(folder, benchmark=benchmark)["mode"]
+                         if split_size_label(mode)[1] is None)
+    order = {"normal": 0, "optimized": 1}
+    return sorted(modes, key=lambda mode: (order.get(mode, 2), mode))
+
+# Floating point operations per workload iteration at a given size, for energy per FLOP
+WORK_MODELS = {
+    "matrix_benchmark.py": lambda n: 2 * n ** 3,
+    "benchmark.py": lambda n: 2 * n ** 3,
+}
+
+def sweep_modes(folders, benchmark):
+    """Modes (without the size suffix) that have size sweep runs for a benchmark."""
+    modes = set()
+    for folder in folders:
+        if os.path.isdir(folder):
+            for mode in load_runs(folder, benchmark=benchmark)["mode"]:
+                base_mode, size = split_size_label(mode)
+                if size is not None:
+                    modes.add(base_mode)
+    return sorted(modes)
+
+def load_size_sweep(folder_path, benchmark, mode):
+    """Median energy and time per workload iteration for every swept size of a benchmark and mode."""
+    runs = load_runs(folder_path, benchmark=benchmark)
+    labels = runs["mode"].map(split_size_label)
+    runs = runs.assign(base_mode=labels.str[0], size=labels.str[1])
+    runs = runs[(runs["base_mode"] == mode) & runs["size"].notna()]
+    runs = runs.assign(energy_per_iteration=run_energy_per_iteration(runs))
+    missing = runs["energy_per_iteration"].isna().sum()
+    if missing:
+        print(f"Warning: {missing} sweep runs in {folder_path} have no worker report or energy and are skipped")
+    sweep = (runs.dropna(subset=["energy_per_iteration"]).groupby("size")
+             .agg(runs=("run", "count"), energy=("energy_per_iteration", "median"),
+                  time=("iteration_time", "median"))
+             .reset_index())
+    sweep["size"] = sweep["size"].astype(int)
+    work = WORK_MODELS.get(benchmark)
+    sweep["energy_per_flop"] = sweep["energy"] / sweep["size"].map(work) if work else np.nan
+    return sweep
+
+def fit_power_law(sizes, values):
+    """Fit value = scale * size^slope by least squares in log-log space; returns (slope, scale, R^2)."""
+    log_size, log_value = np.log(np.asarray(sizes, dtype=float)), np.log(np.asarray(values, dtype=float))
+    slope, intercept = np.polyfit(log_size, log_value, 1)
+    residuals = log_value - (slope * log_size + intercept)
+    total = np.sum((log_value - log_value.mean()) ** 2)
+    r_squared = 1 - np.sum(residuals ** 2) / total if total > 0 else 1.0
+    return slope, np.exp(intercept), r_squared
+
+def plot_scaling(sweep_311, sweep_314, title, filename, show=True):
+    """Log-log plot of energy and time per iteration versus problem size."""
+    # Plotting libraries are imported on first use to keep startup fast
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    for axis, column, label in ((axes[0], "energy", "Energy per iteration (J)"),
+                                (axes[1], "time", "Time per iteration (s)")):
+        for sweep, name, color in ((sweep_311, "Python 3.11", "blue"), (sweep_314, "Python 3.14", "orange")):
+            axis.loglog(sweep["size"], sweep[column], "o-", color=color, label=name)
+        axis.set_xlabel("Problem size")
+        axis.set_ylabel(label)
+        axis.grid(True, which="both", alpha=0.3)
+        axis.legend()
+    fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(filename, dpi=300)
+    if show:
+        plt.show()
+
+def process_scaling(python_311_folder, python_314_folder, benchmarks=None, figures=None):
+    """Fit energy and time versus size for every benchmark/mode with a size sweep."""
+    figures = figures or Figures()
+    for benchmark in benchmarks or SWEEP_RANGES:
+        for mode in sweep_modes([python_311_folder, python_314_folder], benchmark):
+            sweep_311 = load_size_sweep(python_311_folder, benchmark, mode)
+            sweep_314 = load_size_sweep(python_314_folder, benchmark, mode)
+            if len(sweep_311) < 2 or len(sweep_314) < 2:
+                print(f"Skipping {benchmark} ({mode}) scaling: fewer than two sizes per version")
+                continue
+
+            print(f"\nSize sweep: {benchmark} ({mode})")
+            merged = sweep_311.merge(sweep_314, on="size", suffixes=("_311", "_314"))
+            print(f"{'size':>9} {'E 3.11 (J)':>12} {'E 3.14 (J)':>12} {'ratio':>7} {'t 3.11 (s)':>11} {'t 3.14 (s)':>11}")
+            for row in merged.itertuples():
+                print(f"{row.size:>9} {row.energy_311:>12.4f} {row.energy_314:>12.4f} "
+                      f"{row.energy_314 / row.energy_311:>7.3f} {row.time_311:>11.4f} {row.time_314:>11.4f}")
+            if benchmark in WORK_MODELS:
+                for row in merged.itertuples():
+                    print(f"  n={row.size}: {row.energy_per_flop_311 * 1e9:.2f} nJ/FLOP (3.11), "
+                          f"{row.energy_per_flop_314 * 1e9:.2f} nJ/FLOP (3.14)")
+
+            for version, sweep in (("3.11", sweep_311), ("3.14", sweep_314)):
+                energy_slope, _, energy_r2 = fit_power_law(sweep["size"], sweep["energy"])
+                time_slope, _, time_r2 = fit_power_law(sweep["size"], sweep["time"])
+                print(f"Python {version}: energy ~ n^{energy_slope:.2f} (R^2={energy_r2:.3f}), "
+                      f"time ~ n^{time_slope:.2f} (R^2={time_r2:.3f})")
+
+            figures.add(plot_scaling, sweep_311, sweep_314, f"Energy and time scaling: {benchmark} ({mode})",
+                        filename=f"scaling_{os.path.splitext(benchmark)[0]}_{mode}.png")
+
 def remove_outliers(data, z_threshold=3):
     if len(data) < 3:  
         return data
+    # Identical values have no spread and no outliers
+    if np.std(data) == 0:
+        return data
     z_scores = np.abs((data - np.mean(data)) / np.std(data))
     return data[z_scores < z_threshold]
 
-def plot_violin_comparison(energy_311, energy_314, title, filename):
+def plot_violin_comparison(energy_311, energy_314, title, filename, show=True):
     """Violin + box plot."""
+    # Plotting libraries are imported on first use to keep startup fast
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     plt.figure(figsize=(10, 6))
     sns.violinplot(data=[energy_311, energy_314], inner="box", palette=["blue", "orange"])
     plt.xticks([0, 1], ["Python 3.11", "Python 3.14"])
@@ -154,10 +299,14 @@ def plot_violin_comparison(energy_311, energy_314, title, filename):
         * 100
     )
     print(f"Difference: Mean: {mean_diff_percent:.2f}%, Median: {median_diff_percent:.2f}%")
-    plt.show()
+    if show:
+        plt.show()
 
-def plot_mean_bar_comparison(energy_311, energy_314, title, filename):
+def plot_mean_bar_comparison(energy_311, energy_314, title, filename, show=True):
     """Creates a bar chart showing mean + SEM for each Python version."""
+    # Plotting libraries are imported on first use to keep startup fast
+    import matplotlib.pyplot as plt
+
     mean_311 = np.mean(energy_311)
     mean_314 = np.mean(energy_314)
     sem_311 = np.std(energy_311, ddof=1) / np.sqrt(len(energy_311))
@@ -175,22 +324,35 @@ def plot_mean_bar_comparison(energy_311, energy_314, title, filename):
     plt.grid(True, axis='y')
     plt.tight_layout()
     plt.savefig(filename, dpi=300)
-    plt.show()
+    if show:
+        plt.show()
     
    
     print(f"\n{title}")
     print(f"Python 3.11: mean={mean_311:.2f} J, SEM={sem_311:.2f}")
     print(f"Python 3.14: mean={mean_314:.2f} J, SEM={sem_314:.2f}")
 
-def process_results(python_311_folder, python_314_folder):
-    """Main routine: load data, remove outliers, produce violin + bar plots + stats."""
+def process_results(python_311_folder, python_314_folder, report_dir=None, workers=None, force=False):
+    """Main routine: load data, remove outliers, produce violin + bar plots + stats.
+
+    With `report_dir`, figures are rendered headless (see figures.Figures) after the
+    statistics instead of being shown one by one; returns the report version directory.
+    """
+    figures = Figures(report_dir, workers, force)
     print(f"Python 3.11 folder: {python_311_folder}")
     print(f"Python 3.14 folder: {python_314_folder}")
     print(f"Python 3.11 folder exists: {os.path.exists(python_311_folder)}")
     print(f"Python 3.14 folder exists: {os.path.exists(python_314_folder)}")
     
-    for mode in ["normal", "optimized"]:
+    modes = available_modes([python_311_folder, python_314_folder]) or ["normal", "optimized"]
+    for mode in modes:
         print(f"\nProcessing {mode} mode...")
+        try:
+            settings = mode_env(mode)
+            if settings:
+                print("Runtime configuration: " + ", ".join(f"{key}={value}" for key, value in settings.items()))
+        except ValueError as e:
+            print(f"Warning: {e}")
         energy_311 = load_experiment_results(python_311_folder, mode)
         energy_314 = load_experiment_results(python_314_folder, mode)
         
@@ -209,29 +371,45 @@ def process_results(python_311_folder, python_314_folder):
        
         violin_title = f"Energy Consumption: Python 3.11 ({mode}) vs Python 3.14 ({mode})"
         violin_filename = f"violin_energy_comparison_{mode}.png"
-        plot_violin_comparison(energy_311, energy_314, violin_title, violin_filename)
+        figures.add(plot_violin_comparison, energy_311, energy_314, violin_title, filename=violin_filename)
 
        
         bar_title = f"Mean Energy Consumption Comparison (Python 3.11 {mode} vs Python 3.14 {mode})"
         bar_filename = f"mean_energy_comparison_{mode}.png"
-        plot_mean_bar_comparison(energy_311, energy_314, bar_title, bar_filename)
+        figures.add(plot_mean_bar_comparison, energy_311, energy_314, bar_title, filename=bar_filename)
 
      
         print("\nStatistical Analysis:")
         perform_stat_tests(energy_311, energy_314)
 
+    process_scaling(python_311_folder, python_314_folder, figures=figures)
+    return figures.render()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare Python 3.11 and 3.14 energy per mode and plot the results.")
+    parser.add_argument("--report", action="store_true",
+                        help="render all figures headless into a new version under --figures-dir "
+                             "instead of showing them")
+    parser.add_argument("--figures-dir", default=str(FIGURES_DIR))
+    parser.add_argument("--workers", type=int, help="processes rendering figures (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="re-render figures whose data did not change")
+    args = parser.parse_args()
 
-PROJECT_ROOT = Path(__file__).resolve().parent
-output_dir = PROJECT_ROOT / "results"
-os.makedirs(output_dir, exist_ok=True)
+    footprint.report("analysis startup")
+    PROJECT_ROOT = Path(__file__).resolve().parent
+    output_dir = PROJECT_ROOT / "results"
+    os.makedirs(output_dir, exist_ok=True)
 
-python311_dir = output_dir / "Python3.11"
-python314_dir = output_dir / "Python3.14"
+    python311_dir = output_dir / "Python3.11"
+    python314_dir = output_dir / "Python3.14"
 
-# Check if directories exist
-if not os.path.exists(python311_dir):
-    print(f"Warning: Directory {python311_dir} does not exist")
-if not os.path.exists(python314_dir):
-    print(f"Warning: Directory {python314_dir} does not exist")
+    # Check if directories exist
+    if not os.path.exists(python311_dir):
+        print(f"Warning: Directory {python311_dir} does not exist")
+    if not os.path.exists(python314_dir):
+        print(f"Warning: Directory {python314_dir} does not exist")
 
-process_results(python311_dir, python314_dir)
+    process_results(python311_dir, python314_dir, args.figures_dir if args.report else None, args.workers, args.force)
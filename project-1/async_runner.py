@@ -0,0 +1,115 @@
+import asyncio
+import json
+import time
+from asyncio.subprocess import PIPE
+
+from cpu_affinity import pin_started, pinned_command
+
+# Size of the chunks read from the child pipes
+READ_CHUNK = 64 * 1024
+
+# Seconds the meter gets to exit after terminate() before it is killed
+METER_GRACE_PERIOD = 5
+
+
+async def _drain(stream, chunks):
+    """Read a process pipe until EOF so the child never blocks on a full buffer."""
+    while True:
+        chunk = await stream.read(READ_CHUNK)
+        if not chunk:
+            break
+        chunks.append(chunk)
+
+
+def _start_draining(process):
+    stdout, stderr = [], []
+    tasks = [
+        asyncio.create_task(_drain(process.stdout, stdout)),
+        asyncio.create_task(_drain(process.stderr, stderr)),
+    ]
+    return stdout, stderr, tasks
+
+
+async def _stop(process, grace=METER_GRACE_PERIOD):
+    """Terminate a process, killing it if it does not exit within the grace period."""
+    if process.returncode is not None:
+        return
+    process.terminate()
+    try:
+        await asyncio.wait_for(process.wait(), timeout=grace)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+
+
+async def run_measured(meter_cmd, benchmark_cmd, deadline=None, env=None, meter_cpus=None, benchmark_cpus=None):
+    """Run benchmark_cmd while meter_cmd records energy, draining both processes' output.
+
+    The benchmark is killed when it exceeds `deadline` seconds. The meter is stopped
+    as soon as the benchmark exits. With `meter_cpus` / `benchmark_cpus`, each process
+    is started on those CPUs (through taskset, which the recorded commands include).
+    Returns a dict with wall clock (epoch) and
+    high-resolution (perf_counter) timestamps, exit codes and the captured output.
+    """
+    record = {"meter_cmd": pinned_command(meter_cmd, meter_cpus),
+              "benchmark_cmd": pinned_command(benchmark_cmd, benchmark_cpus),
+              "deadline": deadline}
+
+    meter = await asyncio.create_subprocess_exec(*record["meter_cmd"], stdout=PIPE, stderr=PIPE)
+    pin_started(meter.pid, meter_cpus)
+    record["meter_start"] = time.time()
+    meter_stdout, meter_stderr, meter_tasks = _start_draining(meter)
+
+    benchmark = await asyncio.create_subprocess_exec(*record["benchmark_cmd"], stdout=PIPE, stderr=PIPE, env=env)
+    pin_started(benchmark.pid, benchmark_cpus)
+    record["benchmark_start"] = time.time()
+    perf_start = time.perf_counter()
+    bench_stdout, bench_stderr, bench_tasks = _start_draining(benchmark)
+
+    try:
+        await asyncio.wait_for(benchmark.wait(), timeout=deadline)
+        record["timed_out"] = False
+    except asyncio.TimeoutError:
+        benchmark.kill()
+        await benchmark.wait()
+        record["timed_out"] = True
+    record["benchmark_duration"] = time.perf_counter() - perf_start
+    record["benchmark_end"] = time.time()
+    record["benchmark_returncode"] = benchmark.returncode
+    await asyncio.gather(*bench_tasks)
+
+    await _stop(meter)
+    record["meter_end"] = time.time()
+    record["meter_returncode"] = meter.returncode
+    await asyncio.gather(*meter_tasks)
+
+    record["meter_stdout"] = b"".join(meter_stdout).decode(errors="replace")
+    record["meter_stderr"] = b"".join(meter_stderr).decode(errors="replace")
+    record["benchmark_stdout"] = b"".join(bench_stdout).decode(errors="replace")
+    record["benchmark_stderr"] = b"".join(bench_stderr).decode(errors="replace")
+    return record
+
+
+def write_run_outputs(record, summary_file, metadata_file):
+    """Write the meter output (EnergiBridge --summary) and the run metadata to disk."""
+    with open(summary_file, "w") as file:
+        file.write(record["meter_stdout"])
+    with open(metadata_file, "w") as file:
+        json.dump(record, file, indent=2)
+
+
+class BackgroundWriter:
+    """Runs blocking result writes in a worker thread while the campaign keeps going."""
+
+    def __init__(self):
+        self.pending = set()
+
+    def submit(self, func, *args):
+        task = asyncio.create_task(asyncio.to_thread(func, *args))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+        return task
+
+    async def flush(self):
+        if self.pending:
+            await asyncio.gather(*self.pending)
@@ -1,35 +1,47 @@
 import random
+import sys
 import time
 
+from benchmarks.workloads.matrix import selected_kernel
+from benchmarks.workloads.parallel import parallel_multiply, selected_parallelism
+from benchmarks.workloads.phases import phase
+
 def generate_matrix(size, seed):
     """Generates a square matrix filled with random numbers."""
     random.seed(seed)
     return [[random.random() for _ in range(size)] for _ in range(size)]
 
-def multiply_matrices(A, B):
-    """Multiplies two square matrices using a naive O(n^3) algorithm."""
-    size = len(A)
-    result = [[0] * size for _ in range(size)]
-    
-    for i in range(size):
-        for j in range(size):
-            for k in range(size):
-                result[i][j] += A[i][k] * B[k][j]
-    
-    return result
+def multiply_matrices(A, B, kernel=None):
+    """Multiplies two square matrices, by default using a naive O(n^3) algorithm.
+
+    Other kernels from benchmarks/workloads/matrix.py can be selected with MATRIX_KERNEL,
+    and the rows can be split across workers with PARALLEL_EXECUTOR / PARALLEL_WORKERS.
+    """
+    return parallel_multiply(A, B, kernel or selected_kernel(default="naive_indexed"), *selected_parallelism())
+
+def workload(size=300, seed=42):
+    """One unit of work for benchmark_worker.py: generate and multiply two size x size matrices."""
+    with phase("generate"):
+        A = generate_matrix(size, seed)
+        B = generate_matrix(size, seed + 1)
+    with phase("multiply"):
+        return multiply_matrices(A, B)
 
 def matrix_multiplication_benchmark(size=300, seed=42):
     """Runs the matrix multiplication benchmark and records execution time."""
     print(f"Generating {size}x{size} matrices...")
-    A = generate_matrix(size, seed)
-    B = generate_matrix(size, seed + 1)
+    with phase("generate"):
+        A = generate_matrix(size, seed)
+        B = generate_matrix(size, seed + 1)
 
     print("Starting matrix multiplication...")
     start_time = time.time()
-    result = multiply_matrices(A, B)
+    with phase("multiply"):
+        result = multiply_matrices(A, B)
     end_time = time.time()
     
     print(f"Matrix multiplication completed in {end_time - start_time:.2f} seconds.")
 
 if __name__ == "__main__":
-    matrix_multiplication_benchmark()
\ No newline at end of file
+    # Optional problem size, e.g. from calibration.py
+    matrix_multiplication_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
\ No newline at end of file
@@ -0,0 +1,171 @@
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from array import array
+from pathlib import Path
+
+from config_matrix import runtime_info
+from footprint import peak_rss
+
+# Set by the runner (epoch seconds) right before launching the worker, to measure interpreter startup
+LAUNCH_TIME_ENV = "BENCHMARK_LAUNCH_TIME"
+
+
+def load_benchmark(script_path):
+    """Import a benchmark script as a module, with its folder on sys.path like `python script.py`."""
+    script_path = Path(script_path).resolve()
+    sys.path.insert(0, str(script_path.parent))
+    spec = importlib.util.spec_from_file_location(script_path.stem, script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_iterations(workload, iterations=None, duration=None, **params):
+    """Call workload(**params) for a number of iterations or until the time budget is used.
+
+    Returns the wall time of every iteration in seconds.
+    """
+    times = array("d")
+    deadline = time.perf_counter() + duration if duration is not None else None
+    while True:
+        if iterations is not None and len(times) >= iterations:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        start = time.perf_counter()
+        workload(**params)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def memory_counters():
+    """Allocator and garbage collector counters, sampled before and after the workload."""
+    return {
+        "allocated_blocks": sys.getallocatedblocks() if hasattr(sys, "getallocatedblocks") else None,
+        "gc_collections": sum(stats["collections"] for stats in gc.get_stats()),
+    }
+
+
+def memory_report(before, after, tracemalloc_peak=None):
+    """Peak RSS of the worker plus the change of the allocator/GC counters during the workload.
+
+    allocated_blocks is the net number of blocks still allocated by the interpreter
+    afterwards; gc_collections counts the collections the workload triggered (each
+    generation 0 collection follows ~700 net container allocations).
+    """
+    def delta(key):
+        if before[key] is None or after[key] is None:
+            return None
+        return after[key] - before[key]
+
+    return {
+        "peak_rss": peak_rss(),
+        "tracemalloc_peak": tracemalloc_peak,
+        "allocated_blocks": delta("allocated_blocks"),
+        "gc_collections": delta("gc_collections"),
+    }
+
+
+def build_report(script, entry, params, times, startup_time, load_time, raw_times=False, memory=None):
+    report = {
+        "script": str(script),
+        "entry": entry,
+        "size": params.get("size"),
+        "params": params,
+        "python": sys.version,
+        "runtime": runtime_info(),
+        "memory": memory,
+        "parallel": {
+            "executor": os.environ.get("PARALLEL_EXECUTOR") or "serial",
+            "workers": os.environ.get("PARALLEL_WORKERS"),
+        },
+        "startup_time": startup_time,
+        "load_time": load_time,
+        "iterations": len(times),
+        "work_time": sum(times),
+        "iteration_time": {
+            "mean": statistics.fmean(times) if times else None,
+            "median": statistics.median(times) if times else None,
+            "stdev": statistics.stdev(times) if len(times) > 1 else None,
+            "min": min(times) if times else None,
+            "max": max(times) if times else None,
+        },
+    }
+    if raw_times:
+        report["iteration_times"] = list(times)
+    return report
+
+
+def main(argv=None):
+    worker_start = time.time()
+    parser = argparse.ArgumentParser(
+        description="Load a benchmark once and run its workload repeatedly in this interpreter.")
+    parser.add_argument("script", help="benchmark script exposing a workload() function")
+    parser.add_argument("--entry", default="workload", help="function to call (default: workload)")
+    parser.add_argument("--size", type=int, help="problem size passed to the workload")
+    budget = parser.add_mutually_exclusive_group(required=True)
+    budget.add_argument("--iterations", type=int, help="number of iterations (0 measures startup only)")
+    budget.add_argument("--duration", type=float, help="time budget in seconds")
+    parser.add_argument("--report", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--raw-times", action="store_true", help="include every iteration time in the report")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record the tracemalloc peak of the workload (slows allocation-heavy workloads)")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="profile the workload into FILE (for unmeasured shadow runs, see profile_report.py)")
+    parser.add_argument("--profile-method", choices=["sampling", "monitoring"], default="sampling")
+    parser.add_argument("--profile-interval", type=float, default=0.005, help="seconds between stack samples")
+    args = parser.parse_args(argv)
+
+    try:
+        startup_time = worker_start - float(os.environ[LAUNCH_TIME_ENV])
+    except (KeyError, ValueError):
+        startup_time = None
+
+    load_start = time.perf_counter()
+    module = load_benchmark(args.script)
+    workload = getattr(module, args.entry)
+    load_time = time.perf_counter() - load_start
+
+    params = {} if args.size is None else {"size": args.size}
+    if args.trace_memory:
+        tracemalloc.start()
+    profiler = None
+    if args.profile:
+        from profiler import make_profiler
+
+        profiler = make_profiler(args.profile_method, args.profile_interval)
+        profiler.start()
+    before = memory_counters()
+    times = run_iterations(workload, args.iterations, args.duration, **params)
+    after = memory_counters()
+    if profiler is not None:
+        profiler.stop()
+    tracemalloc_peak = None
+    if args.trace_memory:
+        tracemalloc_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    report = build_report(args.script, args.entry, params, times, startup_time, load_time, args.raw_times,
+                          memory_report(before, after, tracemalloc_peak))
+    if profiler is not None:
+        from profiler import write_profile
+
+        write_profile(profiler, args.profile, script=str(args.script), size=args.size, python=sys.version,
+                      iterations=len(times), work_time=sum(times))
+    if args.report:
+        with open(args.report, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import sys
 import time
 
 n=10000
@@ -7,11 +8,22 @@ def collatz(n):
         n = 3 * n + 1 if n % 2 else n // 2
         count += 1
     return count
-def benchmark_collatz():
+
+def collatz_total(size):
+    """Total steps of the trajectories of 1..size; unlike a single trajectory, runtime grows with size."""
+    return sum(collatz(k) for k in range(1, size + 1))
+
+def workload(size=n):
+    """One unit of work for benchmark_worker.py: the trajectories of 1..size."""
+    return collatz_total(size)
+
+def benchmark_collatz(n=n, size=None):
     start_time=time.time()
-    result=collatz(n)
+    # A problem size (calibration.py, size sweeps) selects the range 1..size
+    result=collatz(n) if size is None else collatz_total(size)
     end_time= time.time()
     print(f"Execution Time: {end_time - start_time:.6f} seconds")
 
 if __name__ == "__main__":
-    benchmark_collatz()
\ No newline at end of file
+    # Optional problem size, e.g. from calibration.py
+    benchmark_collatz(size=int(sys.argv[1]) if len(sys.argv) > 1 else None)
\ No newline at end of file
@@ -0,0 +1,21 @@
+import sys
+
+from workloads.collatz import measure_range, selected_strategy
+from workloads.parallel import parallel_collatz_range, selected_parallelism
+
+N = 100000
+
+def workload(size=N, strategy=None):
+    """One unit of work for benchmark_worker.py: stopping times of 1..size."""
+    return parallel_collatz_range(size, strategy or selected_strategy(), *selected_parallelism())
+
+def benchmark_collatz_range(N=N, strategy=None):
+    executor, workers = selected_parallelism()
+    report = measure_range(N, strategy or selected_strategy(), executor=executor, workers=workers)
+    memory = f"{report['peak_memory'] / 1024:.0f} KiB" if report["peak_memory"] is not None else "n/a"
+    print(f"Collatz 1..{N} ({report['strategy']}, {executor} x{workers}): {report['seconds']:.3f} seconds, "
+          f"{report['throughput']:.0f} numbers/second, peak memory {memory}")
+
+if __name__ == "__main__":
+    # Optional problem size, e.g. from calibration.py
+    benchmark_collatz_range(int(sys.argv[1]) if len(sys.argv) > 1 else N)
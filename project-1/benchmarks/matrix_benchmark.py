@@ -1,26 +1,40 @@
 # File: matrix_multiply.py
 
+import sys
 import time
 import random
 
-def matrix_multiply(n=300):
+from workloads.matrix import selected_kernel
+from workloads.parallel import parallel_multiply, selected_parallelism
+from workloads.phases import phase
+
+def random_matrices(n):
     # Create two n×n matrices with random floats
     A = [[random.random() for _ in range(n)] for _ in range(n)]
     B = [[random.random() for _ in range(n)] for _ in range(n)]
-    
-    # Multiply A × B
-    # (Naive O(n^3) approach)
+    return A, B
+
+def workload(size=300, kernel=None):
+    """One unit of work for benchmark_worker.py: generate and multiply two size×size matrices."""
+    with phase("generate"):
+        A, B = random_matrices(size)
+    with phase("multiply"):
+        return parallel_multiply(A, B, kernel or selected_kernel(), *selected_parallelism())
+
+def matrix_multiply(n=300, kernel=None):
+    with phase("generate"):
+        A, B = random_matrices(n)
+
+    # Naive O(n^3) approach unless another kernel is selected (MATRIX_KERNEL),
+    # split by rows across PARALLEL_WORKERS threads or processes when PARALLEL_EXECUTOR is set
+    executor, workers = selected_parallelism()
     start_time = time.time()
-    C = [[0.0]*n for _ in range(n)]
-    for i in range(n):
-        for j in range(n):
-            total = 0.0
-            for k in range(n):
-                total += A[i][k] * B[k][j]
-            C[i][j] = total
+    with phase("multiply"):
+        C = parallel_multiply(A, B, kernel or selected_kernel(), executor, workers)
     end_time = time.time()
     
-    print(f"Matrix multiply {n}x{n} Execution Time: {end_time - start_time:.6f} seconds")
+    print(f"Matrix multiply {n}x{n} ({executor} x{workers}) Execution Time: {end_time - start_time:.6f} seconds")
 
 if __name__ == "__main__":
-    matrix_multiply(300)
+    # Optional problem size, e.g. from calibration.py
+    matrix_multiply(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
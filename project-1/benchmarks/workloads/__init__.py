@@ -0,0 +1,5 @@
+"""Workload implementations shared by the benchmark scripts in benchmarks/.
+
+Kept in a package so scripts/experiment.sh (which runs benchmarks/*.py) does not
+pick these modules up as benchmarks themselves.
+"""
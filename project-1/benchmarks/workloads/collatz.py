@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# footprint.py is in the project root, which is not on the path of a benchmark started directly
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from footprint import peak_rss
+
+# Environment variable the benchmark scripts read to select a strategy
+STRATEGY_ENV = "COLLATZ_STRATEGY"
+
+# Default bound on the number of entries kept by the memo strategy
+CACHE_SIZE = 1 << 20
+
+
+def stopping_time(n):
+    """Number of Collatz steps needed to reach 1 from n."""
+    count = 0
+    while n != 1:
+        n = 3 * n + 1 if n % 2 else n // 2
+        count += 1
+    return count
+
+
+def loop_range(N, start=1):
+    """Plain loop: every trajectory is followed to the end."""
+    return [stopping_time(n) for n in range(start, N + 1)]
+
+
+class BoundedCache(dict):
+    """Memo of stopping times that evicts the oldest entries once it holds max_entries."""
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        super().__init__({1: 0})
+        self.max_entries = max_entries
+
+    def trim(self):
+        if len(self) > self.max_entries:
+            # dicts keep insertion order, so the first keys are the oldest
+            for key in list(self)[:len(self) - self.max_entries // 2]:
+                del self[key]
+            self[1] = 0
+
+
+def memo_range(N, cache=None, cache_size=CACHE_SIZE, start=1):
+    """Follow each trajectory only until it reaches a number whose stopping time is cached.
+
+    Passing the same cache to several calls shares it between them.
+    """
+    cache = BoundedCache(cache_size) if cache is None else cache
+    result = []
+    for first in range(start, N + 1):
+        path = []
+        n = first
+        while n not in cache:
+            path.append(n)
+            n = 3 * n + 1 if n % 2 else n // 2
+        steps = cache[n]
+        for value in reversed(path):
+            steps += 1
+            cache[value] = steps
+        result.append(cache[first])
+        cache.trim()
+    return result
+
+
+def numpy_range(N, batch=1 << 16, start=1):
+    """Vectorized batch stepping: all numbers of a batch advance one step per iteration."""
+    import numpy as np
+
+    result = np.empty(N - start + 1, dtype=np.int64)
+    for batch_start in range(start, N + 1, batch):
+        values = np.arange(batch_start, min(batch_start + batch, N + 1), dtype=np.int64)
+        steps = np.zeros(len(values), dtype=np.int64)
+        active = np.flatnonzero(values != 1)
+        current = values[active]
+        while len(current):
+            odd = (current & 1).astype(bool)
+            current = np.where(odd, 3 * current + 1, current >> 1)
+            steps[active] += 1
+            # Drop the numbers that reached 1 so later steps only touch live trajectories
+            alive = current != 1
+            active, current = active[alive], current[alive]
+        result[batch_start - start:batch_start - start + len(values)] = steps
+    return result.tolist()
+
+
+STRATEGIES = {
+    "loop": loop_range,
+    "memo": memo_range,
+    "numpy": numpy_range,
+}
+
+
+def selected_strategy(default="loop"):
+    """Strategy name from the COLLATZ_STRATEGY environment variable."""
+    return os.environ.get(STRATEGY_ENV, default)
+
+
+def collatz_range(N, strategy="loop", start=1):
+    """Stopping times for start..N (1..N by default) computed with a registered strategy."""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown Collatz strategy '{strategy}'. Choose from: {', '.join(STRATEGIES)}")
+    return STRATEGIES[strategy](N, start=start)
+
+
+def measure_range(N, strategy="loop", trace_memory=False, executor="serial", workers=1):
+    """Run a range and report throughput (numbers/second) and peak memory (bytes).
+
+    Peak memory is the process peak RSS, or the tracemalloc peak with trace_memory=True
+    (which also slows down allocation-heavy strategies, so throughput is lower).
+    The range can be split across a thread or process pool (see parallel.py); peak
+    memory then only covers this process.
+    """
+    from .parallel import parallel_collatz_range
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = parallel_collatz_range(N, strategy, executor, workers)
+    elapsed = time.perf_counter() - start
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    else:
+        peak = peak_rss()
+    return {
+        "N": N,
+        "strategy": strategy,
+        "executor": executor,
+        "workers": workers,
+        "seconds": elapsed,
+        "throughput": N / elapsed if elapsed > 0 else float("inf"),
+        "peak_memory": peak,
+        "memory_source": "tracemalloc" if trace_memory else "rss",
+        "max_stopping_time": max(result) if result else 0,
+    }
@@ -0,0 +1,153 @@
+import math
+import os
+from array import array
+
+# Environment variable the benchmark scripts read to select a kernel
+KERNEL_ENV = "MATRIX_KERNEL"
+
+# Tile edge used by the blocked kernel
+BLOCK_SIZE = 32
+
+
+def naive(A, B):
+    """Triple loop with a local accumulator; B is read column-wise (B[k][j])."""
+    n = len(B)
+    C = [[0.0] * n for _ in range(len(A))]
+    for i in range(len(A)):
+        for j in range(n):
+            total = 0.0
+            for k in range(n):
+                total += A[i][k] * B[k][j]
+            C[i][j] = total
+    return C
+
+
+def naive_indexed(A, B):
+    """Triple loop accumulating directly into result[i][j] (the original benchmark.py kernel)."""
+    size = len(B)
+    result = [[0] * size for _ in range(len(A))]
+    for i in range(len(A)):
+        for j in range(size):
+            for k in range(size):
+                result[i][j] += A[i][k] * B[k][j]
+    return result
+
+
+def transposed(A, B):
+    """Transpose B once so every dot product walks two rows."""
+    Bt = [list(column) for column in zip(*B)]
+    C = []
+    for row in A:
+        C_row = []
+        for column in Bt:
+            total = 0.0
+            for a, b in zip(row, column):
+                total += a * b
+            C_row.append(total)
+        C.append(C_row)
+    return C
+
+
+def blocked(A, B, block=BLOCK_SIZE):
+    """Tiled i-k-j loop order: each tile of B is reused while it is hot in cache."""
+    n = len(B)
+    C = [[0.0] * n for _ in range(len(A))]
+    for ii in range(0, len(A), block):
+        for kk in range(0, n, block):
+            for jj in range(0, n, block):
+                j_end = min(jj + block, n)
+                for i in range(ii, min(ii + block, len(A))):
+                    A_row = A[i]
+                    C_row = C[i]
+                    for k in range(kk, min(kk + block, n)):
+                        a = A_row[k]
+                        B_row = B[k]
+                        for j in range(jj, j_end):
+                            C_row[j] += a * B_row[j]
+    return C
+
+
+def flat_array(A, B):
+    """Unboxed row-major array('d') storage accessed through memoryviews."""
+    n = len(B)
+    a = memoryview(array("d", [x for row in A for x in row]))
+    bt = memoryview(array("d", [x for column in zip(*B) for x in column]))
+    c = array("d", bytes(8 * len(A) * n))
+    for i in range(len(A)):
+        a_offset = i * n
+        for j in range(n):
+            b_offset = j * n
+            total = 0.0
+            for k in range(n):
+                total += a[a_offset + k] * bt[b_offset + k]
+            c[a_offset + j] = total
+    return [c[i * n:(i + 1) * n].tolist() for i in range(len(A))]
+
+
+def numpy_matmul(A, B):
+    """NumPy `@` baseline (BLAS); needs numpy in the benchmarked interpreter."""
+    import numpy as np
+
+    return (np.array(A, dtype=float) @ np.array(B, dtype=float)).tolist()
+
+
+KERNELS = {
+    "naive": naive,
+    "naive_indexed": naive_indexed,
+    "transposed": transposed,
+    "blocked": blocked,
+    "flat_array": flat_array,
+    "numpy": numpy_matmul,
+}
+
+
+def selected_kernel(default="naive"):
+    """Kernel name from the MATRIX_KERNEL environment variable."""
+    return os.environ.get(KERNEL_ENV, default)
+
+
+def results_match(C, reference, rel_tol=1e-9, abs_tol=1e-9):
+    return len(C) == len(reference) and all(
+        len(row) == len(ref_row) and all(math.isclose(x, y, rel_tol=rel_tol, abs_tol=abs_tol)
+                                         for x, y in zip(row, ref_row))
+        for row, ref_row in zip(C, reference)
+    )
+
+
+def multiply(A, B, kernel="naive", check=False):
+    """Multiply two square matrices with a registered kernel.
+
+    A may also be a block of rows of a square matrix (see parallel.py), in
+    which case the matching rows of the product are returned. With check=True the result is compared against the naive kernel and a
+    ValueError is raised when they differ.
+    """
+    if kernel not in KERNELS:
+        raise ValueError(f"Unknown matrix kernel '{kernel}'. Choose from: {', '.join(KERNELS)}")
+    C = KERNELS[kernel](A, B)
+    if check and kernel != "naive" and not results_match(C, naive(A, B)):
+        raise ValueError(f"Matrix kernel '{kernel}' does not match the naive result")
+    return C
+
+
+def verify_kernels(size=64, kernels=None):
+    """Check every kernel against the naive result on random matrices; returns {kernel: ok or error}."""
+    import random
+
+    rng = random.Random(0)
+    A = [[rng.random() for _ in range(size)] for _ in range(size)]
+    B = [[rng.random() for _ in range(size)] for _ in range(size)]
+    status = {}
+    for name in kernels or KERNELS:
+        try:
+            multiply(A, B, name, check=True)
+            status[name] = "ok"
+        except ImportError as e:
+            status[name] = f"unavailable ({e})"
+        except ValueError as e:
+            status[name] = str(e)
+    return status
+
+
+if __name__ == "__main__":
+    for name, status in verify_kernels().items():
+        print(f"{name}: {status}")
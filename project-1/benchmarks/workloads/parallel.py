@@ -0,0 +1,80 @@
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .collatz import collatz_range
+from .matrix import multiply
+
+# Environment variables the benchmark scripts read to split their work across workers
+EXECUTOR_ENV = "PARALLEL_EXECUTOR"
+WORKERS_ENV = "PARALLEL_WORKERS"
+
+# "thread" only scales on free-threaded builds (python3.14t with PYTHON_GIL=0)
+EXECUTORS = {
+    "serial": None,
+    "thread": ThreadPoolExecutor,
+    "process": ProcessPoolExecutor,
+}
+
+# Pools are kept for the lifetime of the process, so benchmark_worker.py iterations
+# do not pay the pool startup again
+_pools = {}
+
+
+def selected_parallelism(default_executor="serial"):
+    """(executor, workers) from PARALLEL_EXECUTOR and PARALLEL_WORKERS (default: all cores it may use)."""
+    executor = os.environ.get(EXECUTOR_ENV) or default_executor
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{executor}'. Choose from: {', '.join(EXECUTORS)}")
+    # A benchmark pinned to a core group (cpu_affinity.py) only uses the cores of its group
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    workers = int(os.environ.get(WORKERS_ENV) or (1 if executor == "serial" else cores))
+    return executor, workers
+
+
+def get_pool(executor, workers):
+    key = (executor, workers)
+    if key not in _pools:
+        _pools[key] = EXECUTORS[executor](max_workers=workers)
+    return _pools[key]
+
+
+@atexit.register
+def shutdown_pools():
+    for pool in _pools.values():
+        pool.shutdown()
+    _pools.clear()
+
+
+def split_range(start, stop, parts):
+    """Split [start, stop) into at most `parts` contiguous, near-equal (start, stop) blocks."""
+    parts = max(1, min(parts, stop - start))
+    size, extra = divmod(stop - start, parts)
+    blocks = []
+    for index in range(parts):
+        end = start + size + (1 if index < extra else 0)
+        blocks.append((start, end))
+        start = end
+    return blocks
+
+
+def parallel_map(func, calls, executor="serial", workers=1):
+    """Call func(*args) for every args tuple in `calls`, in order, on the chosen executor."""
+    if executor == "serial" or workers == 1 or len(calls) == 1:
+        return [func(*args) for args in calls]
+    return list(get_pool(executor, workers).map(func, *zip(*calls)))
+
+
+def parallel_multiply(A, B, kernel="naive", executor="serial", workers=1):
+    """Multiply A and B with each worker computing a contiguous block of rows of the product."""
+    calls = [(A[start:stop], B, kernel) for start, stop in split_range(0, len(A), workers)]
+    return [row for block in parallel_map(multiply, calls, executor, workers) for row in block]
+
+
+def parallel_collatz_range(N, strategy="loop", executor="serial", workers=1):
+    """Stopping times for 1..N with each worker computing a contiguous block of numbers.
+
+    Every worker follows its own trajectories, so the memo strategy keeps one cache per block.
+    """
+    calls = [(stop - 1, strategy, start) for start, stop in split_range(1, N + 1, workers)]
+    return [steps for block in parallel_map(collatz_range, calls, executor, workers) for steps in block]
@@ -0,0 +1,56 @@
+import atexit
+import json
+import os
+import time
+from contextlib import contextmanager
+
+# Environment variable naming the side-car file the phase markers are appended to
+PHASE_FILE_ENV = "BENCHMARK_PHASE_FILE"
+
+# Wall clock (the clock of EnergiBridge's Time column) and perf_counter read together once;
+# markers are perf_counter readings shifted onto the wall clock, in epoch milliseconds
+_WALL_ANCHOR_NS = time.time_ns()
+_PERF_ANCHOR_NS = time.perf_counter_ns()
+
+# Markers are only recorded when the launcher asked for them, so long runs without a
+# phase file do not accumulate one marker per iteration
+_PHASE_FILE = os.environ.get(PHASE_FILE_ENV)
+
+_markers = []
+
+
+def now_ms():
+    """High-resolution timestamp in epoch milliseconds."""
+    return (_WALL_ANCHOR_NS + time.perf_counter_ns() - _PERF_ANCHOR_NS) / 1e6
+
+
+@contextmanager
+def phase(name):
+    """Mark a block of a benchmark as a named phase.
+
+    Markers are kept in memory and written when the process exits, so the
+    measured window contains no extra I/O. Without BENCHMARK_PHASE_FILE at
+    startup nothing is recorded.
+    """
+    if not _PHASE_FILE:
+        yield
+        return
+    start = now_ms()
+    try:
+        yield
+    finally:
+        _markers.append((name, start, now_ms()))
+
+
+def flush(path=None):
+    """Append the collected markers as JSON lines to the phase side-car file."""
+    path = path or _PHASE_FILE
+    if not path or not _markers:
+        return
+    with open(path, "a") as file:
+        for name, start, end in _markers:
+            file.write(json.dumps({"phase": name, "start": start, "end": end, "pid": os.getpid()}) + "\n")
+    _markers.clear()
+
+
+atexit.register(flush)
@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from cpu_affinity import parse_cpu_list, pin_started, pinned_command
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+worker_script = PROJECT_ROOT / "benchmark_worker.py"
+
+# Relative deviation from the target runtime that is accepted
+TOLERANCE = 0.1
+
+# Upper bound on worker launches per benchmark
+MAX_PROBES = 25
+
+
+def measure(python, script, size, repeats=3, cpus=None):
+    """Median wall time (s) of one workload iteration at `size`, measured in the target interpreter."""
+    command = pinned_command([python, worker_script, script, "--size", size, "--iterations", repeats], cpus)
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    pin_started(process.pid, cpus)
+    output, errors = process.communicate()
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command, output, errors)
+    return json.loads(output)["iteration_time"]["median"]
+
+
+def calibrate(python, script, target, start_size=16, max_size=10**7, tolerance=TOLERANCE, repeats=3, cpus=None):
+    """Search the problem size whose workload takes `target` seconds on this host.
+
+    The size is grown geometrically until the runtime passes the target, then the
+    bracket is bisected until the runtime is within `tolerance` of the target. The
+    workload's runtime must grow with its size. When the target cannot be reached
+    (max_size or MAX_PROBES) the closest size is returned with a warning.
+    Runs on `cpus` when given, as the measured runs do. Returns (size, measured runtime).
+    """
+    low, low_time = None, None
+    size = start_size
+    runtime = measure(python, script, size, repeats, cpus)
+    probes = 1
+    while runtime < target and size < max_size and probes < MAX_PROBES:
+        low, low_time = size, runtime
+        # Grow faster while far away from the target
+        size = min(max_size, size * (4 if runtime < target / 10 else 2))
+        runtime = measure(python, script, size, repeats, cpus)
+        probes += 1
+    high, high_time = size, runtime
+
+    best = min([(low, low_time), (high, high_time)] if low else [(high, high_time)],
+               key=lambda pair: abs(pair[1] - target))
+    # Bisect only a bracket around the target; a capped search has none
+    while (low is not None and high_time >= target and high - low > 1 and abs(best[1] - target) > tolerance * target
+           and probes < MAX_PROBES):
+        middle = (low + high) // 2
+        runtime = measure(python, script, middle, repeats, cpus)
+        probes += 1
+        if runtime < target:
+            low = middle
+        else:
+            high = middle
+        if abs(runtime - target) < abs(best[1] - target):
+            best = (middle, runtime)
+    if abs(best[1] - target) > tolerance * target:
+        reason = f"max_size {max_size} reached" if high_time < target and size >= max_size else f"{probes} probes used"
+        print(f"Warning: {os.path.basename(script)} takes {best[1]:.3f} s at size {best[0]}, not within "
+              f"{tolerance:.0%} of the {target:.3f} s target ({reason})", file=sys.stderr)
+    return best
+
+
+def host_key():
+    return platform.node() or "unknown-host"
+
+
+def load_calibration(calibration_file):
+    if not os.path.exists(calibration_file):
+        return {}
+    with open(calibration_file, "r") as file:
+        return json.load(file)
+
+
+def lookup_size(calibration_file, script, host=None):
+    """Calibrated size of a benchmark on this host, or None if it was never calibrated."""
+    entry = load_calibration(calibration_file).get(host or host_key(), {}).get(os.path.basename(script))
+    return entry["size"] if entry else None
+
+
+def save_calibration(calibration_file, script, python, target, size, runtime):
+    calibration = load_calibration(calibration_file)
+    calibration.setdefault(host_key(), {})[os.path.basename(script)] = {
+        "size": size,
+        "runtime": runtime,
+        "target": target,
+        "python": python,
+        "calibrated": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    with open(calibration_file, "w") as file:
+        json.dump(calibration, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibrate benchmark problem sizes to a target runtime on this host.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="calibrate benchmarks and store the sizes")
+    run_parser.add_argument("scripts", nargs="+")
+    run_parser.add_argument("--python", default=sys.executable,
+                            help="reference interpreter; every version then runs the same size")
+    run_parser.add_argument("--target", type=float, default=1.0, help="target runtime per iteration in seconds")
+    run_parser.add_argument("--output", required=True, help="calibration JSON file, stored with the results")
+    run_parser.add_argument("--cpus", help="CPU list the measurements are pinned to, e.g. 2-5 (Linux)")
+
+    lookup_parser = subparsers.add_parser("lookup", help="print the calibrated size of a benchmark")
+    lookup_parser.add_argument("calibration_file")
+    lookup_parser.add_argument("script")
+    args = parser.parse_args()
+
+    if args.command == "lookup":
+        size = lookup_size(args.calibration_file, args.script)
+        if size is None:
+            sys.exit(1)
+        print(size)
+    else:
+        for script in args.scripts:
+            print(f"Calibrating {os.path.basename(script)} to {args.target:.2f} s with {args.python}...")
+            size, runtime = calibrate(args.python, script, args.target,
+                                      cpus=parse_cpu_list(args.cpus) if args.cpus else None)
+            save_calibration(args.output, script, args.python, args.target, size, runtime)
+            print(f"  size={size} ({runtime:.3f} s per iteration)")
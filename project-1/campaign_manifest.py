@@ -0,0 +1,349 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+from collections import Counter
+
+from size_sweep import sweep_sizes
+
+# Kept free of pandas/numpy: the manifest is updated by the orchestrator during a campaign
+
+# Attempts after which a failing run is no longer re-queued
+MAX_ATTEMPTS = 3
+
+# Data rows a trace needs to count as a measurement
+MIN_TRACE_ROWS = 2
+
+# Columns of which at least one must be present in a trace
+ENERGY_COLUMNS = ["PACKAGE_ENERGY (J)", "SYSTEM_POWER (Watts)"]
+
+# Folder next to the manifest that replaced campaigns are moved to, one subfolder per campaign
+ARCHIVE_DIR = "archive"
+
+
+def run_id(version, mode, benchmark, run, size=None):
+    """Identifier of one run; experiment.sh builds the same string."""
+    return f"{version}:{mode}:{os.path.basename(str(benchmark))}:{size or ''}:run{run}"
+
+
+def validate_trace(csv_path):
+    """Problem with an EnergiBridge trace (missing, empty, truncated), or None when it is usable."""
+    if not os.path.exists(csv_path):
+        return "missing"
+    if os.path.getsize(csv_path) == 0:
+        return "empty"
+    with open(csv_path, "rb") as file:
+        header = file.readline().decode(errors="replace").strip().split(",")
+        rows = [line for line in (file.readline() for _ in range(MIN_TRACE_ROWS)) if line.strip()]
+        # The last line shows whether the meter was stopped in the middle of a write
+        file.seek(max(0, os.path.getsize(csv_path) - 64 * 1024))
+        last = file.read().rstrip(b"\r\n").rsplit(b"\n", 1)[-1].decode(errors="replace")
+    if "Time" not in header or not any(column in header for column in ENERGY_COLUMNS):
+        return "no energy columns"
+    if len(rows) < MIN_TRACE_ROWS:
+        return f"fewer than {MIN_TRACE_ROWS} samples"
+    if len(last.split(",")) != len(header):
+        return "truncated last row"
+    return None
+
+
+def validate_files(files):
+    """First problem with a run's output files ({kind: path}), or None when all are usable."""
+    for kind, path in files.items():
+        path = str(path)
+        if kind == "csv":
+            problem = validate_trace(path)
+        elif not os.path.exists(path):
+            problem = "missing"
+        elif os.path.getsize(path) == 0:
+            problem = "empty"
+        elif path.endswith(".json"):
+            try:
+                with open(path) as file:
+                    json.load(file)
+                problem = None
+            except ValueError:
+                problem = "invalid JSON"
+        else:
+            problem = None
+        if problem:
+            return f"{kind} {os.path.basename(path)}: {problem}"
+    return None
+
+
+class CampaignManifest:
+    """Persisted schedule of a campaign: run order, status and per-run metadata.
+
+    Every change is written to disk immediately (atomically), so an interrupted
+    campaign can resume where it stopped. Runs are "pending", "running", "done"
+    or "failed"; a run left "running" was interrupted and is pending again.
+    """
+
+    def __init__(self, path, data):
+        self.path = str(path)
+        self.data = data
+        self.runs = {run["id"]: run for run in data["runs"]}
+        # Runs are finished from the background writer thread while the next one starts
+        self._lock = threading.RLock()
+
+    @classmethod
+    def create(cls, path, runs, seed=None, config=None):
+        data = {"seed": seed, "config": config or {}, "created": time.time(), "runs": []}
+        manifest = cls(path, data)
+        for run in runs:
+            manifest.add(run, save=False)
+        manifest.save()
+        return manifest
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            return cls(path, json.load(file))
+
+    @classmethod
+    def open(cls, path, runs, seed=None, config=None, fresh=False):
+        """Resume the manifest at `path`, or create it with `runs` (in order) when absent or `fresh`."""
+        if os.path.exists(path) and not fresh:
+            manifest = cls.load(path)
+            if manifest.data["config"] != (config or {}):
+                raise ValueError(f"{path} belongs to a campaign with a different configuration "
+                                 f"({manifest.data['config']}); start a fresh campaign to replace it")
+            return manifest
+        return cls.create(path, runs, seed, config)
+
+    def save(self):
+        with self._lock:
+            temporary = f"{self.path}.tmp"
+            with open(temporary, "w") as file:
+                json.dump(self.data, file, indent=2)
+            os.replace(temporary, self.path)
+
+    def add(self, run, save=True):
+        """Append a run (a dict with at least "id") unless it is already scheduled."""
+        with self._lock:
+            if run["id"] not in self.runs:
+                entry = dict(run, status="pending", attempts=0, files={})
+                self.data["runs"].append(entry)
+                self.runs[entry["id"]] = entry
+                if save:
+                    self.save()
+            return self.runs[run["id"]]
+
+    def is_done(self, run_id):
+        run = self.runs.get(run_id)
+        return run is not None and run["status"] == "done"
+
+    def requeue_invalid(self):
+        """Re-queue interrupted runs and finished runs whose files are gone or corrupted."""
+        requeued = []
+        for run in self.data["runs"]:
+            problem = None
+            if run["status"] == "running":
+                problem = "interrupted"
+            elif run["status"] == "done":
+                problem = validate_files(run["files"])
+            if problem:
+                run["status"] = "pending"
+                run["error"] = problem
+                requeued.append(run)
+        if requeued:
+            self.save()
+        return requeued
+
+    def pending(self):
+        """Runs still to do, in schedule order; failed runs are retried up to MAX_ATTEMPTS times."""
+        return [run for run in self.data["runs"]
+                if run["status"] in ("pending", "running")
+                or (run["status"] == "failed" and run["attempts"] < MAX_ATTEMPTS)]
+
+    def start(self, run_id, **metadata):
+        with self._lock:
+            run = self.runs[run_id]
+            run.update(metadata, status="running", started=time.time(), attempts=run["attempts"] + 1)
+            self.save()
+
+    def finish(self, run_id, files, problem=None, **metadata):
+        """Record a finished run; it is "done" only when its files are valid. Returns the problem, if any."""
+        problem = problem or validate_files(files)
+        with self._lock:
+            run = self.runs[run_id]
+            run.update(metadata, files={kind: str(path) for kind, path in files.items()}, finished=time.time(),
+                       status="failed" if problem else "done", error=problem)
+            self.save()
+        return problem
+
+    def complete(self):
+        """Record that the campaign ran to its end (all runs done, or an adaptive campaign stopped)."""
+        with self._lock:
+            self.data["completed"] = time.time()
+            self.save()
+
+    def is_completed(self):
+        return self.data.get("completed") is not None
+
+    def counts(self):
+        return Counter(run["status"] for run in self.data["runs"])
+
+
+def is_unfinished(path):
+    """True when a campaign manifest exists at `path` and its campaign has not run to its end."""
+    return os.path.exists(path) and not CampaignManifest.load(path).is_completed()
+
+
+def archive_campaign(manifest_path, folders):
+    """Move a campaign's manifest and result folders to archive/<created>/ next to the manifest.
+
+    Used by fresh campaigns, so runs of the replaced campaign never reach the analysis.
+    Returns the archive folder, or None when there was nothing to move.
+    """
+    paths = [str(path) for path in [manifest_path, *folders] if os.path.exists(path)]
+    if not paths:
+        return None
+    created = time.time()
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as file:
+            created = json.load(file).get("created", created)
+    root = os.path.join(os.path.dirname(os.path.abspath(manifest_path)), ARCHIVE_DIR)
+    name = time.strftime("%Y%m%d-%H%M%S", time.localtime(created))
+    target, suffix = os.path.join(root, name), 1
+    while os.path.exists(target):
+        suffix += 1
+        target = os.path.join(root, f"{name}-{suffix}")
+    os.makedirs(target)
+    for path in paths:
+        shutil.move(path, os.path.join(target, os.path.basename(os.path.normpath(path))))
+    return target
+
+
+@contextlib.contextmanager
+def locked(path):
+    """Exclusive lock on a manifest across processes (experiment.sh helpers and a resuming orchestrator)."""
+    import fcntl  # the command line is only used by experiment.sh (Linux, macOS)
+
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def plan_runs(versions, modes, scripts, runs, seed=42, sweep_steps=None):
+    """experiment.sh schedule: per version, mode, script (and sweep size), runs in shuffled order."""
+    rng = random.Random(seed)
+    planned = []
+    for version in versions:
+        for mode in modes:
+            for script in scripts:
+                for size in sweep_sizes(script, sweep_steps) if sweep_steps else [None]:
+                    run_numbers = list(range(1, runs + 1))
+                    rng.shuffle(run_numbers)
+                    for run in run_numbers:
+                        planned.append({"id": run_id(version, mode, script, run, size), "version": version,
+                                        "mode": mode, "script": script, "run": run, "size": size})
+    return planned
+
+
+def print_status(manifest):
+    counts = manifest.counts()
+    print(f"{manifest.path}: {len(manifest.data['runs'])} runs, "
+          + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+    for run in manifest.data["runs"]:
+        if run["status"] == "failed":
+            print(f"  failed ({run['attempts']} attempts): {run['id']}: {run.get('error')}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plan, resume and record experiment.sh campaigns.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = subparsers.add_parser("plan", help="create the manifest, or check that it matches and resume it")
+    plan_parser.add_argument("manifest")
+    plan_parser.add_argument("--versions", nargs="+", required=True)
+    plan_parser.add_argument("--modes", nargs="+", required=True)
+    plan_parser.add_argument("--scripts", nargs="+", required=True)
+    plan_parser.add_argument("--runs", type=int, required=True)
+    plan_parser.add_argument("--sweep-steps", type=int)
+    plan_parser.add_argument("--seed", type=int, default=42)
+    plan_parser.add_argument("--config", nargs="*", default=[], metavar="KEY=VALUE",
+                             help="settings that change the results (kernel, executor, ...)")
+    plan_parser.add_argument("--fresh", action="store_true", help="discard an existing manifest")
+
+    pending_parser = subparsers.add_parser("pending", help="re-queue corrupted runs and print the runs still to do "
+                                                           "(id, version, mode, script, run, size; tab separated)")
+    pending_parser.add_argument("manifest")
+
+    check_parser = subparsers.add_parser("check", help="exit 0 when a run is done and its files are valid")
+    check_parser.add_argument("manifest")
+    check_parser.add_argument("id")
+
+    start_parser = subparsers.add_parser("start", help="mark a run as running")
+    start_parser.add_argument("manifest")
+    start_parser.add_argument("id")
+
+    finish_parser = subparsers.add_parser("finish", help="validate a run's files and mark it done or failed")
+    finish_parser.add_argument("manifest")
+    finish_parser.add_argument("id")
+    finish_parser.add_argument("--file", nargs=2, action="append", default=[], metavar=("KIND", "PATH"))
+    finish_parser.add_argument("--problem", help="mark the run failed for this reason, e.g. the benchmark's exit code")
+
+    archive_parser = subparsers.add_parser("archive", help="move the manifest and result folders of a "
+                                                           "campaign to the archive before a fresh one")
+    archive_parser.add_argument("manifest")
+    archive_parser.add_argument("folders", nargs="*")
+
+    unfinished_parser = subparsers.add_parser("unfinished", help="exit 0 when the manifest belongs to a campaign "
+                                                                 "that has not run to its end")
+    unfinished_parser.add_argument("manifest")
+
+    complete_parser = subparsers.add_parser("complete", help="record that the campaign ran to its end once no "
+                                                             "runs are pending")
+    complete_parser.add_argument("manifest")
+    complete_parser.add_argument("--stopped", action="store_true",
+                                 help="an adaptive campaign stopped early; pending runs are not needed")
+
+    status_parser = subparsers.add_parser("status", help="print the progress of a campaign")
+    status_parser.add_argument("manifest")
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        config = {"versions": args.versions, "modes": args.modes, "scripts": args.scripts, "runs": args.runs,
+                  "sweep_steps": args.sweep_steps, "seed": args.seed}
+        config.update(setting.split("=", 1) for setting in args.config)
+        planned = plan_runs(args.versions, args.modes, args.scripts, args.runs, args.seed, args.sweep_steps)
+        try:
+            manifest = CampaignManifest.open(args.manifest, planned, args.seed, config, args.fresh)
+        except ValueError as error:
+            print(f"Error: {error} (--fresh, or FRESH_CAMPAIGN=1 for experiment.sh)", file=sys.stderr)
+            sys.exit(1)
+        print_status(manifest)
+    elif args.command == "status":
+        print_status(CampaignManifest.load(args.manifest))
+    elif args.command == "unfinished":
+        sys.exit(0 if is_unfinished(args.manifest) else 1)
+    elif args.command == "archive":
+        target = archive_campaign(args.manifest, args.folders)
+        if target:
+            print(f"Moved the previous campaign to {target}")
+    else:
+        with locked(args.manifest):
+            manifest = CampaignManifest.load(args.manifest)
+            if args.command == "pending":
+                for run in manifest.requeue_invalid():
+                    print(f"Re-queued {run['id']}: {run['error']}", file=sys.stderr)
+                for run in manifest.pending():
+                    print("\t".join(str(run[key] or "") for key in ("id", "version", "mode", "script", "run", "size")))
+            elif args.command == "check":
+                run = manifest.runs.get(args.id)
+                sys.exit(0 if run and run["status"] == "done" and not validate_files(run["files"]) else 1)
+            elif args.command == "start":
+                manifest.start(args.id)
+            elif args.command == "complete":
+                if args.stopped or not manifest.pending():
+                    manifest.complete()
+            elif args.command == "finish":
+                problem = manifest.finish(args.id, dict(args.file), args.problem)
+                if problem:
+                    print(f"Warning: run {args.id} is not valid ({problem}); it will be re-queued on resume")
@@ -0,0 +1,235 @@
+import argparse
+import glob
+import itertools
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.stats import mannwhitneyu, shapiro, t
+
+from bootstrap import N_RESAMPLES, STATISTICS, bootstrap_many
+from config_matrix import COMBINE, parse_mode
+from run_catalog import load_runs, run_energy
+from size_sweep import split_size_label
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+# Result folders of experiment.sh (results/Python3.X) and main.py (energy_results/python3.X_runs)
+RESULT_FOLDER_PATTERNS = [
+    str(PROJECT_ROOT / "results" / "Python*"),
+    str(PROJECT_ROOT / "energy_results" / "python*_runs"),
+]
+
+CORRECTIONS = ["holm", "bh", "bonferroni", "none"]
+
+RESULT_COLUMNS = [
+    "benchmark", "factor", "fixed", "a", "b", "n_a", "n_b", "normal_a", "normal_b", "test_used",
+    "statistic", "p_value", "p_adjusted", "significant", "median_a", "median_b", "median_diff",
+    "relative_diff", "cohen_d", "cles",
+]
+
+CI_COLUMNS = [f"{name}_ci_{bound}" for name in STATISTICS for bound in ("low", "high")]
+
+
+def discover_folders(patterns=RESULT_FOLDER_PATTERNS):
+    return sorted(folder for pattern in patterns for folder in glob.glob(pattern) if os.path.isdir(folder))
+
+
+def load_all(folders):
+    """Energy of every run in every folder (all benchmarks, versions and modes) in one frame."""
+    frames = []
+    for folder in folders:
+        runs = load_runs(folder)
+        frames.append(runs.assign(energy=run_energy(runs))[["benchmark", "version", "mode", "run", "energy"]])
+    runs = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=["benchmark", "version", "mode", "run", "energy"])
+    return runs.dropna(subset=["energy"])
+
+
+def remove_outliers(values, z_threshold=3):
+    """Same rule as analyze_graphs.remove_outliers: drop values more than 3 SD from the mean."""
+    if len(values) < 3 or np.std(values) == 0:
+        return values
+    return values[np.abs((values - np.mean(values)) / np.std(values)) < z_threshold]
+
+
+def group_samples(runs, outliers=True):
+    """Energy samples per (benchmark, version, mode), outliers removed."""
+    samples = {}
+    for key, group in runs.groupby(["benchmark", "version", "mode"]):
+        values = group["energy"].to_numpy(dtype=float)
+        samples[key] = remove_outliers(values) if outliers else values
+    return samples
+
+
+def configuration_variant(mode):
+    """(configuration, variant) of a mode label, e.g. "optimized+jit-blocked-n256" -> ("optimized+jit", "-blocked-n256").
+
+    The variant holds what experiment.sh appends to the configuration (kernel, strategy or
+    executor suffixes and the sweep size). Returns None for labels that are not configurations.
+    """
+    base, size = split_size_label(mode)
+    try:
+        names = parse_mode(base)
+    except ValueError:
+        return None
+    variant = "".join(part[len(name):] for part, name in zip(base.split(COMBINE), names))
+    return COMBINE.join(names), variant + (f"-n{size}" if size is not None else "")
+
+
+def comparison_pairs(samples, by=("version", "mode")):
+    """All pairs of groups that differ in exactly one factor (version or mode) within a benchmark.
+
+    Modes are only compared when they differ in configuration alone: sweep sizes and
+    kernel/strategy/executor variants are not contrasts and would inflate the correction family.
+    """
+    pairs = []
+    for factor in by:
+        index = {"version": 1, "mode": 2}
+        cells = {}
+        for key in samples:
+            if factor == "version":
+                cells.setdefault((key[0], key[2]), []).append(key)
+                continue
+            contrast = configuration_variant(key[2])
+            if contrast is not None:
+                cells.setdefault((key[0], key[1], contrast[1]), []).append(key)
+        for (benchmark, fixed, *_), keys in sorted(cells.items()):
+            for key_a, key_b in itertools.combinations(sorted(keys, key=lambda key: key[index[factor]]), 2):
+                pairs.append((benchmark, factor, fixed, key_a, key_b))
+    return pairs
+
+
+def adjust_p_values(p_values, method="holm"):
+    """Family-wise (Holm, Bonferroni) or false discovery rate (Benjamini-Hochberg) adjusted p-values."""
+    p_values = np.asarray(p_values, dtype=float)
+    m = len(p_values)
+    if m == 0 or method == "none":
+        return p_values
+    if method == "bonferroni":
+        return np.minimum(p_values * m, 1.0)
+    order = np.argsort(p_values)
+    ranked = p_values[order]
+    if method == "holm":
+        adjusted = np.maximum.accumulate(np.minimum(ranked * (m - np.arange(m)), 1.0))
+    elif method == "bh":
+        adjusted = np.minimum.accumulate((ranked * m / np.arange(1, m + 1))[::-1])[::-1]
+        adjusted = np.minimum(adjusted, 1.0)
+    else:
+        raise ValueError(f"Unknown correction '{method}'. Choose from: {', '.join(CORRECTIONS)}")
+    result = np.empty(m)
+    result[order] = adjusted
+    return result
+
+
+def compare_all(samples, by=("version", "mode"), alpha=0.05, correction="holm", n_resamples=N_RESAMPLES,
+                workers=1, seed=0):
+    """Pairwise tests between all groups, corrected for multiple comparisons, as one table.
+
+    Per-group statistics (Shapiro-Wilk, mean, variance, median) are computed once.
+    As in analyze_graphs.compare_samples, pairs of normal samples use Welch's t-test,
+    vectorized over all pairs; the others get the Mann-Whitney U test, one pair at a time.
+    With `n_resamples` > 0, every comparison gets bootstrap confidence intervals
+    (at 1 - alpha) for the median difference, mean difference and CLES.
+    """
+    pairs = [pair for pair in comparison_pairs(samples, by)
+             if len(samples[pair[3]]) >= 3 and len(samples[pair[4]]) >= 3]
+    if not pairs:
+        return pd.DataFrame(columns=RESULT_COLUMNS + (CI_COLUMNS if n_resamples else []))
+
+    keys = sorted({key for pair in pairs for key in pair[3:]})
+    position = {key: i for i, key in enumerate(keys)}
+    n = np.array([len(samples[key]) for key in keys], dtype=float)
+    mean = np.array([np.mean(samples[key]) for key in keys])
+    var = np.array([np.var(samples[key], ddof=1) for key in keys])
+    median = np.array([np.median(samples[key]) for key in keys])
+    normal = np.array([shapiro(samples[key]).pvalue > alpha if np.ptp(samples[key]) > 0 else False
+                       for key in keys])
+
+    a = np.array([position[pair[3]] for pair in pairs])
+    b = np.array([position[pair[4]] for pair in pairs])
+
+    # Welch's t-test for every pair at once (b - a, like perform_stat_tests' 3.14 - 3.11)
+    se2_a, se2_b = var[a] / n[a], var[b] / n[b]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        welch_t = (mean[a] - mean[b]) / np.sqrt(se2_a + se2_b)
+        df = (se2_a + se2_b) ** 2 / (se2_a ** 2 / (n[a] - 1) + se2_b ** 2 / (n[b] - 1))
+        welch_p = 2 * t.sf(np.abs(welch_t), df)
+        cohen = (mean[a] - mean[b]) / np.sqrt((var[a] + var[b]) / 2)
+    use_welch = normal[a] & normal[b]
+
+    statistic = np.where(use_welch, welch_t, np.nan)
+    p_values = np.where(use_welch, welch_p, np.nan)
+    cles = np.full(len(pairs), np.nan)
+    for i in np.flatnonzero(~use_welch):
+        x, y = samples[pairs[i][3]], samples[pairs[i][4]]
+        result = mannwhitneyu(x, y, alternative="two-sided")
+        statistic[i], p_values[i] = result.statistic, result.pvalue
+        cles[i] = result.statistic / (len(x) * len(y))
+    p_values = np.nan_to_num(p_values, nan=1.0)
+    adjusted = adjust_p_values(p_values, correction)
+
+    label = {"version": 1, "mode": 2}
+    table = pd.DataFrame({
+        "benchmark": [pair[0] for pair in pairs],
+        "factor": [pair[1] for pair in pairs],
+        "fixed": [pair[2] for pair in pairs],
+        "a": [pair[3][label[pair[1]]] for pair in pairs],
+        "b": [pair[4][label[pair[1]]] for pair in pairs],
+        "n_a": n[a].astype(int),
+        "n_b": n[b].astype(int),
+        "normal_a": normal[a],
+        "normal_b": normal[b],
+        "test_used": np.where(use_welch, "Welch's t-test", "Mann-Whitney U test"),
+        "statistic": statistic,
+        "p_value": p_values,
+        "p_adjusted": adjusted,
+        "significant": adjusted < alpha,
+        "median_a": median[a],
+        "median_b": median[b],
+        "median_diff": median[b] - median[a],
+        "relative_diff": (median[b] - median[a]) / median[a],
+        "cohen_d": np.where(use_welch, cohen, np.nan),
+        "cles": cles,
+    })
+    if n_resamples:
+        intervals = bootstrap_many([(samples[pair[3]], samples[pair[4]]) for pair in pairs], n_resamples,
+                                   1 - alpha, seed, workers)
+        for name in STATISTICS:
+            table[f"{name}_ci_low"] = [interval[name][0] for interval in intervals]
+            table[f"{name}_ci_high"] = [interval[name][1] for interval in intervals]
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare every version, mode and benchmark pairwise in one pass, with multiple-comparison correction.")
+    parser.add_argument("folders", nargs="*", help="result folders (default: every results/Python* and "
+                                                   "energy_results/python*_runs folder)")
+    parser.add_argument("--by", nargs="+", choices=["version", "mode"], default=["version", "mode"],
+                        help="compare versions within a mode, modes within a version, or both")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--correction", choices=CORRECTIONS, default="holm")
+    parser.add_argument("--keep-outliers", action="store_true")
+    parser.add_argument("--bootstrap", type=int, default=N_RESAMPLES,
+                        help="bootstrap resamples per confidence interval (0 disables the intervals)")
+    parser.add_argument("--workers", type=int, default=1, help="processes for the bootstrap")
+    parser.add_argument("--output", help="write the results table to this CSV file")
+    args = parser.parse_args()
+
+    folders = args.folders or discover_folders()
+    runs = load_all(folders)
+    table = compare_all(group_samples(runs, not args.keep_outliers), args.by, args.alpha, args.correction,
+                        args.bootstrap, args.workers)
+    print(f"{len(runs)} runs, {runs.groupby(['benchmark', 'version', 'mode']).ngroups} groups, "
+          f"{len(table)} comparisons ({args.correction} correction, alpha={args.alpha})")
+    if args.output:
+        table.to_csv(args.output, index=False)
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_rows", None)
+    columns = ["benchmark", "factor", "fixed", "a", "b", "n_a", "n_b", "test_used", "p_value", "p_adjusted",
+               "significant", "median_diff"]
+    columns += ["median_diff_ci_low", "median_diff_ci_high"] if args.bootstrap else []
+    print(table[columns + ["relative_diff"]].to_string(
+        index=False, float_format=lambda value: f"{value:.4g}"))
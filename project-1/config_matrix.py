@@ -0,0 +1,171 @@
+import argparse
+import functools
+import json
+import os
+import shlex
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+# Folder with the sitecustomize.py that applies BENCHMARK_GC inside the benchmarked interpreter
+RUNTIME_HOOKS = PROJECT_ROOT / "configs" / "runtime"
+
+# Separator for combining configurations into one mode, e.g. "optimized+jit"
+COMBINE = "+"
+
+# Runtime configurations a run can be measured under. "env" is added to the
+# benchmark's environment; "interpreter_suffix" selects another build (python3.14t);
+# "requires" lists the interpreter_features() the build must have for the mode to mean anything.
+CONFIGURATIONS = {
+    "normal": {"env": {}},
+    "optimized": {"env": {"PYTHONOPTIMIZE": "2"}},
+    "jit": {"env": {"PYTHON_JIT": "1"}, "requires": ["jit"]},
+    "nojit": {"env": {"PYTHON_JIT": "0"}, "requires": ["jit"]},
+    "freethreaded": {"env": {"PYTHON_GIL": "0"}, "interpreter_suffix": "t", "requires": ["freethreading"]},
+    "gc-disabled": {"env": {"BENCHMARK_GC": "disable"}},
+    "gc-relaxed": {"env": {"BENCHMARK_GC": "100000,50,100"}},
+    "malloc": {"env": {"PYTHONMALLOC": "malloc"}},
+    "pymalloc": {"env": {"PYTHONMALLOC": "pymalloc"}},
+    "mimalloc": {"env": {"PYTHONMALLOC": "mimalloc"}, "requires": ["mimalloc"]},
+}
+
+# Run in the target interpreter: JIT support (sys._jit from 3.14, the _Py_JIT build flag on 3.13)
+# and free-threading (Py_GIL_DISABLED)
+FEATURE_PROBE = """
+import json, sys, sysconfig
+jit = getattr(sys, "_jit", None)
+print(json.dumps({
+    "jit": jit.is_available() if jit is not None else "_Py_JIT" in (sysconfig.get_config_var("PY_CORE_CFLAGS") or ""),
+    "freethreading": bool(sysconfig.get_config_var("Py_GIL_DISABLED")),
+}))
+"""
+
+
+def parse_mode(mode):
+    """Split a mode label into its configurations, e.g. "optimized+jit-blocked" -> ["optimized", "jit"].
+
+    Anything after a "-" that is not itself a configuration (a matrix kernel, Collatz
+    strategy or parallel executor suffix added by experiment.sh) is ignored.
+    """
+    names = []
+    for part in mode.split(COMBINE):
+        while part not in CONFIGURATIONS and "-" in part:
+            part = part.rsplit("-", 1)[0]
+        if part not in CONFIGURATIONS:
+            raise ValueError(f"Unknown configuration '{part}'. Choose from: {', '.join(CONFIGURATIONS)}")
+        names.append(part)
+    return names
+
+
+def mode_env(mode):
+    """Environment variables that a mode adds to the benchmarked process."""
+    env = {}
+    for name in parse_mode(mode):
+        env.update(CONFIGURATIONS[name]["env"])
+    if "BENCHMARK_GC" in env:
+        existing = os.environ.get("PYTHONPATH")
+        env["PYTHONPATH"] = os.pathsep.join([str(RUNTIME_HOOKS)] + ([existing] if existing else []))
+    return env
+
+
+def mode_interpreter(python, mode):
+    """Interpreter to run for a mode, e.g. python3.14 -> python3.14t for free-threaded builds."""
+    suffix = "".join(CONFIGURATIONS[name].get("interpreter_suffix", "") for name in parse_mode(mode))
+    if not suffix:
+        return str(python)
+    path = Path(python)
+    name = path.name
+    if name.lower().endswith(".exe"):
+        name = name[:-len(".exe")] + suffix + name[-len(".exe"):]
+    else:
+        name += suffix
+    return str(path.with_name(name))
+
+
+@functools.lru_cache(maxsize=None)
+def interpreter_features(python):
+    """Build features of an interpreter, probed by running it; None when it cannot be run.
+
+    mimalloc is probed by starting the interpreter with PYTHONMALLOC=mimalloc, which
+    fails on builds without it (before 3.13, or configured --without-mimalloc).
+    """
+    try:
+        probe = subprocess.run([python, "-c", FEATURE_PROBE], capture_output=True, text=True)
+    except OSError:
+        return None
+    if probe.returncode != 0:
+        return None
+    features = json.loads(probe.stdout)
+    mimalloc = subprocess.run([python, "-c", "pass"], env=dict(os.environ, PYTHONMALLOC="mimalloc"),
+                              capture_output=True)
+    features["mimalloc"] = mimalloc.returncode == 0
+    return features
+
+
+def check_mode(python, mode):
+    """Raise ValueError when `python` cannot run `mode`, e.g. jit on 3.11 or freethreaded without a t build."""
+    interpreter = mode_interpreter(python, mode)
+    features = interpreter_features(interpreter)
+    if features is None:
+        raise ValueError(f"Mode '{mode}' needs {interpreter}, which cannot be run")
+    for name in parse_mode(mode):
+        missing = [feature for feature in CONFIGURATIONS[name].get("requires", []) if not features[feature]]
+        if missing:
+            raise ValueError(f"Mode '{mode}' is not supported by {interpreter}: no {', '.join(missing)} support")
+
+
+def mode_command(python, mode):
+    """Command prefix (list) that runs `python` under a mode."""
+    env = mode_env(mode)
+    interpreter = mode_interpreter(python, mode)
+    if not env:
+        return [interpreter]
+    return ["env"] + [f"{key}={value}" for key, value in sorted(env.items())] + [interpreter]
+
+
+def runtime_info():
+    """Runtime settings actually in effect in this interpreter, for run metadata."""
+    import gc
+
+    info = {
+        "version": sys.version,
+        "optimize": sys.flags.optimize,
+        "gc_enabled": gc.isenabled(),
+        "gc_threshold": gc.get_threshold(),
+        "pythonmalloc": os.environ.get("PYTHONMALLOC"),
+        "gil_enabled": sys._is_gil_enabled() if hasattr(sys, "_is_gil_enabled") else True,
+    }
+    jit = getattr(sys, "_jit", None)
+    info["jit_enabled"] = jit.is_enabled() if jit is not None else None
+    return info
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the command that runs an interpreter under a mode.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    command_parser = subparsers.add_parser("command", help="print the command prefix for a mode")
+    command_parser.add_argument("mode", help=f"configuration(s) joined with '{COMBINE}', e.g. optimized{COMBINE}jit")
+    command_parser.add_argument("python")
+    check_parser = subparsers.add_parser("check", help="exit 1 when an interpreter cannot run one of the modes")
+    check_parser.add_argument("python")
+    check_parser.add_argument("modes", nargs="+")
+    subparsers.add_parser("list", help="list the available configurations")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for name, config in CONFIGURATIONS.items():
+            print(f"{name}: {config}")
+    elif args.command == "check":
+        errors = []
+        for mode in args.modes:
+            try:
+                check_mode(args.python, mode)
+            except ValueError as error:
+                errors.append(str(error))
+        for error in errors:
+            print(f"Error: {error}", file=sys.stderr)
+        sys.exit(1 if errors else 0)
+    else:
+        print(" ".join(shlex.quote(part) for part in mode_command(args.python, args.mode)))
@@ -0,0 +1,11 @@
+# Imported automatically at interpreter startup when this folder is on PYTHONPATH
+# (see config_matrix.py). Applies garbage collector settings to the benchmarked process.
+import gc
+import os
+
+_setting = os.environ.get("BENCHMARK_GC", "")
+if _setting == "disable":
+    gc.disable()
+elif _setting:
+    # Comma separated thresholds, e.g. "100000,50,100"
+    gc.set_threshold(*(int(value) for value in _setting.split(",")))
@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+
+# Affinity can only be set on Linux; elsewhere runs are left to the OS scheduler
+AFFINITY_SUPPORTED = hasattr(os, "sched_setaffinity")
+
+# Children are started through taskset so they never run a single instruction elsewhere
+TASKSET = shutil.which("taskset")
+
+# Cores reserved for the orchestrator and the energy meter
+ORCHESTRATOR_CORES = 1
+METER_CORES = 1
+
+CPU_DIR = "/sys/devices/system/cpu"
+
+
+def available_cpus():
+    """Logical CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_cores(cpus=None):
+    """Logical CPUs grouped by physical core (SMT siblings together), so roles never share a core."""
+    cpus = available_cpus() if cpus is None else sorted(cpus)
+    cores, seen = [], set()
+    for cpu in cpus:
+        if cpu in seen:
+            continue
+        siblings = parse_cpu_list(_read(f"{CPU_DIR}/cpu{cpu}/topology/thread_siblings_list") or str(cpu))
+        core = [sibling for sibling in siblings if sibling in cpus] or [cpu]
+        seen.update(core)
+        cores.append(core)
+    return cores
+
+
+def parse_cpu_list(text):
+    """CPUs of a list such as "0-3,8" (the /sys and taskset format)."""
+    cpus = []
+    for part in text.strip().split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            cpus.extend(range(int(first), int(last) + 1))
+        elif part:
+            cpus.append(int(part))
+    return cpus
+
+
+def format_cpu_list(cpus):
+    return ",".join(str(cpu) for cpu in sorted(cpus))
+
+
+def plan_placement(groups=1, cpus=None, orchestrator_cores=ORCHESTRATOR_CORES, meter_cores=METER_CORES):
+    """Disjoint CPU sets for the orchestrator, the meter and `groups` equally sized workload groups.
+
+    Returns None (leave placement to the OS) when affinity is unsupported or there are
+    too few physical cores. Cores that do not divide evenly over the groups stay idle,
+    so every group runs on the same number of cores.
+    """
+    if not AFFINITY_SUPPORTED:
+        print("Warning: CPU affinity is not supported on this platform; processes are not pinned", file=sys.stderr)
+        return None
+    cores = physical_cores(cpus)
+    reserved = orchestrator_cores + meter_cores
+    if len(cores) < reserved + groups:
+        print(f"Warning: {len(cores)} physical core(s) cannot host the orchestrator, the meter and "
+              f"{groups} workload group(s) separately; processes are not pinned", file=sys.stderr)
+        return None
+    per_group = (len(cores) - reserved) // groups
+    workload_cores = cores[reserved:]
+    return {
+        "orchestrator": [cpu for core in cores[:orchestrator_cores] for cpu in core],
+        "meter": [cpu for core in cores[orchestrator_cores:reserved] for cpu in core],
+        "workloads": [[cpu for core in workload_cores[group * per_group:(group + 1) * per_group] for cpu in core]
+                      for group in range(groups)],
+    }
+
+
+def pin(cpus, pid=0):
+    """Restrict a process (default: this one) and the children it starts later to `cpus`."""
+    if cpus and AFFINITY_SUPPORTED:
+        os.sched_setaffinity(pid, cpus)
+
+
+def pinned_command(command, cpus):
+    """`command` started through taskset on `cpus`; unchanged when there is nothing to pin or no taskset."""
+    command = [str(part) for part in command]
+    if not cpus or not AFFINITY_SUPPORTED or TASKSET is None:
+        return command
+    return [TASKSET, "-c", format_cpu_list(cpus)] + command
+
+
+def pin_started(pid, cpus):
+    """Pin a child right after spawning it, where pinned_command could not (no taskset).
+
+    Used instead of a preexec_fn, which is unsafe once the orchestrator runs threads.
+    """
+    if cpus and AFFINITY_SUPPORTED and TASKSET is None:
+        try:
+            os.sched_setaffinity(pid, cpus)
+        except ProcessLookupError:
+            pass  # already exited
+
+
+def _read(path):
+    try:
+        with open(path) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_frequencies(cpus):
+    """Current frequency (MHz) of each CPU, from cpufreq; empty where it is not exposed."""
+    frequencies = {}
+    for cpu in cpus:
+        value = _read(f"{CPU_DIR}/cpu{cpu}/cpufreq/scaling_cur_freq")
+        if value is not None:
+            frequencies[str(cpu)] = int(value) / 1000  # kHz -> MHz
+    return frequencies
+
+
+def placement_record(placement, group=0):
+    """Run metadata: which CPUs each role used and the frequency of the workload CPUs."""
+    if placement is None:
+        return {"pinned": False}
+    workload = placement["workloads"][group]
+    return {
+        "pinned": True,
+        "orchestrator": placement["orchestrator"],
+        "meter": placement["meter"],
+        "workload": workload,
+        "group": group,
+        "groups": len(placement["workloads"]),
+        "frequencies_start": cpu_frequencies(workload),
+    }
+
+
+def record_end(record):
+    """Add the workload CPUs' frequencies at the end of the run to a placement record."""
+    if record.get("pinned"):
+        record["frequencies_end"] = cpu_frequencies(record["workload"])
+    return record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plan and record CPU placement for experiment.sh.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("plan", help="print one CPU list per line: orchestrator, meter, workload "
+                                       "(nothing when pinning is impossible)")
+
+    record_parser = subparsers.add_parser("record", help="write a run's placement file before it starts")
+    record_parser.add_argument("output")
+    record_parser.add_argument("--orchestrator", required=True)
+    record_parser.add_argument("--meter", required=True)
+    record_parser.add_argument("--workload", required=True)
+
+    end_parser = subparsers.add_parser("end", help="add the end-of-run frequencies to a placement file")
+    end_parser.add_argument("output")
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        placement = plan_placement()
+        if placement is None:
+            sys.exit(1)
+        for cpus in [placement["orchestrator"], placement["meter"]] + placement["workloads"]:
+            print(format_cpu_list(cpus))
+    elif args.command == "end":
+        with open(args.output) as file:
+            record = record_end(json.load(file))
+        with open(args.output, "w") as file:
+            json.dump(record, file, indent=2)
+    else:
+        placement = {"orchestrator": parse_cpu_list(args.orchestrator), "meter": parse_cpu_list(args.meter),
+                     "workloads": [parse_cpu_list(args.workload)]}
+        with open(args.output, "w") as file:
+            json.dump(placement_record(placement), file, indent=2)
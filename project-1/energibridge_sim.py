@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# Stand-in for the EnergiBridge binary with the same command line (-o, -i, --summary, command),
+# trace layout and summary line, so ENERGIBRIDGE_PATH (main.py) or ENERGIBRIDGE (experiment.sh)
+# can point here on machines without RAPL access or sudo. Kept free of pandas.
+
+# EnergiBridge samples every 200 ms by default
+INTERVAL_MS = 200
+
+SUMMARY_FORMAT = "Energy consumption in joules: {energy} for {duration:.6f} sec of execution."
+
+# Columns besides the per-core ones: RAPL counters in joules (Linux, Windows) or system power (macOS)
+PLATFORM_COLUMNS = {
+    "linux": ["DRAM_ENERGY (J)", "PACKAGE_ENERGY (J)", "PP0_ENERGY (J)", "PP1_ENERGY (J)"],
+    "macos": ["SYSTEM_POWER (Watts)"],
+}
+CORE_COLUMNS = {"linux": ["FREQUENCY", "USAGE"], "macos": ["FREQUENCY", "TEMP", "USAGE"]}
+MEMORY_COLUMNS = ["TOTAL_MEMORY", "TOTAL_SWAP", "USED_MEMORY", "USED_SWAP"]
+
+# Share of the package energy reported by the DRAM, core (PP0) and graphics (PP1) counters
+SUBZONE_SHARES = {"DRAM_ENERGY (J)": 0.1, "PP0_ENERGY (J)": 0.8, "PP1_ENERGY (J)": 0.0}
+
+# Columns EnergiBridge writes as integers
+INTEGER_PREFIXES = ("Delta", "Time", "CPU_FREQUENCY_", "TOTAL_", "USED_")
+
+
+def default_platform():
+    return "macos" if sys.platform == "darwin" else "linux"
+
+
+def trace_columns(platform="linux", cores=None):
+    """Header of an EnergiBridge trace: Delta, Time, then all other columns sorted by name."""
+    cores = cores or os.cpu_count() or 1
+    per_core = [f"CPU_{kind}_{core}" for kind in CORE_COLUMNS[platform] for core in range(cores)]
+    return ["Delta", "Time"] + sorted(per_core + PLATFORM_COLUMNS[platform] + MEMORY_COLUMNS)
+
+
+def row_formats(columns):
+    return ["%d" if column.startswith(INTEGER_PREFIXES) else "%r" for column in columns]
+
+
+def format_row(formats, values):
+    return ",".join("NaN" if value != value else fmt % (int(value) if fmt == "%d" else float(value))
+                    for fmt, value in zip(formats, values))
+
+
+def write_trace(csv_path, columns, values):
+    """Write a whole trace at once (synthetic campaigns); NaN values are kept as NaN."""
+    formats = row_formats(columns)
+    # One format operation per row; rows with NaN (replayed traces) take the slow path
+    line = ",".join(formats) + "\n"
+    with open(csv_path, "w") as file:
+        file.write(",".join(columns) + "\n")
+        file.writelines(format_row(formats, row) + "\n" if has_nan else line % tuple(row)
+                        for row, has_nan in zip(values.tolist(), np.isnan(values).any(axis=1).tolist()))
+
+
+def write_summary(summary_path, energy, duration):
+    with open(summary_path, "w") as file:
+        file.write(SUMMARY_FORMAT.format(energy=energy, duration=duration) + "\n")
+
+
+class PowerModel:
+    """Package power as idle power plus a dynamic part proportional to CPU utilisation, with noise.
+
+    `scale` multiplies the dynamic part, e.g. to give one interpreter version a
+    different energy profile in a synthetic campaign.
+    """
+
+    def __init__(self, idle_power=5.0, max_power=45.0, noise=0.02, scale=1.0, frequency=3000,
+                 temperature=45.0, memory=16 * 2**30, seed=None):
+        self.idle_power = idle_power
+        self.max_power = max_power
+        self.noise = noise
+        self.scale = scale
+        self.frequency = frequency
+        self.temperature = temperature
+        self.memory = memory
+        self.rng = np.random.default_rng(seed)
+
+    def power(self, busy):
+        """Power (W) for mean CPU utilisations in [0, 1]."""
+        busy = np.asarray(busy, dtype=float)
+        power = self.idle_power + (self.max_power - self.idle_power) * busy * self.scale
+        return np.maximum(power * (1 + self.noise * self.rng.standard_normal(busy.shape)), 0)
+
+    def samples(self, columns, time_ms, usage, energy_start=0.0):
+        """Trace rows (in `columns` order) for sample times (ms) and per-core usage (%, samples x cores).
+
+        Energy counters start at `energy_start` and accumulate power x the time since
+        the previous sample, as RAPL counters do.
+        """
+        time_ms = np.asarray(time_ms, dtype=float)
+        delta = np.diff(time_ms, prepend=time_ms[:1])
+        power = self.power(usage.mean(axis=1) / 100)
+        energy = energy_start + np.cumsum(power * delta / 1000)
+        index = {column: i for i, column in enumerate(columns)}
+        values = np.zeros((len(time_ms), len(columns)))
+        values[:, index["Delta"]] = delta
+        values[:, index["Time"]] = time_ms
+        for core in range(usage.shape[1]):
+            values[:, index[f"CPU_USAGE_{core}"]] = usage[:, core]
+            values[:, index[f"CPU_FREQUENCY_{core}"]] = self.frequency
+            if f"CPU_TEMP_{core}" in index:
+                values[:, index[f"CPU_TEMP_{core}"]] = self.temperature + usage[:, core] / 10
+        if "PACKAGE_ENERGY (J)" in index:
+            values[:, index["PACKAGE_ENERGY (J)"]] = energy
+            for column, share in SUBZONE_SHARES.items():
+                values[:, index[column]] = energy * share
+        if "SYSTEM_POWER (Watts)" in index:
+            values[:, index["SYSTEM_POWER (Watts)"]] = power
+        values[:, index["TOTAL_MEMORY"]] = self.memory
+        values[:, index["TOTAL_SWAP"]] = 2**31
+        values[:, index["USED_MEMORY"]] = self.memory * (0.4 + usage.mean(axis=1) / 1000)
+        return values
+
+
+class TraceReplay:
+    """Rows of a recorded trace, played back in a loop with fresh timestamps.
+
+    Cumulative energy counters continue across repetitions, so replaying for
+    longer than the trace was recorded still yields monotonic counters.
+    """
+
+    def __init__(self, csv_path):
+        with open(csv_path, newline="") as file:
+            reader = csv.reader(file)
+            self.columns = next(reader)
+            self.rows = np.array([[float(value) for value in row] for row in reader if row])
+        if len(self.rows) == 0:
+            raise ValueError(f"{csv_path} has no samples to replay")
+        self.counters = [i for i, column in enumerate(self.columns) if column.endswith("(J)")]
+        # Energy gained per pass; the step between the last and first row is taken as one average sample
+        gained = self.rows[-1, self.counters] - self.rows[0, self.counters]
+        self.loop_energy = np.nan_to_num(gained * len(self.rows) / max(len(self.rows) - 1, 1))
+
+    def samples(self, time_ms, first_sample=0):
+        """Rows for samples first_sample, first_sample + 1, ... taken at `time_ms`."""
+        time_ms = np.asarray(time_ms, dtype=float)
+        loops, rows = np.divmod(first_sample + np.arange(len(time_ms)), len(self.rows))
+        values = self.rows[rows].copy()
+        values[:, self.columns.index("Delta")] = np.diff(time_ms, prepend=time_ms[:1])
+        values[:, self.columns.index("Time")] = time_ms
+        values[:, self.counters] += loops[:, None] * self.loop_energy
+        return values
+
+
+def read_cpu_times():
+    """Busy and total jiffies per core from /proc/stat (Linux), or None."""
+    try:
+        with open("/proc/stat") as file:
+            lines = [line.split() for line in file if line.startswith("cpu") and line[3].isdigit()]
+    except OSError:
+        return None
+    times = np.array([[int(value) for value in line[1:9]] for line in lines])
+    return times.sum(axis=1) - times[:, 3] - times[:, 4], times.sum(axis=1)
+
+
+def cpu_usage(previous, current, cores):
+    """Per-core usage (%) between two read_cpu_times() readings; fully busy where unknown."""
+    usage = np.full(cores, 100.0)
+    if previous is not None and current is not None:
+        measured = 100.0 * (current[0] - previous[0]) / np.maximum(current[1] - previous[1], 1)
+        usage[:min(cores, len(measured))] = measured[:cores]
+    return usage
+
+
+def summary_energy(columns, first, last, duration):
+    """Energy (J) as EnergiBridge's summary reports it: the package counter, or power x duration."""
+    if "PACKAGE_ENERGY (J)" in columns:
+        index = columns.index("PACKAGE_ENERGY (J)")
+        return float(last[index] - first[index])
+    return float(last[columns.index("SYSTEM_POWER (Watts)")] * duration)
+
+
+def measure(command, output, interval_ms=INTERVAL_MS, source=None, columns=None):
+    """Run `command` while writing one trace row per interval to `output`.
+
+    `source` is a PowerModel (CPU usage read from /proc/stat) or a TraceReplay.
+    Sampling stops when the command exits or on SIGTERM. Returns the command's
+    exit code, the energy and the duration in seconds.
+    """
+    source = source or PowerModel()
+    columns = source.columns if isinstance(source, TraceReplay) else columns or trace_columns()
+    cores = sum(column.startswith("CPU_USAGE_") for column in columns)
+    formats = row_formats(columns)
+    package = columns.index("PACKAGE_ENERGY (J)") if "PACKAGE_ENERGY (J)" in columns else None
+    stopped = []
+    signal.signal(signal.SIGTERM, lambda *_: stopped.append(True))
+
+    start = time.time()
+    process = subprocess.Popen(command) if command else None
+    first = last = None
+    cpu_times, sample = read_cpu_times(), 0
+    with open(output, "w") as file:
+        file.write(",".join(columns) + "\n")
+        while not stopped and (process is None or process.poll() is None):
+            now = [time.time() * 1000] if last is None else [last[1], time.time() * 1000]
+            if isinstance(source, TraceReplay):
+                values = source.samples(now, sample + 1 - len(now))[-1]
+            else:
+                previous, cpu_times = cpu_times, read_cpu_times()
+                usage = np.tile(cpu_usage(previous, cpu_times, cores), (len(now), 1))
+                energy = last[package] if last is not None and package is not None else 0.0
+                values = source.samples(columns, now, usage, energy)[-1]
+            file.write(format_row(formats, values) + "\n")
+            file.flush()
+            first = values if first is None else first
+            last, sample = values, sample + 1
+            time.sleep(interval_ms / 1000)
+    if process is not None and process.poll() is None:
+        process.terminate()
+        process.wait()
+    duration = time.time() - start
+    energy = summary_energy(columns, first, last, duration) if first is not None else 0.0
+    return (process.returncode if process is not None else 0), energy, duration
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EnergiBridge stand-in: writes a trace from a power model "
+                                                 "or a recorded trace while a command runs.")
+    parser.add_argument("-o", "--output", default="results.csv")
+    parser.add_argument("-i", "--interval", type=float, default=INTERVAL_MS, help="sampling interval in ms")
+    parser.add_argument("--summary", action="store_true", help="print the energy consumption at the end")
+    parser.add_argument("--platform", choices=sorted(PLATFORM_COLUMNS), default=default_platform(),
+                        help="trace layout: RAPL counters (linux) or system power (macos)")
+    parser.add_argument("--cores", type=int, help="cores in the trace (default: this machine's)")
+    parser.add_argument("--idle-power", type=float, default=5.0, help="power (W) of an idle package")
+    parser.add_argument("--max-power", type=float, default=45.0, help="power (W) with all cores busy")
+    parser.add_argument("--noise", type=float, default=0.02, help="relative standard deviation of the power")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--replay", help="play back this recorded trace instead of the power model")
+    parser.add_argument("command", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    if args.replay:
+        source, columns = TraceReplay(args.replay), None
+    else:
+        source = PowerModel(args.idle_power, args.max_power, args.noise, seed=args.seed)
+        columns = trace_columns(args.platform, args.cores)
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    returncode, energy, duration = measure(command, args.output, args.interval, source, columns)
+    if args.summary:
+        print(SUMMARY_FORMAT.format(energy=energy, duration=duration), flush=True)
+    sys.exit(returncode)
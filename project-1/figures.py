@@ -0,0 +1,221 @@
+import argparse
+import contextlib
+import functools
+import hashlib
+import importlib.metadata
+import inspect
+import io
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+# Report versions are written to FIGURES_DIR/<version>; "latest" points to the newest one
+FIGURES_DIR = PROJECT_ROOT / "figures"
+MANIFEST_NAME = "figures.json"
+LATEST_NAME = "latest"
+
+# Library versions that are part of every figure hash: an upgrade can change how figures look
+PLOTTING_PACKAGES = ["matplotlib", "seaborn"]
+
+
+def _hash_value(digest, value):
+    if isinstance(value, np.ndarray):
+        value = np.ascontiguousarray(value)
+        digest.update(f"ndarray{value.dtype}{value.shape}".encode())
+        digest.update(value.tobytes())
+    elif hasattr(value, "to_numpy") and hasattr(value, "columns"):
+        # DataFrames (size sweeps): column names and values
+        digest.update(repr(list(value.columns)).encode())
+        for column in value.columns:
+            _hash_value(digest, value[column].to_numpy())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _hash_value(digest, item)
+    else:
+        digest.update(repr(value).encode())
+
+
+@functools.lru_cache(maxsize=None)
+def _code_fingerprint(module_name):
+    """Source of a plot function's module and the plotting library versions.
+
+    The whole module is hashed because plot functions call helpers defined next to
+    them; code in other project modules is not covered (use `force` after changing it).
+    """
+    versions = []
+    for package in PLOTTING_PACKAGES:
+        try:
+            versions.append(f"{package}=={importlib.metadata.version(package)}")
+        except importlib.metadata.PackageNotFoundError:
+            versions.append(f"{package} missing")
+    return inspect.getsource(sys.modules[module_name]) + "\n".join(versions)
+
+
+def figure_hash(function, args):
+    """Hash of a figure's input data and of the code that draws it; equal hashes render equal files."""
+    digest = hashlib.sha256()
+    digest.update(f"{function.__module__}.{function.__qualname__}".encode())
+    digest.update(inspect.getsource(function).encode())
+    digest.update(_code_fingerprint(function.__module__).encode())
+    _hash_value(digest, list(args))
+    return digest.hexdigest()
+
+
+class Figures:
+    """Figures of an analysis, drawn interactively or rendered as a report.
+
+    Without `report_dir`, add() draws and shows a figure immediately, in the
+    working directory, as the analysis scripts always did. With `report_dir`,
+    figures are queued and render() draws them headless in a process pool into a
+    new version directory under `report_dir`. Figures whose data and plotting
+    code are unchanged since the previous version are linked instead of
+    re-rendered. Plot functions take the output filename as their last argument
+    and a `show` keyword.
+    """
+
+    def __init__(self, report_dir=None, workers=None, force=False, version=None):
+        self.report_dir = report_dir
+        self.workers = workers
+        self.force = force
+        self.version = version
+        self.jobs = []
+
+    def add(self, function, *args, filename):
+        if self.report_dir is None:
+            function(*args, filename)
+        else:
+            self.jobs.append((filename, function, args))
+
+    def render(self):
+        """Render the queued figures; returns the version directory (None when drawn interactively)."""
+        if self.report_dir is None:
+            return None
+        return render_report(self.jobs, self.report_dir, self.workers, self.force, self.version)
+
+
+def _created(path):
+    """Sort key of a version directory: its manifest's creation time, so custom version names sort correctly."""
+    manifest = path / MANIFEST_NAME
+    try:
+        with open(manifest) as file:
+            created = json.load(file).get("created", "")
+    except (OSError, ValueError):
+        created = ""
+    return created, manifest.stat().st_mtime_ns, path.name
+
+
+def version_dirs(report_dir):
+    """Version directories of a report directory with a manifest, oldest first."""
+    if not os.path.isdir(report_dir):
+        return []
+    return sorted((path for path in Path(report_dir).iterdir()
+                   if path.is_dir() and not path.is_symlink() and (path / MANIFEST_NAME).exists()), key=_created)
+
+
+def new_version_dir(report_dir, version=None):
+    version = version or time.strftime("%Y%m%d-%H%M%S")
+    path, suffix = Path(report_dir) / version, 1
+    while path.exists():
+        suffix += 1
+        path = Path(report_dir) / f"{version}-{suffix}"
+    path.mkdir(parents=True)
+    return path
+
+
+def _render(job):
+    """Draw one figure headless (in a worker process); returns what the plot function printed."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    path, function, args = job
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        function(*args, path, show=False)
+    plt.close("all")
+    return output.getvalue()
+
+
+def _link(source, target):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def render_report(jobs, report_dir=FIGURES_DIR, workers=None, force=False, version=None):
+    """Render (filename, function, args) jobs into a new version directory of `report_dir`.
+
+    A figure is re-rendered only when its hash (figure_hash) differs from the
+    previous version's or `force` is set; otherwise the previous file is
+    hard-linked (copied where links are unsupported). Console output of the plot
+    functions is printed in job order, for cached figures as well.
+    """
+    previous_dir = (version_dirs(report_dir) or [None])[-1]
+    previous = {}
+    if previous_dir is not None:
+        with open(previous_dir / MANIFEST_NAME) as file:
+            previous = json.load(file)["figures"]
+    output_dir = new_version_dir(report_dir, version)
+
+    entries, pending = {}, []
+    for filename, function, args in jobs:
+        digest = figure_hash(function, args)
+        cached = previous.get(filename)
+        if (not force and cached is not None and cached["hash"] == digest
+                and (previous_dir / filename).exists()):
+            _link(previous_dir / filename, output_dir / filename)
+            entries[filename] = dict(cached, cached=True)
+        else:
+            entries[filename] = {"hash": digest, "function": f"{function.__module__}.{function.__qualname__}",
+                                 "cached": False}
+            pending.append((str(output_dir / filename), function, args))
+
+    start = time.perf_counter()
+    if len(pending) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outputs = list(executor.map(_render, pending))
+    else:
+        outputs = [_render(job) for job in pending]
+    for (path, _, _), output in zip(pending, outputs):
+        entries[os.path.basename(path)]["output"] = output
+
+    with open(output_dir / MANIFEST_NAME, "w") as file:
+        json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"), "previous": previous_dir and previous_dir.name,
+                   "figures": entries}, file, indent=2)
+    latest = Path(report_dir) / LATEST_NAME
+    try:
+        if latest.is_symlink():
+            latest.unlink()
+        if not latest.exists():
+            latest.symlink_to(output_dir.name, target_is_directory=True)
+    except OSError:
+        pass  # symlinks need extra privileges on Windows; the newest version is the last one created
+
+    for filename, _, _ in jobs:
+        print(entries[filename].get("output", ""), end="")
+    print(f"\nRendered {len(pending)} figure(s) in {time.perf_counter() - start:.1f} s, "
+          f"reused {len(jobs) - len(pending)} unchanged, in {output_dir}")
+    return output_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the versions of a figure report.")
+    parser.add_argument("report_dir", nargs="?", default=str(FIGURES_DIR))
+    args = parser.parse_args()
+
+    for path in version_dirs(args.report_dir):
+        with open(path / MANIFEST_NAME) as file:
+            figures = json.load(file)["figures"]
+        rendered = sum(not entry["cached"] for entry in figures.values())
+        print(f"{path.name}: {len(figures)} figures, {rendered} rendered, {len(figures) - rendered} unchanged")
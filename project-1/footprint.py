@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+import time
+
+
+def process_age():
+    """Seconds since this process started, or None when the platform does not expose it."""
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/stat") as file:
+                # The command name may contain spaces; fields after it are space separated
+                start_ticks = int(file.read().rsplit(")", 1)[1].split()[19])
+            with open("/proc/uptime") as file:
+                uptime = float(file.read().split()[0])
+            return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+        except (OSError, ValueError, IndexError):
+            return None
+    if os.name == "nt":
+        import ctypes
+        from ctypes import wintypes
+
+        creation, exit_time, kernel, user = (wintypes.FILETIME() for _ in range(4))
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.kernel32.GetProcessTimes(handle, ctypes.byref(creation), ctypes.byref(exit_time),
+                                                      ctypes.byref(kernel), ctypes.byref(user)):
+            return None
+        # FILETIME counts 100 ns intervals since 1601-01-01
+        created = ((creation.dwHighDateTime << 32) + creation.dwLowDateTime) / 1e7 - 11644473600
+        return time.time() - created
+    return None
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes, or None where unavailable."""
+    if os.name == "nt":
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def snapshot():
+    """Startup time, CPU time, peak RSS and number of loaded modules of this process."""
+    return {
+        "age": process_age(),
+        "cpu_time": time.process_time(),
+        "peak_rss": peak_rss(),
+        "modules": len(sys.modules),
+    }
+
+
+def report(label):
+    """Print how long this process has been alive and how much memory it holds."""
+    info = snapshot()
+    age = f"{info['age']:.2f} s" if info["age"] is not None else "n/a"
+    rss = f"{info['peak_rss'] / 2**20:.1f} MiB" if info["peak_rss"] is not None else "n/a"
+    print(f"[{label}] started {age} ago, CPU time {info['cpu_time']:.2f} s, peak RSS {rss}, "
+          f"{info['modules']} modules loaded")
+    return info
+
+
+def measure_import(module, python=sys.executable):
+    """Import a module in a fresh interpreter and return its footprint snapshot."""
+    code = f"import footprint, {module}, json; print(json.dumps(footprint.snapshot()))"
+    output = subprocess.run([python, "-c", code], check=True, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    import json
+
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    # Startup cost of the orchestrator and analysis entry points, each in a fresh interpreter
+    for module in sys.argv[1:] or ["main", "analyse", "analyze_graphs", "live_stats", "adaptive_stopping"]:
+        info = measure_import(module)
+        age = f"{info['age']:.2f} s" if info["age"] is not None else "n/a"
+        rss = f"{info['peak_rss'] / 2**20:.1f} MiB" if info["peak_rss"] is not None else "n/a"
+        print(f"{module}: startup {age}, peak RSS {rss}, {info['modules']} modules")
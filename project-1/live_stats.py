@@ -0,0 +1,174 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+# Default location of the continuously refreshed summary
+SUMMARY_PATH = PROJECT_ROOT / "live_summary.json"
+
+# Samples needed before a group is used in a comparison (Shapiro-Wilk needs at least 3)
+MIN_SAMPLES = 3
+
+# Runs further than this many standard deviations from their group mean are flagged
+SUSPECT_Z = 3
+
+
+class GroupStats:
+    """Energy values of one group; mean, spread and median are computed from all of them."""
+
+    def __init__(self):
+        self.values = []
+
+    def push(self, value):
+        self.values.append(value)
+
+    @property
+    def count(self):
+        return len(self.values)
+
+    @property
+    def mean(self):
+        return float(np.mean(self.values)) if self.values else float("nan")
+
+    @property
+    def std(self):
+        return float(np.std(self.values, ddof=1)) if self.count > 1 else float("nan")
+
+    @property
+    def sem(self):
+        return self.std / math.sqrt(self.count) if self.count > 1 else float("nan")
+
+    def summary(self):
+        return {
+            "n": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "sem": self.sem,
+            "median": float(np.median(self.values)) if self.values else float("nan"),
+        }
+
+
+class LiveSummary:
+    """Statistics per (benchmark, version, mode), rebuilt from the run catalog after every run.
+
+    Runs are added in the order they were measured, so a run is flagged as suspect
+    against the runs before it, as it would have been when it finished.
+    """
+
+    def __init__(self, summary_path=SUMMARY_PATH, alpha=0.05):
+        self.summary_path = Path(summary_path)
+        self.alpha = alpha
+        self.groups = {}
+        self.suspect_runs = []
+
+    def add(self, benchmark, version, mode, run, energy):
+        """Add one completed run; runs without energy or far from the group mean are flagged."""
+        key = (benchmark, version, mode)
+        stats = self.groups.setdefault(key, GroupStats())
+        label = {"benchmark": benchmark, "version": version, "mode": mode, "run": run, "energy": energy}
+        if energy is None or not math.isfinite(energy):
+            self.suspect_runs.append(dict(label, reason="no energy value"))
+            return
+        if stats.count >= 5 and stats.std > 0 and abs(energy - stats.mean) / stats.std > SUSPECT_Z:
+            self.suspect_runs.append(dict(label, reason=f"more than {SUSPECT_Z} std from group mean"))
+        stats.push(float(energy))
+
+    def values(self, benchmark, version, mode):
+        """Energy values recorded so far for one configuration."""
+        stats = self.groups.get((benchmark, version, mode))
+        return list(stats.values) if stats else []
+
+    def comparisons(self):
+        """Compare every pair of versions per benchmark and mode with the analysis' test selection."""
+        from analyze_graphs import compare_samples
+
+        results = []
+        by_config = {}
+        for (benchmark, version, mode), stats in self.groups.items():
+            by_config.setdefault((benchmark, mode), []).append((version, stats))
+        for (benchmark, mode), versions in sorted(by_config.items()):
+            for (version_a, a), (version_b, b) in itertools.combinations(sorted(versions, key=lambda v: v[0]), 2):
+                if a.count < MIN_SAMPLES or b.count < MIN_SAMPLES:
+                    continue
+                # median_a / median_b (and shapiro_a / shapiro_b) belong to version_a / version_b
+                result = compare_samples(np.array(a.values), np.array(b.values), self.alpha)
+                result.update({"benchmark": benchmark, "mode": mode,
+                               "version_a": version_a, "version_b": version_b,
+                               "mean_diff": b.mean - a.mean})
+                results.append(result)
+        return results
+
+    def snapshot(self):
+        return {
+            "updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "groups": [
+                dict({"benchmark": benchmark, "version": version, "mode": mode}, **stats.summary())
+                for (benchmark, version, mode), stats in sorted(self.groups.items())
+            ],
+            "comparisons": self.comparisons(),
+            "suspect_runs": list(self.suspect_runs),
+        }
+
+    def write(self):
+        """Atomically replace the summary file so readers never see a partial write."""
+        # Per-process temporary file, so two refreshes never write the same file
+        tmp_path = self.summary_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(self.snapshot(), file, indent=2, default=float)
+        os.replace(tmp_path, self.summary_path)
+
+
+def summarize_folders(folders, summary_path=SUMMARY_PATH):
+    """Build the live summary from everything the run catalog knows about the given folders."""
+    from run_catalog import load_runs, run_energy
+
+    summary = LiveSummary(summary_path)
+    for folder in folders:
+        if not os.path.isdir(folder):
+            print(f"Warning: Directory {folder} does not exist")
+            continue
+        runs = load_runs(folder)
+        runs["energy"] = run_energy(runs)
+        # Replay the runs in the order they were measured
+        runs = runs.sort_values("start_time", kind="stable")
+        for run in runs.itertuples():
+            energy = None if np.isnan(run.energy) else run.energy
+            summary.add(run.benchmark, run.version, run.mode, run.run, energy)
+    summary.write()
+    return summary
+
+
+def print_summary(summary):
+    for group in summary.snapshot()["groups"]:
+        print(f"{group['benchmark']} Python {group['version']} ({group['mode']}): n={group['n']}, "
+              f"mean={group['mean']:.2f} J, median={group['median']:.2f} J, SEM={group['sem']:.2f}")
+    for comparison in summary.comparisons():
+        print(f"{comparison['benchmark']} ({comparison['mode']}) {comparison['version_a']} vs "
+              f"{comparison['version_b']}: {comparison['test_used']} p={comparison['p_value']:.4f}")
+    for run in summary.suspect_runs:
+        print(f"Warning: suspect run {run['benchmark']} Python {run['version']} ({run['mode']}) "
+              f"run {run['run']}: {run['reason']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh running statistics while an experiment is in progress.")
+    parser.add_argument("folders", nargs="*", help="result folders (default: results/Python3.*)")
+    parser.add_argument("--output", default=SUMMARY_PATH, help="summary JSON file")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="keep refreshing the summary every SECONDS instead of once")
+    args = parser.parse_args()
+
+    folders = args.folders or sorted(str(path) for path in (PROJECT_ROOT / "results").glob("Python3.*"))
+    while True:
+        summary = summarize_folders(folders, args.output)
+        print_summary(summary)
+        if not args.watch:
+            break
+        time.sleep(args.watch)
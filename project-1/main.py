@@ -1,10 +1,21 @@
+import argparse
+import asyncio
 import time
 import random
-import subprocess
 import os
+import subprocess
+import sys
 from dotenv import load_dotenv
 from pathlib import Path
-from analyse import process_results
+# Only lightweight modules are imported here: the orchestrator stays resident during every
+# measurement window, so analysis (pandas, scipy, matplotlib) is imported after the campaign
+# or runs in short-lived subprocesses during the cooldowns.
+import footprint
+from async_runner import BackgroundWriter, run_measured, write_run_outputs
+from calibration import calibrate, lookup_size, save_calibration
+from campaign_manifest import CampaignManifest, archive_campaign, is_unfinished, run_id
+from cpu_affinity import pin, plan_placement, placement_record, record_end
+from steady_state import cool_down, make_sampler, warm_up
 
 # Load .env file
 load_dotenv()
@@ -14,6 +25,22 @@ PROJECT_ROOT = Path(__file__).resolve().parent
 # Path to benchmark script.
 benchmark_script = PROJECT_ROOT / "benchmark.py"
 
+# Runs the benchmark workload repeatedly in one interpreter (--worker-duration)
+worker_script = PROJECT_ROOT / "benchmark_worker.py"
+
+# Runs the benchmark script otherwise, logging its peak RSS and allocator/GC counters
+memory_probe_script = PROJECT_ROOT / "memory_probe.py"
+
+# Analysis helpers run as subprocesses between runs
+live_stats_script = PROJECT_ROOT / "live_stats.py"
+adaptive_stopping_script = PROJECT_ROOT / "adaptive_stopping.py"
+
+# adaptive_stopping.py exit codes (STOP_EXIT_CODE, CONTINUE_EXIT_CODE) and default run budget
+# per version (MAX_RUNS); the module itself imports SciPy, so it is not imported here
+ADAPTIVE_STOP = 0
+ADAPTIVE_CONTINUE = 3
+ADAPTIVE_MAX_RUNS = 30
+
 # Path to output directory. Create if it doesn't exist.
 output_dir = PROJECT_ROOT / "energy_results"
 os.makedirs(output_dir, exist_ok=True)
@@ -33,20 +60,96 @@ python_314 = os.getenv("PYTHON_3_14_PATH")
 # Path to EnergyBridge
 energybridge_exe = os.getenv("ENERGIBRIDGE_PATH")
 
-def warm_up_cpu(duration=300):
-    print("Warming up CPU for 5 minutes...")
-    start_time = time.time()
-    while time.time() - start_time < duration:
-        [x**2 for x in range(10**6)]  # Generate CPU load
+def warm_up_cpu(duration=300, workers=1, fixed=False, cpus=None):
+    if fixed:
+        print("Warming up CPU for 5 minutes...")
+        if cpus:
+            # This process is pinned to the orchestrator core; load a benchmark core instead
+            warm_up(None, 1, duration, duration, cpus=cpus)
+            return
+        start_time = time.time()
+        while time.time() - start_time < duration:
+            [x**2 for x in range(10**6)]  # Generate CPU load
+        return
 
-# Function to run EnergyBridge for measuring energy
-def start_energybridge(output_file):
-    print("Starting energy measurement...")
-    return subprocess.Popen([energybridge_exe, "-o", output_file, "--summary", "timeout", "20"],
-                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    print(f"Warming up CPU on {workers} core(s) until power and temperature are stable (at most 5 minutes)...")
+    sampler = make_sampler([energybridge_exe] if energybridge_exe else None, duration)
+    try:
+        elapsed, steady = warm_up(sampler, workers, max_duration=duration, cpus=cpus)
+    finally:
+        if sampler is not None:
+            sampler.close()
+    print(f"Warm-up finished after {elapsed:.0f} seconds ({'steady state' if steady else 'time limit'})")
+
+
+def rest(duration, fixed=False):
+    """Cooldown between runs; ends early once idle readings are stable unless fixed is set."""
+    if fixed:
+        time.sleep(duration)
+        return
+    sampler = make_sampler([energybridge_exe] if energybridge_exe else None, duration)
+    try:
+        cool_down(sampler, max_duration=duration)
+    finally:
+        if sampler is not None:
+            sampler.close()
+
+# Seconds a single benchmark run may take before it is killed
+RUN_DEADLINE = 120
+
+# Running statistics, refreshed after every run
+live_summary_file = output_dir / "live_summary.json"
+
+# Disjoint CPU sets for the orchestrator, EnergiBridge and the benchmark (--pin); None leaves
+# placement to the OS
+cpu_placement = None
+
+# Start relaunched benchmarks through memory_probe.py (--memory-probe); off by default because
+# the probe's imports and log write fall inside the measured window
+probe_memory = False
+
+# Command to run EnergyBridge for measuring energy
+def energybridge_command(output_file):
+    return [energybridge_exe, "-o", output_file, "--summary", "timeout", "20"]
+
+
+def store_run(record, summary_file, metadata_file, manifest=None, key=None, files=None, problem=None):
+    write_run_outputs(record, summary_file, metadata_file)
+
+    # Only a run with valid output files counts as done; others are re-queued on resume
+    if manifest is not None:
+        problem = manifest.finish(key, files, problem, benchmark_returncode=record["benchmark_returncode"],
+                                  benchmark_duration=record["benchmark_duration"])
+        if problem:
+            print(f"Warning: run {key} is not valid ({problem}); it will be re-queued on resume")
+
+
+def refresh_live_stats():
+    """Update the live statistics with the finished runs (pandas and scipy, in their own interpreter)."""
+    subprocess.run([sys.executable, live_stats_script, python311_dir, python314_dir, "--output", live_summary_file],
+                   stdout=subprocess.DEVNULL)
+
+
+async def settle(writer, cooldown, fixed_rest, check=None):
+    """Store the finished run, refresh the live statistics and run `check` (if given), then rest.
 
+    The statistics and the stopping check load the CPU, so they run before the cooldown,
+    which waits until the machine is idle again, and never inside its steady-state
+    detection. Returns the result of `check`.
+    """
+    await writer.flush()
+    await asyncio.to_thread(refresh_live_stats)
+    result = await asyncio.to_thread(check) if check is not None else None
+    await asyncio.to_thread(rest, cooldown, fixed_rest)
+    return result
 
-def run_test(python_path, version_label, run_number):
+
+def campaign_run_id(version, run_number):
+    return run_id(f"Python{version}", "normal", benchmark_script, run_number)
+
+
+async def run_test(python_path, version_label, run_number, writer, worker_duration=None, size=None,
+                   manifest=None, key=None):
     print(f"Running {version_label}, Run {run_number}...")
 
     # Determine the correct output directory
@@ -54,34 +157,224 @@ def run_test(python_path, version_label, run_number):
 
     # Generate unique CSV filename for this run
     energy_csv = output_subdir / f"energy_{version_label}_run{run_number}.csv"
+    summary_file = output_subdir / f"energybridge_output_{version_label}_run{run_number}.txt"
+    metadata_file = output_subdir / f"run_{version_label}_run{run_number}.json"
+
+    # Phase markers written by the benchmark (benchmarks/workloads/phases.py), see phase_energy.py
+    phase_file = output_subdir / f"phases_{version_label}_run{run_number}.jsonl"
+    if phase_file.exists():
+        phase_file.unlink()
+
+    benchmark_cmd = [python_path, benchmark_script] + ([str(size)] if size else [])
+    if probe_memory:
+        memory_file = output_subdir / f"memory_{version_label}_run{run_number}.jsonl"
+        if memory_file.exists():
+            memory_file.unlink()
+        benchmark_cmd = [python_path, memory_probe_script, memory_file] + benchmark_cmd[1:]
+    env = dict(os.environ, BENCHMARK_PHASE_FILE=str(phase_file))
+    # The summary is not required: EnergiBridge may not print it when the meter is stopped early
+    files = {"csv": energy_csv, "metadata": metadata_file}
+    if worker_duration is not None:
+        # Load the benchmark once and repeat its workload for the whole window
+        worker_file = output_subdir / f"worker_{version_label}_run{run_number}.json"
+        files["worker"] = worker_file
+        benchmark_cmd = [python_path, worker_script, benchmark_script,
+                         "--duration", str(worker_duration), "--report", worker_file]
+        if size:
+            benchmark_cmd += ["--size", str(size)]
+        env["BENCHMARK_LAUNCH_TIME"] = str(time.time())
 
-    # Start EnergyBridge measurement
-    energy_process = start_energybridge(energy_csv)
+    # Run the Python script while EnergyBridge measures; both outputs are drained concurrently
+    print("Starting energy measurement...")
+    placement = placement_record(cpu_placement)
+    record = await run_measured(energybridge_command(energy_csv), benchmark_cmd, deadline=RUN_DEADLINE, env=env,
+                                meter_cpus=cpu_placement and cpu_placement["meter"],
+                                benchmark_cpus=cpu_placement and cpu_placement["workloads"][0])
+    record["placement"] = record_end(placement)
+    problem = None
+    if record["timed_out"]:
+        print(f"Warning: {version_label}, Run {run_number} exceeded {RUN_DEADLINE} seconds and was killed")
+        problem = "timed out"
+    elif record["benchmark_returncode"] != 0:
+        problem = f"benchmark exited with code {record['benchmark_returncode']}"
 
-    # Run Python script
-    subprocess.run([python_path, benchmark_script], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    
-    # Wait for EnergyBridge to finish
-    energy_process.terminate()
-    energy_process.wait()
+    # Written in a worker thread; settle() waits for it before the live statistics and the cooldown
+    writer.submit(store_run, record, summary_file, metadata_file, manifest, key, files, problem)
 
     print(f"Finished {version_label}, Run {run_number}. Energy data saved to {energy_csv}")
 
-# Prepare randomized test order
-test_order = [(version, idx + 1) for idx, version in enumerate(["3.11"] * 30 + ["3.14"] * 30)]
-# Set seed for reproducibility
-random.seed(42)
-random.shuffle(test_order)
 
-warm_up_cpu()
+async def run_campaign(manifest, cooldown=60, fixed_rest=False, worker_duration=None, size=None):
+    writer = BackgroundWriter()
+    # Run the remaining tests in the randomized order stored in the manifest
+    for run in manifest.pending():
+        version, run_number = run["version"], run["run"]
+        python_exe = python_311 if version  == "3.11" else python_314
+        manifest.start(run["id"])
+        await run_test(python_exe, f"Python{version}", run_number, writer, worker_duration, size,
+                       manifest, run["id"])
+        await settle(writer, cooldown, fixed_rest)
+    await writer.flush()
+
+
+async def run_adaptive_campaign(manifest, target_width, min_runs, max_runs, cooldown=60, fixed_rest=False,
+                                worker_duration=None, size=None):
+    """Keep running randomized rounds of both versions until the energy difference is known precisely enough.
+
+    The rounds are seeded, so a resumed campaign replays the same schedule and
+    skips the runs the manifest already records as done.
+    """
+    writer = BackgroundWriter()
+    run_number = 0
+    # The budget is enforced here as well, so a failing check can never keep the campaign running
+    max_runs = max_runs or ADAPTIVE_MAX_RUNS
+
+    def stopping_check():
+        # Runs in its own interpreter (pandas, scipy) on the results the background writer stored
+        check_cmd = [sys.executable, adaptive_stopping_script, python311_dir, python314_dir,
+                     "--benchmark", "benchmark.py", "--target-width", str(target_width), "--max-runs", str(max_runs)]
+        if min_runs is not None:
+            check_cmd += ["--min-runs", str(min_runs)]
+        print(f"Adaptive stopping check after {run_number} runs:")
+        return subprocess.run(list(map(str, check_cmd))).returncode
+
+    while run_number < 2 * max_runs:
+        # Every round runs each version once, in random order; runs a resumed campaign already did are skipped
+        round_versions = ["3.11", "3.14"]
+        random.shuffle(round_versions)
+        round_runs = []
+        for version in round_versions:
+            run_number += 1
+            key = campaign_run_id(version, run_number)
+            if not manifest.is_done(key):
+                round_runs.append((version, run_number, key))
+
+        returncode = None
+        for index, (version, number, key) in enumerate(round_runs):
+            manifest.add({"id": key, "version": version, "run": number})
+            manifest.start(key)
+            python_exe = python_311 if version == "3.11" else python_314
+            await run_test(python_exe, f"Python{version}", number, writer, worker_duration, size, manifest, key)
+            # The check after the round's last run happens before its cooldown, not before the next run
+            last = index == len(round_runs) - 1
+            returncode = await settle(writer, cooldown, fixed_rest, stopping_check if last else None)
+        if returncode is None:
+            returncode = await asyncio.to_thread(stopping_check)
+        if returncode == ADAPTIVE_STOP:
+            break
+        if returncode != ADAPTIVE_CONTINUE:
+            print(f"Warning: adaptive stopping check failed (exit code {returncode}); stopping the campaign")
+            break
+    else:
+        print(f"Run budget of {max_runs} runs per version reached")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the energy consumption of Python 3.11 and 3.14.")
+    parser.add_argument("--adaptive-width", type=float, metavar="JOULES",
+                        help="run until the CI on the energy difference is at most this wide, instead of 30 runs each")
+    parser.add_argument("--min-runs", type=int, help="minimum runs per version (adaptive mode, default 10)")
+    parser.add_argument("--max-runs", type=int, help="maximum runs per version (adaptive mode, default 30)")
+    parser.add_argument("--warmup-workers", default="1",
+                        help="number of cores loaded during warm-up, or 'all' to reach equilibrium faster")
+    parser.add_argument("--fixed-sleeps", action="store_true",
+                        help="always warm up for 5 minutes and rest 60 seconds instead of waiting for steady state")
+    parser.add_argument("--worker-duration", type=float, metavar="SECONDS",
+                        help="load benchmark.py once per run and repeat its workload for SECONDS")
+    parser.add_argument("--calibrate", type=float, metavar="SECONDS",
+                        help="first calibrate the matrix size so one multiplication takes SECONDS with Python 3.11")
+    parser.add_argument("--manifest", type=Path, default=output_dir / "campaign_manifest.json",
+                        help="run schedule and status; an interrupted campaign resumes from it")
+    parser.add_argument("--fresh", action="store_true", help="discard the manifest and start a new campaign")
+    parser.add_argument("--memory-probe", action="store_true",
+                        help="record the memory use of runs without --worker-duration (memory_probe.py); adds "
+                             "its startup to every measurement")
+    parser.add_argument("--pin", action="store_true",
+                        help="pin the orchestrator, EnergiBridge and the benchmark to disjoint cores (Linux)")
+    args = parser.parse_args()
+    resuming = args.manifest.exists() and not args.fresh
+    probe_memory = args.memory_probe
+
+    # A fresh campaign starts with empty result folders; the replaced one is kept in the archive
+    if args.fresh:
+        archived = archive_campaign(args.manifest, [python311_dir, python314_dir])
+        if archived:
+            print(f"Moved the previous campaign to {archived}")
+        os.makedirs(python311_dir, exist_ok=True)
+        os.makedirs(python314_dir, exist_ok=True)
+
+    # Set seed for reproducibility
+    random.seed(42)
+
+    # Pinned before calibration and warm-up, which then run on the benchmark's cores
+    if args.pin:
+        cpu_placement = plan_placement()
+        if cpu_placement is not None:
+            pin(cpu_placement["orchestrator"])
+            print(f"Pinned orchestrator to CPUs {cpu_placement['orchestrator']}, EnergiBridge to "
+                  f"{cpu_placement['meter']} and the benchmark to {cpu_placement['workloads'][0]}")
+    workload_cpus = cpu_placement and cpu_placement["workloads"][0]
+
+    # Calibrated sizes are stored alongside the results and reused by later campaigns
+    calibration_file = output_dir / "calibration.json"
+    # An interrupted campaign keeps its size, even an adaptive one without pending runs
+    unfinished = resuming and is_unfinished(args.manifest)
+    if args.calibrate is not None and unfinished:
+        print("Resuming an unfinished campaign; reusing the calibrated size instead of calibrating again")
+    elif args.calibrate is not None:
+        print(f"Calibrating benchmark size to {args.calibrate:.2f} seconds...")
+        size, runtime = calibrate(python_311, benchmark_script, args.calibrate, cpus=workload_cpus)
+        save_calibration(calibration_file, benchmark_script, python_311, args.calibrate, size, runtime)
+    size = lookup_size(calibration_file, benchmark_script)
+    if size:
+        print(f"Using calibrated matrix size {size}")
+
+    # Prepare randomized test order (adaptive campaigns add their rounds as they go)
+    test_order = []
+    if args.adaptive_width is None:
+        test_order = [(version, idx + 1) for idx, version in enumerate(["3.11"] * 30 + ["3.14"] * 30)]
+        random.shuffle(test_order)
+    config = {"adaptive_width": args.adaptive_width, "min_runs": args.min_runs, "max_runs": args.max_runs,
+              "worker_duration": args.worker_duration, "size": size, "pin": args.pin,
+              "memory_probe": args.memory_probe,
+              "calibration_target": args.calibrate}
+    try:
+        manifest = CampaignManifest.open(args.manifest, [
+            {"id": campaign_run_id(version, run_number), "version": version, "run": run_number}
+            for version, run_number in test_order], seed=42, config=config, fresh=args.fresh)
+    except ValueError as error:
+        sys.exit(f"Error: {error} (--fresh)")
+    for run in manifest.requeue_invalid():
+        print(f"Re-queued {run['id']}: {run['error']}")
+    if resuming:
+        counts = manifest.counts()
+        print(f"Resuming campaign from {args.manifest}: {counts['done']} of {len(manifest.runs)} runs done")
+
+    # Background footprint of the orchestrator while it sits next to every measurement
+    footprint.report("orchestrator")
+
+    if args.adaptive_width is None and not manifest.pending():
+        print("All runs of this campaign are done")
+    else:
+        if args.warmup_workers == "all":
+            warmup_workers = len(workload_cpus) if workload_cpus else os.cpu_count()
+        else:
+            warmup_workers = int(args.warmup_workers)
+        warm_up_cpu(workers=warmup_workers, fixed=args.fixed_sleeps, cpus=workload_cpus)
 
-# Run tests in randomized order
-for version, run_number in test_order:
-    python_exe = python_311 if version  == "3.11" else python_314
-    label = f"Python {version}"
-    run_test(python_exe, f"Python{version}", run_number)
-    time.sleep(60)
+    if args.adaptive_width is not None:
+        asyncio.run(run_adaptive_campaign(manifest, args.adaptive_width, args.min_runs, args.max_runs,
+                                          fixed_rest=args.fixed_sleeps, worker_duration=args.worker_duration,
+                                          size=size))
+    else:
+        asyncio.run(run_campaign(manifest, fixed_rest=args.fixed_sleeps, worker_duration=args.worker_duration,
+                                 size=size))
+    # Failed runs that are retried on resume keep the campaign unfinished
+    if args.adaptive_width is not None or not manifest.pending():
+        manifest.complete()
 
-print("Experiment complete! Energy results saved in energy_results")
+    print("Experiment complete! Energy results saved in energy_results")
 
-process_results(python311_dir, python314_dir)
\ No newline at end of file
+    from analyse import process_results
+    from figures import FIGURES_DIR
+    # The campaign runs unattended, so figures are rendered headless instead of blocking on plt.show
+    process_results(python311_dir, python314_dir, FIGURES_DIR)
@@ -0,0 +1,98 @@
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.stats import spearmanr
+
+from run_catalog import load_runs, run_energy, run_energy_per_iteration
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+# Memory metrics stored in the run catalog: worker reports (benchmark_worker.py) and the
+# system-wide USED_MEMORY column of the EnergiBridge trace
+MEMORY_METRICS = ["peak_rss", "tracemalloc_peak", "allocated_blocks", "gc_collections", "used_memory_increase"]
+
+
+def load_memory_runs(folders, benchmark=None, mode=None):
+    """Catalog rows of all folders with their energy, energy per iteration and memory metrics."""
+    frames = []
+    for folder in folders:
+        if not os.path.isdir(folder):
+            print(f"Warning: Directory {folder} does not exist")
+            continue
+        runs = load_runs(folder, benchmark=benchmark, mode=mode)
+        frames.append(runs.assign(energy=run_energy(runs), energy_per_iteration=run_energy_per_iteration(runs)))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def correlate(runs, energy_column="energy"):
+    """Spearman correlation between each memory metric and energy over a set of runs."""
+    result = {}
+    for metric in MEMORY_METRICS:
+        pairs = runs[[metric, energy_column]].astype(float).dropna()
+        if len(pairs) < 3 or pairs[metric].nunique() < 2 or pairs[energy_column].nunique() < 2:
+            continue
+        rho, p_value = spearmanr(pairs[metric], pairs[energy_column])
+        result[metric] = {"rho": float(rho), "p_value": float(p_value), "n": len(pairs)}
+    return result
+
+
+def summarize_memory(runs):
+    """Median memory metrics and energy per benchmark, mode and version."""
+    columns = [metric for metric in MEMORY_METRICS if runs[metric].notna().any()]
+    summary = (runs.groupby(["benchmark", "mode", "version"])
+               [columns + ["energy", "energy_per_iteration"]].median()
+               .join(runs.groupby(["benchmark", "mode", "version"]).size().rename("runs")))
+    return summary.reset_index()
+
+
+def print_report(runs):
+    summary = summarize_memory(runs)
+    for (benchmark, mode), group in summary.groupby(["benchmark", "mode"]):
+        print(f"\n{benchmark} ({mode})")
+        for row in group.itertuples():
+            parts = [f"Python {row.version}: {row.runs} runs, energy {row.energy:.2f} J"]
+            if not np.isnan(row.energy_per_iteration):
+                parts.append(f"{row.energy_per_iteration:.4f} J/iteration")
+            if "peak_rss" in group and not np.isnan(row.peak_rss):
+                parts.append(f"peak RSS {row.peak_rss / 2**20:.1f} MiB")
+            if "tracemalloc_peak" in group and not np.isnan(row.tracemalloc_peak):
+                parts.append(f"tracemalloc peak {row.tracemalloc_peak / 2**20:.2f} MiB")
+            if "allocated_blocks" in group and not np.isnan(row.allocated_blocks):
+                parts.append(f"{row.allocated_blocks:.0f} net blocks")
+            if "gc_collections" in group and not np.isnan(row.gc_collections):
+                parts.append(f"{row.gc_collections:.0f} GC collections")
+            if "used_memory_increase" in group and not np.isnan(row.used_memory_increase):
+                parts.append(f"system memory +{row.used_memory_increase / 2**20:.1f} MiB")
+            print("  " + ", ".join(parts))
+
+        # Correlation over the runs of both versions, then within each version
+        selection = runs[(runs["benchmark"] == benchmark) & (runs["mode"] == mode)]
+        energy_column = "energy_per_iteration" if selection["energy_per_iteration"].notna().any() else "energy"
+        for label, subset in [("all versions", selection)] + [
+                (f"Python {version}", rows) for version, rows in selection.groupby("version")]:
+            for metric, stats in correlate(subset, energy_column).items():
+                print(f"  {label}: {metric} vs {energy_column}: Spearman rho={stats['rho']:.2f} "
+                      f"(p={stats['p_value']:.3g}, n={stats['n']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Correlate per-run memory footprint with energy across versions.")
+    parser.add_argument("folders", nargs="*", default=[PROJECT_ROOT / "results" / "Python3.11",
+                                                       PROJECT_ROOT / "results" / "Python3.14"])
+    parser.add_argument("--benchmark", help="only this benchmark script")
+    parser.add_argument("--mode", help="only this mode (e.g. normal-blocked for a kernel variant)")
+    parser.add_argument("--output", help="write the per-configuration medians to this CSV file")
+    args = parser.parse_args()
+
+    runs = load_memory_runs(args.folders, args.benchmark, args.mode)
+    if runs.empty:
+        print("No runs found")
+    else:
+        print_report(runs)
+        if args.output:
+            summarize_memory(runs).to_csv(args.output, index=False)
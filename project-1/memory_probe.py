@@ -0,0 +1,47 @@
+import argparse
+import json
+import os
+import runpy
+import sys
+import tracemalloc
+
+from benchmark_worker import memory_counters, memory_report
+
+# Runs a benchmark script exactly as `python script.py args` would and appends the memory it used
+# (peak RSS, tracemalloc peak, allocator and GC counters, as in benchmark_worker.py reports) as one
+# JSON line to a log, so runs that relaunch the script still record their memory use.
+
+
+def run_script(script, args, trace_memory=False):
+    """Run `script` as __main__ with `args`; returns (exit code, memory report)."""
+    sys.argv = [script] + args
+    sys.path[0] = os.path.dirname(os.path.abspath(script))
+    if trace_memory:
+        tracemalloc.start()
+    before = memory_counters()
+    code = 0
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as exit:
+        code = exit.code if isinstance(exit.code, int) else (0 if exit.code is None else 1)
+    after = memory_counters()
+    tracemalloc_peak = None
+    if trace_memory:
+        tracemalloc_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return code, memory_report(before, after, tracemalloc_peak)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a benchmark script and append its memory use to a log.")
+    parser.add_argument("log", help="JSON lines file, one line per launch")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record the tracemalloc peak (slows allocation-heavy workloads)")
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    code, memory = run_script(args.script, args.args, args.trace_memory)
+    with open(args.log, "a") as file:
+        file.write(json.dumps(dict(memory, pid=os.getpid(), exit_code=code)) + "\n")
+    sys.exit(code)
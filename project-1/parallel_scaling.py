@@ -0,0 +1,160 @@
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from config_matrix import check_mode, mode_env, mode_interpreter
+from steady_state import package_rapl_files
+from trace_reader import rapl_wrap_range, reduce_trace
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+worker_script = PROJECT_ROOT / "benchmark_worker.py"
+
+# Worker counts measured by default: powers of two up to the number of cores
+DEFAULT_WORKERS = sorted({1, *(2 ** i for i in range(1, 8) if 2 ** i <= (os.cpu_count() or 1)), os.cpu_count() or 1})
+
+RESULT_COLUMNS = ["executor", "workers", "iterations", "work_time", "throughput", "speedup", "efficiency",
+                  "energy", "energy_per_iteration", "average_power"]
+
+
+def read_rapl(rapl_files):
+    """Current RAPL package counters in joules, or None when they are not readable."""
+    readings = []
+    for path in rapl_files:
+        try:
+            with open(path) as file:
+                readings.append(int(file.read()) / 1e6)
+        except (OSError, ValueError):
+            return None
+    return readings or None
+
+
+def measure_point(python, script, mode, executor, workers, duration, size=None, energibridge_cmd=None):
+    """Run the workload for `duration` seconds with `workers` workers.
+
+    Returns the worker report, the energy (J) and the seconds it was measured over
+    (interpreter startup and pool spawn included). Energy comes from EnergiBridge when
+    a command is given, otherwise from the RAPL counters in /sys, otherwise it is None.
+    """
+    settings = dict(mode_env(mode), PARALLEL_EXECUTOR=executor, PARALLEL_WORKERS=str(workers))
+    env = dict(os.environ, **settings)
+    handle, report_file = tempfile.mkstemp(suffix=".json", prefix="scaling_")
+    os.close(handle)
+    command = [mode_interpreter(python, mode), str(worker_script), str(script),
+               "--duration", str(duration), "--report", report_file]
+    if size:
+        command += ["--size", str(size)]
+
+    trace_file = None
+    rapl_files = package_rapl_files()
+    before = read_rapl(rapl_files) if not energibridge_cmd else None
+    try:
+        if energibridge_cmd:
+            handle, trace_file = tempfile.mkstemp(suffix=".csv", prefix="scaling_")
+            os.close(handle)
+            # sudo resets the environment, so the settings are passed on the command line through env
+            command = (list(energibridge_cmd) + ["-o", trace_file, "env"]
+                       + [f"{name}={value}" for name, value in settings.items()] + command)
+        start = time.monotonic()
+        subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL)
+        after = read_rapl(rapl_files) if before else None
+        elapsed = time.monotonic() - start
+        with open(report_file) as file:
+            report = json.load(file)
+
+        energy = None
+        if trace_file:
+            trace = reduce_trace(trace_file)
+            energy = trace["package_energy"] if trace["package_energy"] is not None else trace["system_energy"]
+            elapsed = trace["trace_duration"]
+        elif before and after:
+            # A counter that wrapped around during the run reads lower afterwards
+            wrap = rapl_wrap_range()
+            energy = sum((end - start) % wrap for start, end in zip(before, after))
+        return report, energy, elapsed
+    finally:
+        for path in (report_file, trace_file):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+
+def scaling_curve(python, script, mode="normal", executors=("thread", "process"), worker_counts=DEFAULT_WORKERS,
+                  duration=10, size=None, energibridge_cmd=None):
+    """Throughput, speedup and energy per iteration for every executor and worker count.
+
+    The serial run with one worker is the baseline for speedup and efficiency. It is
+    measured twice and the first measurement is discarded, because the first run
+    after a pause runs at lower clock frequencies.
+    """
+    points = [("serial", 1)] + [(executor, workers) for executor in executors for workers in worker_counts]
+    print("Warming up...")
+    measure_point(python, script, mode, "serial", 1, duration, size, energibridge_cmd)
+    rows = []
+    baseline = None
+    for executor, workers in points:
+        print(f"Measuring {executor} x{workers}...")
+        report, energy, elapsed = measure_point(python, script, mode, executor, workers, duration, size, energibridge_cmd)
+        throughput = report["iterations"] / report["work_time"] if report["work_time"] else None
+        if baseline is None:
+            baseline = throughput
+        speedup = throughput / baseline if throughput and baseline else None
+        rows.append({
+            "executor": executor,
+            "workers": workers,
+            "iterations": report["iterations"],
+            "work_time": report["work_time"],
+            "throughput": throughput,
+            "speedup": speedup,
+            "efficiency": speedup / workers if speedup else None,
+            "energy": energy,
+            "energy_per_iteration": energy / report["iterations"] if energy is not None and report["iterations"] else None,
+            # The energy covers the whole launch, so it is divided by the time it was measured over
+            "average_power": energy / elapsed if energy is not None and elapsed else None,
+        })
+    return rows
+
+
+def _format(value, spec):
+    return format(value, spec) if value is not None else "n/a"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure how throughput and energy per unit of work scale with the number of workers.")
+    parser.add_argument("script", help="benchmarks/matrix_benchmark.py or benchmarks/collatz_range_benchmark.py")
+    parser.add_argument("--python", default=sys.executable)
+    parser.add_argument("--mode", default="normal", help="runtime configuration, e.g. freethreaded for python3.14t")
+    parser.add_argument("--executors", nargs="+", default=["thread", "process"], choices=["thread", "process"])
+    parser.add_argument("--workers", nargs="+", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per measurement")
+    parser.add_argument("--size", type=int, help="problem size passed to the workload")
+    parser.add_argument("--energibridge", nargs="+", metavar="CMD",
+                        help="measure energy with EnergiBridge (e.g. sudo path/to/energibridge) instead of /sys")
+    parser.add_argument("--output", help="write the scaling table to this CSV file")
+    args = parser.parse_args()
+
+    try:
+        check_mode(args.python, args.mode)
+    except ValueError as error:
+        sys.exit(f"Error: {error}")
+    rows = scaling_curve(args.python, args.script, args.mode, args.executors, args.workers,
+                         args.duration, args.size, args.energibridge)
+
+    print(f"\n{os.path.basename(args.script)} ({args.mode}, {mode_interpreter(args.python, args.mode)})")
+    print(f"{'executor':<9}{'workers':>8}{'iter/s':>10}{'speedup':>9}{'effic.':>8}{'J/iter':>10}{'W':>8}")
+    for row in rows:
+        print(f"{row['executor']:<9}{row['workers']:>8}{_format(row['throughput'], '.2f'):>10}"
+              f"{_format(row['speedup'], '.2f'):>9}{_format(row['efficiency'], '.0%'):>8}"
+              f"{_format(row['energy_per_iteration'], '.3f'):>10}{_format(row['average_power'], '.1f'):>8}")
+
+    if args.output:
+        with open(args.output, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=RESULT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
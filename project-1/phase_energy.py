@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from run_catalog import load_runs
+from trace_reader import TRACE_COLUMNS, rapl_wrap_range, unwrap_energy
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+# Energy outside every marked phase (interpreter startup, gaps between launches, idle tail)
+UNATTRIBUTED = "unattributed"
+
+
+def phase_path_for(csv_path):
+    """Return the phase marker side-car (JSON lines) belonging to a result CSV."""
+    folder, name = os.path.split(csv_path)
+    return os.path.join(folder, "phases_" + name[len("energy_"):-len(".csv")] + ".jsonl")
+
+
+def read_phases(phase_file):
+    """Phase markers of a run as a DataFrame with phase, start and end (epoch ms)."""
+    with open(phase_file, "r") as file:
+        markers = [json.loads(line) for line in file if line.strip()]
+    return pd.DataFrame(markers, columns=["phase", "start", "end", "pid"])
+
+
+def cumulative_energy(trace):
+    """Return (sample times in ms, energy in J consumed since the first sample).
+
+    Uses the RAPL package energy counter (corrected for wraparound) when present;
+    otherwise integrates the system power, taking each sample as the average power
+    since the previous one.
+    """
+    times = trace["Time"].to_numpy(dtype=float)
+    if "PACKAGE_ENERGY (J)" in trace.columns:
+        return times, unwrap_energy(trace["PACKAGE_ENERGY (J)"].to_numpy(dtype=float), rapl_wrap_range(), times)
+    power = trace["SYSTEM_POWER (Watts)"].to_numpy(dtype=float)
+    intervals = np.diff(times, prepend=times[0]) / 1000
+    return times, np.cumsum(power * intervals)
+
+
+def attribute_phases(trace, phases):
+    """Energy per phase marker, interpolating the cumulative energy at each marker.
+
+    EnergiBridge samples every ~200 ms, so phases shorter than that are estimated
+    from the average power of the sample interval they fall in. Markers outside
+    the trace are clipped to it.
+    """
+    times, energy = cumulative_energy(trace)
+    start = np.clip(phases["start"].to_numpy(dtype=float), times[0], times[-1])
+    end = np.clip(phases["end"].to_numpy(dtype=float), times[0], times[-1])
+    result = phases.assign(duration=(end - start) / 1000,
+                           energy=np.interp(end, times, energy) - np.interp(start, times, energy))
+    return result, float(energy[-1]), (times[-1] - times[0]) / 1000
+
+
+def attribute_run(csv_path, phase_file=None):
+    """Per-phase totals of one run, including the unattributed remainder, or None without markers."""
+    phase_file = phase_file or phase_path_for(csv_path)
+    if not os.path.exists(phase_file):
+        return None
+    phases = read_phases(phase_file)
+    trace = pd.read_csv(csv_path, usecols=lambda column: column in TRACE_COLUMNS)
+    if phases.empty or len(trace) < 2:
+        return None
+
+    markers, total_energy, total_duration = attribute_phases(trace, phases)
+    totals = markers.groupby("phase", sort=False).agg(count=("energy", "size"), duration=("duration", "sum"),
+                                                      energy=("energy", "sum")).reset_index()
+    remainder = {"phase": UNATTRIBUTED, "count": 0,
+                 "duration": total_duration - totals["duration"].sum(),
+                 "energy": total_energy - totals["energy"].sum()}
+    totals = pd.concat([totals, pd.DataFrame([remainder])], ignore_index=True)
+    totals["share"] = totals["energy"] / total_energy if total_energy else np.nan
+    totals["power"] = totals["energy"] / totals["duration"].where(totals["duration"] > 0)
+    return totals
+
+
+def attribute_folder(folder, benchmark=None, mode=None):
+    """Per-phase totals of every run in a result folder that recorded phase markers."""
+    frames = []
+    for _, run in load_runs(folder, benchmark=benchmark, mode=mode).iterrows():
+        try:
+            totals = attribute_run(run["csv_path"])
+        except Exception as e:
+            print(f"Error reading phases of {run['csv_path']}: {e}")
+            continue
+        if totals is None:
+            continue
+        frames.append(totals.assign(benchmark=run["benchmark"], version=run["version"],
+                                    mode=run["mode"], run=run["run"]))
+    if not frames:
+        return pd.DataFrame(columns=["benchmark", "version", "mode", "run", "phase", "count",
+                                     "duration", "energy", "share", "power"])
+    return pd.concat(frames, ignore_index=True)[["benchmark", "version", "mode", "run", "phase", "count",
+                                                  "duration", "energy", "share", "power"]]
+
+
+def summarize_phases(per_run):
+    """Median energy, share and power per phase over the runs of each configuration."""
+    return (per_run.groupby(["benchmark", "mode", "version", "phase"], sort=False)
+            .agg(runs=("run", "nunique"), energy=("energy", "median"), share=("share", "median"),
+                 power=("power", "median"), duration=("duration", "median"))
+            .reset_index())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Attribute the energy of each run to the phases its benchmark marked.")
+    parser.add_argument("folders", nargs="*", default=[PROJECT_ROOT / "results" / "Python3.11",
+                                                       PROJECT_ROOT / "results" / "Python3.14"])
+    parser.add_argument("--benchmark", help="only this benchmark script (e.g. matrix_benchmark.py)")
+    parser.add_argument("--mode", help="only this mode")
+    parser.add_argument("--output", help="write the per-run phase energies to this CSV file")
+    args = parser.parse_args()
+
+    per_run = pd.concat([attribute_folder(folder, args.benchmark, args.mode)
+                         for folder in args.folders if os.path.isdir(folder)], ignore_index=True)
+    if per_run.empty:
+        print("No runs with phase markers found (phases_*.jsonl next to the energy CSVs)")
+    else:
+        if args.output:
+            per_run.to_csv(args.output, index=False)
+        for (benchmark, mode), group in summarize_phases(per_run).groupby(["benchmark", "mode"], sort=False):
+            print(f"\n{benchmark} ({mode})")
+            for _, row in group.iterrows():
+                print(f"  Python {row['version']:<5} {row['phase']:<13} {row['energy']:8.2f} J "
+                      f"{row['share']:6.1%} {row['power']:7.2f} W  ({row['runs']} runs)")
@@ -0,0 +1,204 @@
+import argparse
+import contextlib
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from energibridge_sim import INTERVAL_MS, PowerModel, TraceReplay, trace_columns, write_summary, write_trace
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+# Synthetic campaigns are laid out like scripts/experiment.sh results (results/Python3.x)
+VERSIONS = {"Python3.11": "python3.11", "Python3.14": "python3.14"}
+MODES = ["normal", "optimized"]
+BENCHMARK = "matrix_benchmark.py"
+
+# Dynamic power of each version relative to 3.11, so the comparisons have an effect to find
+VERSION_SCALES = {"Python3.11": 1.0, "Python3.14": 0.95}
+
+# Samples per synthetic run: 20 s at EnergiBridge's 200 ms interval, as in experiment.sh
+SAMPLES = 100
+
+# Cores in synthetic traces (columns per sample grow with the core count)
+CORES = 4
+
+STAGES = ["load_cold", "load_warm", "process_results"]
+
+# Relative throughput drop or peak RSS growth tolerated against a stored baseline
+TOLERANCE = 0.2
+
+# Exit code when a stage regressed (1 is left to errors), as in regression_gate.py
+REGRESSION_EXIT_CODE = 3
+
+
+def generate_campaign(root, runs, seed=0, samples=SAMPLES, cores=CORES, replay=None):
+    """Write `runs` synthetic runs (traces and summaries) spread over the versions and modes.
+
+    Traces come from the power model (macOS layout, which load_experiment_results
+    reads), or are recorded traces from `replay` re-timed to the run's start.
+    Returns the version folders.
+    """
+    rng = np.random.default_rng(seed)
+    sources = [TraceReplay(path) for path in replay] if replay else None
+    columns = trace_columns("macos", cores)
+    folders = {}
+    for version in VERSIONS:
+        folders[version] = os.path.join(root, version)
+        os.makedirs(folders[version], exist_ok=True)
+    models = {version: PowerModel(scale=scale, seed=rng.integers(2**32)) for version, scale in VERSION_SCALES.items()}
+
+    groups = [(version, mode) for version in VERSIONS for mode in MODES]
+    start_ms = time.time() * 1000
+    for index in range(runs):
+        version, mode = groups[index % len(groups)]
+        run = index // len(groups) + 1
+        time_ms = start_ms + np.arange(samples) * INTERVAL_MS * (1 + 0.01 * rng.standard_normal())
+        if sources:
+            source = sources[index % len(sources)]
+            run_columns, values = source.columns, source.samples(time_ms)
+        else:
+            usage = np.clip(rng.normal(90 if mode == "normal" else 80, 5, size=(samples, cores)), 0, 100)
+            run_columns, values = columns, models[version].samples(columns, time_ms, usage)
+        stem = f"{BENCHMARK}_{VERSIONS[version]}_{mode}_run{run}"
+        write_trace(os.path.join(folders[version], f"energy_{stem}.csv"), run_columns, values)
+        duration = (time_ms[-1] - time_ms[0]) / 1000
+        if "SYSTEM_POWER (Watts)" in run_columns:
+            energy = np.nanmean(values[:, run_columns.index("SYSTEM_POWER (Watts)")]) * duration
+        else:
+            package = values[:, run_columns.index("PACKAGE_ENERGY (J)")]
+            energy = package[-1] - package[0]
+        write_summary(os.path.join(folders[version], f"energybridge_output_{stem}.txt"), energy, duration)
+        start_ms = time_ms[-1] + INTERVAL_MS
+    return folders
+
+
+def run_stage(stage, root):
+    """Run one pipeline stage in this process and return its wall time and peak memory.
+
+    Meant to run in a fresh interpreter (see measure_stage) so peak RSS covers only this stage.
+    """
+    import footprint
+    from analyze_graphs import load_experiment_results, process_results
+
+    folders = [os.path.join(root, version) for version in VERSIONS]
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), warnings.catch_warnings():
+        # Plots are written to the working directory; plt.show is a no-op under Agg
+        warnings.simplefilter("ignore")
+        if stage == "process_results":
+            process_results(*folders)
+            values = None
+        else:
+            values = sum(len(load_experiment_results(folder, mode, BENCHMARK)) for folder in folders for mode in MODES)
+    return {"seconds": time.perf_counter() - start, "peak_rss": footprint.peak_rss(), "values": values}
+
+
+def measure_stage(stage, root, catalog):
+    """Run a stage in a subprocess (headless, in a scratch directory, with its own catalog)."""
+    env = dict(os.environ, MPLBACKEND="Agg", RUN_CATALOG=str(catalog))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+    if stage == "load_cold" and os.path.exists(catalog):
+        os.remove(catalog)
+    with tempfile.TemporaryDirectory() as cwd:
+        output = subprocess.run([sys.executable, str(Path(__file__).resolve()), "stage", stage, str(root)],
+                                cwd=cwd, env=env, capture_output=True, text=True)
+    if output.returncode != 0:
+        raise RuntimeError(f"Stage {stage} failed:\n{output.stderr}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(runs, seed=0, samples=SAMPLES, cores=CORES, replay=None, stages=STAGES, keep=None):
+    """Generate a synthetic campaign and measure throughput (runs/s) and peak RSS of each stage."""
+    root = keep or tempfile.mkdtemp(prefix="pipeline_benchmark_")
+    try:
+        start = time.perf_counter()
+        generate_campaign(root, runs, seed, samples, cores, replay)
+        results = {"runs": runs, "samples": samples, "cores": cores, "replay": replay,
+                   "generate_seconds": time.perf_counter() - start, "stages": {}}
+        print(f"Generated {runs} runs in {results['generate_seconds']:.1f} s")
+        catalog = os.path.join(root, "run_catalog.sqlite")
+        for stage in stages:
+            result = measure_stage(stage, root, catalog)
+            result["runs_per_second"] = runs / result["seconds"]
+            results["stages"][stage] = result
+            print(f"{stage}: {result['seconds']:.2f} s, {result['runs_per_second']:.0f} runs/s, "
+                  f"peak RSS {result['peak_rss'] / 2**20:.0f} MiB")
+        return results
+    finally:
+        if keep is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def check_baseline(results, baseline, tolerance=TOLERANCE):
+    """Regressions of a benchmark result against a stored one (same run count), as messages."""
+    problems = []
+    if baseline["runs"] != results["runs"]:
+        print(f"Warning: baseline has {baseline['runs']} runs, this benchmark {results['runs']}; "
+              "throughput is compared anyway")
+    for stage, result in results["stages"].items():
+        before = baseline["stages"].get(stage)
+        if before is None:
+            continue
+        if result["runs_per_second"] < before["runs_per_second"] * (1 - tolerance):
+            problems.append(f"{stage}: throughput {result['runs_per_second']:.0f} runs/s, "
+                            f"baseline {before['runs_per_second']:.0f} runs/s")
+        if result["peak_rss"] and before["peak_rss"] and result["peak_rss"] > before["peak_rss"] * (1 + tolerance):
+            problems.append(f"{stage}: peak RSS {result['peak_rss'] / 2**20:.0f} MiB, "
+                            f"baseline {before['peak_rss'] / 2**20:.0f} MiB")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure throughput and memory of the analysis pipeline "
+                                                 "on synthetic campaigns of 10k-100k runs.")
+    subparsers = parser.add_subparsers(dest="command")
+    stage_parser = subparsers.add_parser("stage", help=argparse.SUPPRESS)
+    stage_parser.add_argument("stage", choices=STAGES)
+    stage_parser.add_argument("root")
+
+    parser.add_argument("--runs", type=int, default=10_000, help="synthetic runs (split over versions and modes)")
+    parser.add_argument("--samples", type=int, default=SAMPLES, help="samples per synthetic trace")
+    parser.add_argument("--cores", type=int, default=CORES, help="cores per synthetic trace")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replay", nargs="+", metavar="PATTERN",
+                        help="replay recorded traces (e.g. 'results/Python3.11/*.csv') instead of the power "
+                             "model; traces without SYSTEM_POWER only exercise loading")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--keep", help="generate the campaign in this directory and keep it")
+    parser.add_argument("--output", help="write the results to this JSON file (usable as --baseline)")
+    parser.add_argument("--baseline", help="fail when a stage is slower or larger than in this JSON result")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="relative throughput drop or peak RSS growth allowed against the baseline")
+    args = parser.parse_args()
+
+    if args.command == "stage":
+        print(json.dumps(run_stage(args.stage, args.root)))
+        sys.exit(0)
+
+    replay = None
+    if args.replay:
+        replay = sorted(path for pattern in args.replay for path in glob.glob(pattern))
+        if not replay:
+            print(f"Error: no traces match {args.replay}", file=sys.stderr)
+            sys.exit(2)
+    results = run_benchmark(args.runs, args.seed, args.samples, args.cores, replay, args.stages, args.keep)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            problems = check_baseline(results, json.load(file), args.tolerance)
+        for problem in problems:
+            print(f"Regression: {problem}")
+        if problems:
+            sys.exit(REGRESSION_EXIT_CODE)
+        print("No throughput or memory regressions")
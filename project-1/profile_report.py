@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+from collections import Counter
+from pathlib import Path
+
+import pandas as pd
+
+from run_catalog import load_runs, run_energy, run_energy_per_iteration
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+# Weight of the functions beyond a profile's top entries (profiler.TOP_ENTRIES)
+OTHER = "(other functions)"
+
+
+def profile_path_for(csv_path):
+    """Return the shadow-run profile (profiler.py report) belonging to a result CSV."""
+    folder, name = os.path.split(csv_path)
+    return os.path.join(folder, "profile_" + name[len("energy_"):-len(".csv")] + ".json")
+
+
+def profile_weights(profile):
+    """Per-function weights of one profile: self samples (sampling) or calls (monitoring).
+
+    Profiles only list their top functions; the rest of the profile's total samples
+    (or calls) is pooled under OTHER, so shares are shares of the whole profile.
+    """
+    column, total = ("calls", "calls") if profile["method"] == "monitoring" else ("self", "samples")
+    weights = Counter({entry["function"]: entry[column] for entry in profile["functions"]})
+    other = profile[total] - sum(weights.values())
+    if other > 0:
+        weights[OTHER] = other
+    return weights
+
+
+def load_profiles(folder, benchmark=None, mode=None):
+    """Measured runs of a folder joined with their shadow-run profiles.
+
+    Returns the runs (with energy and energy per iteration) and the summed function
+    weights of their profiles per (benchmark, mode, version), with the profiling method.
+    """
+    runs = load_runs(folder, benchmark=benchmark, mode=mode)
+    runs = runs.assign(energy=run_energy(runs), energy_per_iteration=run_energy_per_iteration(runs))
+    weights = {}
+    for run in runs.itertuples():
+        path = profile_path_for(run.csv_path)
+        if not os.path.exists(path):
+            continue
+        with open(path) as file:
+            profile = json.load(file)
+        key = (run.benchmark, run.mode, run.version)
+        method, counter = weights.setdefault(key, (profile["method"], Counter()))
+        if method != profile["method"]:
+            print(f"Warning: {path} uses {profile['method']} profiling, other runs use {method}; skipped")
+            continue
+        counter.update(profile_weights(profile))
+    return runs, weights
+
+
+def hot_path_energy(runs, weights):
+    """Each function's share of the profile and the energy attributed to it, per configuration.
+
+    The energy of a configuration (median per iteration for worker runs, otherwise
+    per run) is split over functions by their share of the samples, assuming a
+    roughly constant power draw while the workload runs. For call-count profiles
+    the share is a share of calls, not of time, so no energy is attributed.
+    """
+    rows = []
+    for (benchmark, mode, version), (method, counter) in weights.items():
+        selection = runs[(runs["benchmark"] == benchmark) & (runs["mode"] == mode) & (runs["version"] == version)]
+        per_iteration = selection["energy_per_iteration"].notna().any()
+        energy = (selection["energy_per_iteration"] if per_iteration else selection["energy"]).median()
+        total = sum(counter.values())
+        for function, weight in counter.items():
+            share = weight / total if total else 0.0
+            rows.append({
+                "benchmark": benchmark, "mode": mode, "version": version, "method": method,
+                "function": function, "weight": weight, "share": share,
+                "energy": share * energy if method == "sampling" else float("nan"),
+                "energy_unit": "J/iteration" if per_iteration else "J/run",
+            })
+    return pd.DataFrame(rows, columns=["benchmark", "mode", "version", "method", "function", "weight", "share",
+                                       "energy", "energy_unit"])
+
+
+def compare_versions(hot_paths, top=15):
+    """Side-by-side shares and energies per function, sorted by the largest energy (or share) change."""
+    tables = {}
+    for (benchmark, mode), group in hot_paths.groupby(["benchmark", "mode"]):
+        table = group.pivot_table(index="function", columns="version", values=["share", "energy"],
+                                  aggfunc="sum", dropna=False)
+        table.columns = [f"{value}_{version}" for value, version in table.columns]
+        versions = sorted(group["version"].unique())
+        if len(versions) == 2:
+            for value in ("share", "energy"):
+                table[f"{value}_change"] = (table[f"{value}_{versions[1]}"].fillna(0)
+                                            - table[f"{value}_{versions[0]}"].fillna(0))
+            order = table["energy_change"] if table["energy_change"].abs().sum() > 0 else table["share_change"]
+            table = table.loc[order.abs().sort_values(ascending=False).index]
+        tables[(benchmark, mode)] = table.head(top)
+    return tables
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Join shadow-run profiles with the measured energy per version.")
+    parser.add_argument("folders", nargs="*", default=[PROJECT_ROOT / "results" / "Python3.11",
+                                                       PROJECT_ROOT / "results" / "Python3.14"])
+    parser.add_argument("--benchmark", help="only this benchmark script")
+    parser.add_argument("--mode", help="only this mode")
+    parser.add_argument("--top", type=int, default=15, help="functions shown per configuration")
+    parser.add_argument("--output", help="write the per-function shares and energies to this CSV file")
+    args = parser.parse_args()
+
+    frames = []
+    for folder in args.folders:
+        if not os.path.isdir(folder):
+            print(f"Warning: Directory {folder} does not exist")
+            continue
+        runs, weights = load_profiles(folder, args.benchmark, args.mode)
+        frames.append(hot_path_energy(runs, weights))
+    hot_paths = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    if hot_paths.empty:
+        print("No profiles found; run experiment.sh with PROFILE_SHADOW=1")
+    else:
+        if args.output:
+            hot_paths.to_csv(args.output, index=False)
+        pd.set_option("display.width", 200)
+        for (benchmark, mode), table in compare_versions(hot_paths, args.top).items():
+            unit = hot_paths[(hot_paths["benchmark"] == benchmark) & (hot_paths["mode"] == mode)]["energy_unit"].iloc[0]
+            print(f"\n{benchmark} ({mode}), energy in {unit}")
+            print(table.to_string(float_format=lambda value: f"{value:.4f}"))
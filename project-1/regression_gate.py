@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from analyze_graphs import compare_samples, remove_outliers
+from comparison_engine import CORRECTIONS, adjust_p_values
+from run_catalog import load_runs, run_energy, run_energy_per_iteration
+
+# Relative increase of the median beyond which a significant change counts as a regression
+ENERGY_THRESHOLD = 0.05
+TIME_THRESHOLD = 0.05
+
+# Runs a group needs on both sides before it is tested
+MIN_RUNS = 3
+
+# Exit codes when at least one group regressed, or could not be tested (1 is left to errors)
+REGRESSION_EXIT_CODE = 3
+INCOMPLETE_EXIT_CODE = 4
+
+# Statuses of groups that were not tested; they fail the check unless --allow-missing is set
+INCOMPLETE_STATUSES = ["missing", "insufficient", "incomparable"]
+
+REPORT_COLUMNS = [
+    "benchmark", "version", "mode", "metric", "unit", "status", "n_baseline", "n_new", "test_used",
+    "p_value", "p_adjusted", "median_baseline", "median_new", "relative_change", "threshold",
+]
+
+
+def group_metrics(runs):
+    """Energy and time samples per (benchmark, version, mode).
+
+    Worker runs (benchmark_worker.py) are compared per iteration. Other runs are
+    compared on energy per run only: their duration is the fixed 20 s EnergiBridge
+    window of both runners, so it can never regress.
+    """
+    runs = runs.assign(energy=run_energy(runs), energy_per_iteration=run_energy_per_iteration(runs))
+    groups = {}
+    for (benchmark, version, mode), group in runs.groupby(["benchmark", "version", "mode"]):
+        if group["energy_per_iteration"].notna().any():
+            groups[(benchmark, version, mode)] = {
+                "energy": {"unit": "J/iteration",
+                           "values": group["energy_per_iteration"].dropna().astype(float).tolist()},
+                "time": {"unit": "s/iteration", "values": group["iteration_time"].dropna().astype(float).tolist()},
+            }
+        else:
+            groups[(benchmark, version, mode)] = {
+                "energy": {"unit": "J/run", "values": group["energy"].dropna().astype(float).tolist()},
+            }
+    return groups
+
+
+def load_folders(folders):
+    """Runs of result folders; raises ValueError when none of them holds a run."""
+    frames = []
+    for folder in folders:
+        if not os.path.isdir(folder):
+            print(f"Warning: Directory {folder} does not exist", file=sys.stderr)
+            continue
+        frames.append(load_runs(folder))
+    runs = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if runs.empty:
+        raise ValueError(f"no runs found in {', '.join(str(folder) for folder in folders)}")
+    return runs
+
+
+def save_baseline(folders, output):
+    """Store the samples of every group so later batches can be compared after the runs are gone."""
+    groups = group_metrics(load_folders(folders))
+    baseline = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "folders": [str(folder) for folder in folders],
+        "groups": [dict({"benchmark": benchmark, "version": version, "mode": mode}, **metrics)
+                   for (benchmark, version, mode), metrics in sorted(groups.items())],
+    }
+    with open(output, "w") as file:
+        json.dump(baseline, file, indent=2)
+    return baseline
+
+
+def load_baseline(path):
+    """Groups of a stored baseline (JSON) or of result folders (a directory, or several joined by os.pathsep)."""
+    if os.path.isfile(path):
+        with open(path) as file:
+            baseline = json.load(file)
+        # Baselines stored before the fixed-window time was dropped still hold it as s/run
+        return {(group["benchmark"], group["version"], group["mode"]): {
+                    metric: group[metric] for metric in ("energy", "time")
+                    if metric in group and group[metric]["unit"] != "s/run"}
+                for group in baseline["groups"]}
+    return group_metrics(load_folders(path.split(os.pathsep)))
+
+
+def check_regressions(baseline, new, thresholds, alpha=0.05, correction="holm"):
+    """Compare every group and metric of a new batch against the baseline.
+
+    The test follows analyze_graphs.compare_samples (Welch's t-test for normal
+    samples, Mann-Whitney U otherwise) after outlier removal. A change is a
+    regression when it is significant after correction and the median grew by more
+    than the metric's threshold; an equally large significant decrease is an
+    improvement.
+    """
+    rows = []
+    for key in sorted(set(baseline) | set(new)):
+        for metric, threshold in thresholds.items():
+            if all(metric not in groups.get(key, {}) for groups in (baseline, new)):
+                continue  # time of runs without worker reports (fixed windows)
+            row = dict(zip(["benchmark", "version", "mode"], key), metric=metric, threshold=threshold)
+            if key not in new:
+                rows.append(dict(row, status="missing", unit=baseline[key][metric]["unit"]))
+                continue
+            if key not in baseline:
+                rows.append(dict(row, status="no baseline", unit=new[key][metric]["unit"]))
+                continue
+            if metric not in baseline[key] or metric not in new[key]:
+                # Worker runs on one side only
+                unit = (new[key].get(metric) or baseline[key][metric])["unit"]
+                rows.append(dict(row, status="incomparable", unit=unit))
+                continue
+            before = remove_outliers(np.array(baseline[key][metric]["values"]))
+            after = remove_outliers(np.array(new[key][metric]["values"]))
+            row.update(unit=new[key][metric]["unit"], n_baseline=len(before), n_new=len(after))
+            if baseline[key][metric]["unit"] != new[key][metric]["unit"]:
+                rows.append(dict(row, status="incomparable"))
+                continue
+            if len(before) < MIN_RUNS or len(after) < MIN_RUNS or np.ptp(np.concatenate([before, after])) == 0:
+                rows.append(dict(row, status="insufficient"))
+                continue
+            result = compare_samples(before, after, alpha)
+            median_before, median_after = result["median_a"], result["median_b"]
+            rows.append(dict(row, test_used=result["test_used"], p_value=result["p_value"],
+                             median_baseline=median_before, median_new=median_after,
+                             relative_change=(median_after - median_before) / median_before))
+
+    report = pd.DataFrame(rows, columns=REPORT_COLUMNS)
+    tested = report["p_value"].notna()
+    report.loc[tested, "p_adjusted"] = adjust_p_values(report.loc[tested, "p_value"].to_numpy(), correction)
+    significant = tested & (report["p_adjusted"] < alpha)
+    report.loc[tested, "status"] = "unchanged"
+    report.loc[significant & (report["relative_change"] > report["threshold"]), "status"] = "regression"
+    report.loc[significant & (report["relative_change"] < -report["threshold"]), "status"] = "improvement"
+    return report
+
+
+def write_reports(report, json_path=None, csv_path=None, settings=None):
+    if csv_path:
+        report.to_csv(csv_path, index=False)
+    if json_path:
+        with open(json_path, "w") as file:
+            json.dump({
+                "settings": settings or {},
+                "regressions": int((report["status"] == "regression").sum()),
+                "results": json.loads(report.to_json(orient="records")),
+            }, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail when a batch of runs regresses against a stored baseline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    save_parser = subparsers.add_parser("baseline", help="store the runs of result folders as a baseline")
+    save_parser.add_argument("folders", nargs="+")
+    save_parser.add_argument("--output", required=True, help="baseline JSON file")
+
+    check_parser = subparsers.add_parser("check", help="compare new runs against a baseline; exit "
+                                                       f"{REGRESSION_EXIT_CODE} on a significant regression and "
+                                                       f"{INCOMPLETE_EXIT_CODE} when a group could not be tested")
+    check_parser.add_argument("baseline", help=f"baseline JSON file, or result folder(s) joined by '{os.pathsep}'")
+    check_parser.add_argument("folders", nargs="+", help="result folders with the new runs")
+    check_parser.add_argument("--energy-threshold", type=float, default=ENERGY_THRESHOLD,
+                              help="relative median energy increase that counts as a regression")
+    check_parser.add_argument("--time-threshold", type=float, default=TIME_THRESHOLD,
+                              help="relative median time increase that counts as a regression")
+    check_parser.add_argument("--metrics", nargs="+", choices=["energy", "time"], default=["energy", "time"])
+    check_parser.add_argument("--alpha", type=float, default=0.05)
+    check_parser.add_argument("--correction", choices=CORRECTIONS, default="holm")
+    check_parser.add_argument("--allow-missing", action="store_true",
+                              help="pass although baseline groups are missing, insufficient or incomparable")
+    check_parser.add_argument("--json", help="write the report to this JSON file")
+    check_parser.add_argument("--csv", help="write the report to this CSV file")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "baseline":
+            baseline = save_baseline(args.folders, args.output)
+            print(f"Stored {len(baseline['groups'])} groups in {args.output}")
+            sys.exit(0)
+        baseline = load_baseline(args.baseline)
+        new = group_metrics(load_folders(args.folders))
+    except ValueError as error:
+        sys.exit(f"Error: {error}")
+
+    thresholds = {"energy": args.energy_threshold, "time": args.time_threshold}
+    thresholds = {metric: thresholds[metric] for metric in args.metrics}
+    report = check_regressions(baseline, new, thresholds, args.alpha, args.correction)
+    write_reports(report, args.json, args.csv, settings={
+        "baseline": args.baseline, "folders": args.folders, "thresholds": thresholds,
+        "alpha": args.alpha, "correction": args.correction})
+
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_rows", None)
+    print(report[["benchmark", "version", "mode", "metric", "status", "n_baseline", "n_new", "p_adjusted",
+                  "relative_change"]].to_string(index=False, float_format=lambda value: f"{value:.4g}"))
+    regressions = report[report["status"] == "regression"]
+    if not regressions.empty:
+        print(f"{len(regressions)} significant regression(s)")
+        sys.exit(REGRESSION_EXIT_CODE)
+    incomplete = report[report["status"].isin(INCOMPLETE_STATUSES)]
+    if not incomplete.empty and not args.allow_missing:
+        print(f"No significant regressions, but {len(incomplete)} group metric(s) could not be tested "
+              "(--allow-missing to pass anyway)")
+        sys.exit(INCOMPLETE_EXIT_CODE)
+    print("No significant regressions")
@@ -0,0 +1,317 @@
+import glob
+import json
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from trace_reader import glitch_warning, reduce_trace
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+# Default location of the catalog database (one database for all result folders); RUN_CATALOG
+# points elsewhere, e.g. so synthetic benchmark campaigns do not mix with the real catalog
+CATALOG_PATH = Path(os.environ.get("RUN_CATALOG", PROJECT_ROOT / "run_catalog.sqlite"))
+
+# Bump whenever the reduced columns change; an outdated catalog is rebuilt
+CATALOG_VERSION = 5
+
+# Filename patterns produced by scripts/experiment.sh and main.py respectively
+RUN_FILE_PATTERNS = [
+    re.compile(r"^energy_(?P<benchmark>.+\.py)_(?P<version>python\d+\.\d+)_(?P<mode>[\w\-+]+?)_run(?P<run>\d+)\.csv$"),
+    re.compile(r"^energy_(?P<version>Python\d+\.\d+)_run(?P<run>\d+)\.csv$"),
+]
+
+# Optional per-run side-car files written next to the CSV, by filename prefix and extension
+SIDECAR_PREFIXES = {
+    "worker": ("worker_", ".json"),    # benchmark_worker.py report
+    "memory": ("memory_", ".jsonl"),   # memory_probe.py log of a relaunched script
+}
+
+SUMMARY_PATTERN = re.compile(r"Energy consumption in joules: ([\d.]+) for (\d+\.\d+) sec of execution")
+
+RUN_COLUMNS = [
+    "csv_path", "folder", "benchmark", "version", "mode", "run",
+    "csv_mtime", "csv_size", "summary_path", "summary_mtime", "summary_size",
+    "samples", "start_time", "end_time", "wraparounds", "counter_glitches",
+    "package_energy", "avg_system_power", "system_energy", "summary_energy", "duration",
+    "sidecar_stamp", "iterations", "work_time", "iteration_time", "startup_time", "workload_size",
+    "used_memory_peak", "used_memory_increase",
+    "peak_rss", "tracemalloc_peak", "allocated_blocks", "gc_collections",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    csv_path TEXT NOT NULL UNIQUE,
+    folder TEXT NOT NULL,
+    benchmark TEXT NOT NULL,
+    version TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    run INTEGER NOT NULL,
+    csv_mtime REAL, csv_size INTEGER,
+    summary_path TEXT, summary_mtime REAL, summary_size INTEGER,
+    samples INTEGER, start_time REAL, end_time REAL, wraparounds INTEGER, counter_glitches INTEGER,
+    package_energy REAL, avg_system_power REAL, system_energy REAL, summary_energy REAL, duration REAL,
+    sidecar_stamp TEXT, iterations INTEGER, work_time REAL, iteration_time REAL, startup_time REAL,
+    workload_size INTEGER,
+    used_memory_peak REAL, used_memory_increase REAL,
+    peak_rss INTEGER, tracemalloc_peak INTEGER, allocated_blocks INTEGER, gc_collections INTEGER,
+    PRIMARY KEY (folder, benchmark, version, mode, run)
+);
+"""
+
+
+def parse_run_filename(file_name):
+    """Extract benchmark, version, mode and run number from a result CSV filename."""
+    for pattern in RUN_FILE_PATTERNS:
+        match = pattern.match(file_name)
+        if match:
+            fields = match.groupdict()
+            return {
+                # main.py results do not encode the benchmark; it always runs benchmark.py
+                "benchmark": fields.get("benchmark") or "benchmark.py",
+                "version": fields["version"].lower().replace("python", ""),
+                "mode": fields.get("mode") or "normal",
+                "run": int(fields["run"]),
+            }
+    return None
+
+
+def summary_path_for(csv_path):
+    """Return the EnergiBridge --summary text file belonging to a result CSV."""
+    folder, name = os.path.split(csv_path)
+    return os.path.join(folder, "energybridge_output_" + name[len("energy_"):-len(".csv")] + ".txt")
+
+
+def sidecar_paths_for(csv_path):
+    """Return the side-car files of a result CSV that exist, by kind."""
+    folder, name = os.path.split(csv_path)
+    stem = name[len("energy_"):-len(".csv")]
+    paths = {kind: os.path.join(folder, prefix + stem + extension)
+             for kind, (prefix, extension) in SIDECAR_PREFIXES.items()}
+    return {kind: path for kind, path in paths.items() if os.path.exists(path)}
+
+
+def read_worker_report(report_file):
+    """Reduce a benchmark_worker.py report to the work done and memory used during the run."""
+    with open(report_file, "r") as file:
+        report = json.load(file)
+    memory = report.get("memory") or {}
+    return {
+        "peak_rss": memory.get("peak_rss"),
+        "tracemalloc_peak": memory.get("tracemalloc_peak"),
+        "allocated_blocks": memory.get("allocated_blocks"),
+        "gc_collections": memory.get("gc_collections"),
+        "iterations": report["iterations"],
+        "work_time": report["work_time"],
+        "iteration_time": report["iteration_time"]["mean"],
+        "startup_time": report.get("startup_time"),
+        "workload_size": report.get("size"),
+    }
+
+
+def read_summary(summary_file):
+    """Return (energy in J, execution time in s) from an EnergiBridge summary file."""
+    with open(summary_file, "r") as file:
+        match = SUMMARY_PATTERN.search(file.read())
+    if not match:
+        return None, None
+    return float(match.group(1)), float(match.group(2))
+
+
+def read_memory_log(log_file):
+    """Memory use of a run whose script was relaunched under memory_probe.py, over all launches.
+
+    Peaks and retained blocks are the largest of any launch; GC collections are
+    summed, as a worker report counts them over all its iterations.
+    """
+    with open(log_file, "r") as file:
+        launches = [json.loads(line) for line in file if line.strip()]
+
+    def values(key):
+        return [launch[key] for launch in launches if launch.get(key) is not None]
+
+    return {
+        "peak_rss": max(values("peak_rss"), default=None),
+        "tracemalloc_peak": max(values("tracemalloc_peak"), default=None),
+        "allocated_blocks": max(values("allocated_blocks"), default=None),
+        "gc_collections": sum(values("gc_collections")) if values("gc_collections") else None,
+    }
+
+
+def reduce_run(csv_path, summary_path=None, sidecars=None):
+    """Reduce a single EnergiBridge trace (and optional summary and side-cars) to one catalog row."""
+    # Streamed in chunks; package energy is corrected for RAPL counter wraparound
+    trace = reduce_trace(csv_path)
+    row = {column: trace[column] for column in
+           ("samples", "start_time", "end_time", "wraparounds", "counter_glitches", "package_energy",
+            "avg_system_power", "system_energy", "used_memory_peak", "used_memory_increase")}
+    row.update({
+        "summary_energy": None,
+        "duration": None,
+        "iterations": None,
+        "work_time": None,
+        "iteration_time": None,
+        "startup_time": None,
+        "workload_size": None,
+        "peak_rss": None,
+        "tracemalloc_peak": None,
+        "allocated_blocks": None,
+        "gc_collections": None,
+    })
+    if summary_path:
+        row["summary_energy"], row["duration"] = read_summary(summary_path)
+    sidecars = sidecars or {}
+    if "worker" in sidecars:
+        row.update(read_worker_report(sidecars["worker"]))
+    elif "memory" in sidecars:
+        row.update(read_memory_log(sidecars["memory"]))
+    return row
+
+
+def _reduce_job(job):
+    csv_path, summary_path, sidecars = job
+    try:
+        return reduce_run(csv_path, summary_path, sidecars), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime, stat.st_size
+
+
+def connect(catalog_path=CATALOG_PATH):
+    """Open the catalog, (re)creating the schema if it is missing or outdated."""
+    conn = sqlite3.connect(str(catalog_path))
+    conn.row_factory = sqlite3.Row
+    if conn.execute("PRAGMA user_version").fetchone()[0] != CATALOG_VERSION:
+        conn.execute("DROP TABLE IF EXISTS runs")
+        conn.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def sync_folder(conn, folder_path, workers=None):
+    """Ingest new or changed runs of a result folder and drop runs whose files vanished.
+
+    A run is re-parsed only when the mtime or size of its CSV or summary file changed.
+    Returns the number of runs that were (re)parsed.
+    """
+    folder = str(Path(folder_path).resolve())
+    known = {
+        row["csv_path"]: row
+        for row in conn.execute("SELECT * FROM runs WHERE folder = ?", (folder,))
+    }
+
+    jobs = []
+    seen = set()
+    for csv_path in sorted(glob.glob(os.path.join(folder, "*.csv"))):
+        meta = parse_run_filename(os.path.basename(csv_path))
+        if meta is None:
+            print(f"Warning: Could not parse CSV filename pattern: {os.path.basename(csv_path)}")
+            continue
+        seen.add(csv_path)
+
+        summary_path = summary_path_for(csv_path)
+        if not os.path.exists(summary_path):
+            summary_path = None
+        csv_mtime, csv_size = _file_stamp(csv_path)
+        summary_mtime, summary_size = _file_stamp(summary_path) if summary_path else (None, None)
+        sidecars = sidecar_paths_for(csv_path)
+        sidecar_stamp = json.dumps({kind: _file_stamp(path) for kind, path in sorted(sidecars.items())})
+
+        row = known.get(csv_path)
+        if (row is not None and row["csv_mtime"] == csv_mtime and row["csv_size"] == csv_size
+                and row["summary_path"] == summary_path
+                and row["summary_mtime"] == summary_mtime and row["summary_size"] == summary_size
+                and row["sidecar_stamp"] == sidecar_stamp):
+            continue
+
+        meta.update({
+            "csv_path": csv_path, "folder": folder,
+            "csv_mtime": csv_mtime, "csv_size": csv_size,
+            "summary_path": summary_path, "summary_mtime": summary_mtime, "summary_size": summary_size,
+            "sidecars": sidecars, "sidecar_stamp": sidecar_stamp,
+        })
+        jobs.append(meta)
+
+    stale = [path for path in known if path not in seen]
+    if stale:
+        conn.executemany("DELETE FROM runs WHERE csv_path = ?", [(path,) for path in stale])
+
+    if jobs:
+        work = [(job["csv_path"], job["summary_path"], job["sidecars"]) for job in jobs]
+        if len(jobs) > 1 and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                reduced = list(executor.map(_reduce_job, work, chunksize=max(1, len(work) // 64)))
+        else:
+            reduced = [_reduce_job(job) for job in work]
+
+        rows = []
+        for job, (row, error) in zip(jobs, reduced):
+            if error is not None:
+                print(f"Error reading {job['csv_path']}: {error}")
+                continue
+            if row["counter_glitches"]:
+                print(glitch_warning(job["csv_path"], row["counter_glitches"]))
+            job.update(row)
+            rows.append(tuple(job[column] for column in RUN_COLUMNS))
+
+        placeholders = ", ".join("?" for _ in RUN_COLUMNS)
+        conn.executemany(
+            f"INSERT OR REPLACE INTO runs ({', '.join(RUN_COLUMNS)}) VALUES ({placeholders})", rows
+        )
+    conn.commit()
+    return len(jobs)
+
+
+def load_runs(folder_path, catalog_path=CATALOG_PATH, workers=None, **filters):
+    """Sync a result folder and return its runs as a DataFrame.
+
+    Keyword filters (benchmark, version, mode, run) restrict the returned rows.
+    """
+    conn = connect(catalog_path)
+    try:
+        sync_folder(conn, folder_path, workers=workers)
+        query = "SELECT * FROM runs WHERE folder = ?"
+        params = [str(Path(folder_path).resolve())]
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if column not in ("benchmark", "version", "mode", "run"):
+                raise ValueError(f"Unknown catalog filter: {column}")
+            query += f" AND {column} = ?"
+            params.append(value)
+        return pd.read_sql_query(query + " ORDER BY benchmark, version, mode, run", conn, params=params)
+    finally:
+        conn.close()
+
+
+def run_energy(runs):
+    """Energy (J) per catalog row: RAPL package energy, or average system power x duration (macOS)."""
+    package_energy = runs["package_energy"].astype(float)
+    return package_energy.fillna(runs["avg_system_power"].astype(float) * runs["duration"].astype(float))
+
+
+def run_energy_per_iteration(runs):
+    """Energy (J) per workload iteration for runs recorded with benchmark_worker.py (NaN otherwise)."""
+    return run_energy(runs) / runs["iterations"].astype(float)
+
+
+if __name__ == "__main__":
+    import sys
+
+    folders = sys.argv[1:] or [PROJECT_ROOT / "results" / "Python3.11", PROJECT_ROOT / "results" / "Python3.14",
+                               PROJECT_ROOT / "energy_results" / "python3.11_runs",
+                               PROJECT_ROOT / "energy_results" / "python3.14_runs"]
+    conn = connect()
+    for folder in folders:
+        if os.path.isdir(folder):
+            parsed = sync_folder(conn, folder)
+            print(f"{folder}: parsed {parsed} new or changed runs")
+    conn.close()
@@ -2,11 +2,68 @@
 
 # Directories
 BENCHMARK_DIR="benchmarks"
-ENERGIBRIDGE="Energibridge/target/release/energibridge"
+# Override ENERGIBRIDGE (e.g. with energibridge_sim.py) to run without the real meter
+ENERGIBRIDGE="${ENERGIBRIDGE:-Energibridge/target/release/energibridge}"
 RESULTS_DIR="results"
 LOG_FILE="$RESULTS_DIR/execution_logs.txt"
 TOTAL_RUNS=30  
 REST_TIME=60  
+# Set ADAPTIVE_WIDTH (joules) to stop a configuration once the CI on the energy
+# difference between the Python versions is that narrow (TOTAL_RUNS is the budget)
+ADAPTIVE_WIDTH="${ADAPTIVE_WIDTH:-}"
+MIN_RUNS=10
+# adaptive_stopping.py exit code for "keep running" (CONTINUE_EXIT_CODE)
+ADAPTIVE_CONTINUE=3
+# Set WORKER_MODE=1 to load each benchmark once per run (benchmark_worker.py) and
+# repeat its workload for the whole window instead of relaunching the interpreter
+WORKER_MODE="${WORKER_MODE:-0}"
+# Set TRACE_MEMORY=1 to also record the tracemalloc peak of every run; it slows
+# allocation-heavy workloads, so these runs get a "-tracemalloc" label of their own
+TRACE_MEMORY="${TRACE_MEMORY:-0}"
+# Set MEMORY_PROBE=1 to record the memory use of runs outside worker mode (memory_probe.py,
+# implied by TRACE_MEMORY=1); off by default because the probe starts inside the measured window
+MEMORY_PROBE="${MEMORY_PROBE:-$TRACE_MEMORY}"
+# Set PROFILE_SHADOW=1 to follow every measured run with an unmeasured shadow run of the
+# same configuration that records a profile (profile_*.json, see profile_report.py)
+PROFILE_SHADOW="${PROFILE_SHADOW:-0}"
+PROFILE_DURATION="${PROFILE_DURATION:-5}"
+PROFILE_METHOD="${PROFILE_METHOD:-sampling}"
+# Set CALIBRATION_TARGET (seconds) to calibrate every benchmark's problem size to that
+# runtime first; sizes stored in $CALIBRATION_FILE are reused for every run
+CALIBRATION_TARGET="${CALIBRATION_TARGET:-}"
+CALIBRATION_FILE="$RESULTS_DIR/calibration.json"
+# Set MATRIX_KERNEL to one of benchmarks/workloads/matrix.py's kernels (naive, transposed,
+# blocked, flat_array, numpy, ...); it is recorded in the result filenames
+export MATRIX_KERNEL="${MATRIX_KERNEL:-}"
+# Set COLLATZ_STRATEGY to loop, memo or numpy for collatz_range_benchmark.py
+export COLLATZ_STRATEGY="${COLLATZ_STRATEGY:-}"
+# Set PARALLEL_EXECUTOR to thread or process (and PARALLEL_WORKERS, default all cores) to
+# split the matrix and Collatz range workloads across workers; e.g. thread with MODES=freethreaded
+export PARALLEL_EXECUTOR="${PARALLEL_EXECUTOR:-}"
+export PARALLEL_WORKERS="${PARALLEL_WORKERS:-}"
+# Set SWEEP_STEPS to run every benchmark at that many geometrically spaced problem sizes
+# (ranges in size_sweep.py); sweeps use WORKER_MODE so energy per iteration is known
+SWEEP_STEPS="${SWEEP_STEPS:-}"
+if [[ -n "$SWEEP_STEPS" ]]; then
+    WORKER_MODE=1
+fi
+# Schedule and status of every run (campaign_manifest.py); an interrupted campaign resumes
+# from it with the same settings, re-running interrupted or corrupted runs. Set
+# FRESH_CAMPAIGN=1 to discard it; CAMPAIGN_SEED fixes the randomized run order
+MANIFEST="$RESULTS_DIR/campaign_manifest.json"
+CAMPAIGN_SEED="${CAMPAIGN_SEED:-42}"
+FRESH_CAMPAIGN="${FRESH_CAMPAIGN:-0}"
+# Set PIN_CPUS=1 to pin this script, EnergiBridge and the benchmark to disjoint physical cores
+# (cpu_affinity.py, Linux taskset); the placement and the workload cores' frequencies are
+# recorded in placement_*.json
+PIN_CPUS="${PIN_CPUS:-0}"
+# Runs are never measured concurrently on separate core groups: EnergiBridge measures the
+# whole package, so every run would record the other groups' energy as its own
+PIN_GROUPS="${PIN_GROUPS:-1}"
+if [[ "$PIN_GROUPS" -gt 1 ]]; then
+    echo "Error: PIN_GROUPS=$PIN_GROUPS is not supported; package energy cannot be split between concurrent runs"
+    exit 1
+fi
 
 mkdir -p "$RESULTS_DIR/Python3.11"
 mkdir -p "$RESULTS_DIR/Python3.14"
@@ -23,11 +80,44 @@ echo "   Ensure stable room temperature."
 echo "   If possible, disable network access for consistency."
 sleep 5  
 
-echo "Warming up CPU for 1 minute..."
-end_time=$(( $(date +%s) + 60 ))
-while [ "$(date +%s)" -lt "$end_time" ]; do
-    python3 -c "x = [i*i for i in range(10**6)]"
-done
+# CPU sets of the orchestrator (this script and its helpers), EnergiBridge and the benchmark;
+# placed before warm-up and calibration, which then run on the benchmark's cores (as main.py)
+ORCHESTRATOR_CPUS=""
+METER_CPUS=""
+WORKLOAD_CPUS=""
+if [[ "$PIN_CPUS" == "1" ]]; then
+    if ! command -v taskset >/dev/null 2>&1; then
+        echo "Warning: taskset not found; processes are not pinned"
+    else
+        placement=($(python3 cpu_affinity.py plan))
+        if [[ ${#placement[@]} -ge 3 ]]; then
+            ORCHESTRATOR_CPUS=${placement[0]}
+            METER_CPUS=${placement[1]}
+            WORKLOAD_CPUS=${placement[2]}
+            taskset -cp "$ORCHESTRATOR_CPUS" $$ >/dev/null
+            echo "📌 Orchestrator on CPUs $ORCHESTRATOR_CPUS, EnergiBridge on $METER_CPUS, benchmark on $WORKLOAD_CPUS"
+        fi
+    fi
+fi
+
+warmup_pin=()
+[[ -n "$WORKLOAD_CPUS" ]] && warmup_pin=(taskset -c "$WORKLOAD_CPUS")
+cpu_args=()
+[[ -n "$WORKLOAD_CPUS" ]] && cpu_args=(--cpus "$WORKLOAD_CPUS")
+
+# Set FIXED_SLEEPS=1 to always warm up for 1 minute and rest REST_TIME seconds
+FIXED_SLEEPS="${FIXED_SLEEPS:-0}"
+
+if [[ "$FIXED_SLEEPS" == "1" ]]; then
+    echo "Warming up CPU for 1 minute..."
+    end_time=$(( $(date +%s) + 60 ))
+    while [ "$(date +%s)" -lt "$end_time" ]; do
+        "${warmup_pin[@]}" python3 -c "x = [i*i for i in range(10**6)]"
+    done
+else
+    echo "Warming up CPU on all ${WORKLOAD_CPUS:+benchmark }cores until power, frequency and temperature are stable (at most 1 minute)..."
+    python3 steady_state.py warmup --workers all "${cpu_args[@]}" --max-duration 60 --energibridge sudo "$ENERGIBRIDGE"
+fi
 echo "Warm-up complete!"
 
 if [[ ! -d "$BENCHMARK_DIR" ]]; then
@@ -37,14 +127,66 @@ fi
 
 BENCHMARK_SCRIPTS=($(ls "$BENCHMARK_DIR"/*.py 2>/dev/null))
 PYTHON_VERSIONS=("python3.11" "python3.14")
-MODES=("normal" "optimized")
+# Runtime configurations from config_matrix.py; combine with "+", e.g.
+# MODES="normal optimized jit freethreaded gc-disabled optimized+mimalloc"
+MODES=(${MODES:-normal optimized})
 
+# Refuse modes an interpreter cannot run (jit or mimalloc on 3.11, freethreaded without a python3.Xt build)
+for pyversion in "${PYTHON_VERSIONS[@]}"; do
+    python3 config_matrix.py check "$pyversion" "${MODES[@]}" || exit 1
+done
+
+if [[ -n "$CALIBRATION_TARGET" && "$FRESH_CAMPAIGN" != "1" ]] && python3 campaign_manifest.py unfinished "$MANIFEST"; then
+    # Runs of an interrupted campaign keep the sizes its finished runs were measured with
+    echo "Resuming an unfinished campaign; reusing the calibrated sizes in $CALIBRATION_FILE"
+elif [[ -n "$CALIBRATION_TARGET" ]]; then
+    # Calibrate with the first Python version; every version then runs the same problem size
+    echo "Calibrating benchmark sizes to $CALIBRATION_TARGET seconds..."
+    python3 calibration.py run "${BENCHMARK_SCRIPTS[@]}" --python "${PYTHON_VERSIONS[0]}" \
+        --target "$CALIBRATION_TARGET" "${cpu_args[@]}" --output "$CALIBRATION_FILE"
+fi
+
+
+# Label used in result filenames: the mode, plus the matrix kernel / Collatz strategy and
+# the parallel executor (e.g. normal-blocked-thread8) when set
+mode_label() {
+    local mode=$1
+    local script_name=$2
+    local sweep_size=$3
+    local label="$mode"
+    if [[ -n "$MATRIX_KERNEL" && "$script_name" == *matrix* ]]; then
+        label="${label}-${MATRIX_KERNEL}"
+    elif [[ -n "$COLLATZ_STRATEGY" && "$script_name" == collatz_range* ]]; then
+        label="${label}-${COLLATZ_STRATEGY}"
+    fi
+    if [[ -n "$PARALLEL_EXECUTOR" && ( "$script_name" == *matrix* || "$script_name" == collatz_range* ) ]]; then
+        label="${label}-${PARALLEL_EXECUTOR}${PARALLEL_WORKERS:-$(nproc 2>/dev/null || sysctl -n hw.ncpu)}"
+    fi
+    if [[ "$TRACE_MEMORY" == "1" ]]; then
+        label="${label}-tracemalloc"
+    fi
+    if [[ -n "$sweep_size" ]]; then
+        label="${label}-n${sweep_size}"
+    fi
+    echo "$label"
+}
+
+# Problem sizes of a benchmark's sweep (nothing without SWEEP_STEPS); callers loop over
+# "${sizes[@]:-}", which is a single empty (default) size when the list is empty
+sizes_for() {
+    local script=$1
+    if [[ -n "$SWEEP_STEPS" ]]; then
+        python3 size_sweep.py "$script" --steps "$SWEEP_STEPS"
+    fi
+}
 
 run_experiment() {
     local pyversion=$1
     local mode=$2
     local script=$3
     local run=$4
+    local sweep_size=$5
+    local run_id=$6
 
     if [[ ! -f "$script" ]]; then
         echo "Error: Script $script not found!"
@@ -52,22 +194,43 @@ run_experiment() {
     fi
 
     script_name=$(basename "$script")  
+    local label
+    label=$(mode_label "$mode" "$script_name" "$sweep_size")
 
    
     local output_dir="${RESULTS_DIR}/${pyversion}"
     mkdir -p "$output_dir"
 
    
-    local result_file="${output_dir}/energy_${script_name}_${pyversion}_${mode}_run${run}.csv"
-    local summary_file="${output_dir}/energybridge_output_${script_name}_${pyversion}_${mode}_run${run}.txt"
+    local result_file="${output_dir}/energy_${script_name}_${pyversion}_${label}_run${run}.csv"
+    local summary_file="${output_dir}/energybridge_output_${script_name}_${pyversion}_${label}_run${run}.txt"
+    local worker_file="${output_dir}/worker_${script_name}_${pyversion}_${label}_run${run}.json"
+    # Phase markers (benchmarks/workloads/phases.py) are appended by every launch of the run
+    local phase_file="${output_dir}/phases_${script_name}_${pyversion}_${label}_run${run}.jsonl"
+    rm -f "$phase_file"
+    # Memory use of every launch outside worker mode (MEMORY_PROBE=1), one JSON line each
+    local memory_file="${output_dir}/memory_${script_name}_${pyversion}_${label}_run${run}.jsonl"
+    rm -f "$memory_file"
+    local launcher=()
+    [[ "$MEMORY_PROBE" == "1" ]] && launcher=(memory_probe.py "$memory_file")
 
     echo "▶️ Running $script_name with $pyversion ($mode mode) - Run $run..."
 
-    # Determine python command
-    if [[ "$mode" == "optimized" ]]; then
-        python_cmd="env PYTHONOPTIMIZE=2 $pyversion"
-    else
-        python_cmd="$pyversion"
+    # Calibrated problem size (empty when the benchmark was never calibrated)
+    local size
+    size=$(python3 calibration.py lookup "$CALIBRATION_FILE" "$script" 2>/dev/null)
+    [[ -n "$sweep_size" ]] && size="$sweep_size"
+    local size_args=()
+    [[ -n "$size" ]] && size_args=(--size "$size")
+    local memory_args=()
+    [[ "$TRACE_MEMORY" == "1" ]] && memory_args=(--trace-memory)
+    [[ "$MEMORY_PROBE" == "1" ]] && launcher+=("${memory_args[@]}")
+
+    # Determine python command (environment and interpreter build for the mode)
+    python_cmd=$(python3 config_matrix.py command "$mode" "$pyversion")
+    if [[ -z "$python_cmd" ]]; then
+        echo "Error: Unknown mode $mode"
+        return
     fi
 
     
@@ -77,36 +240,159 @@ run_experiment() {
     fi
 
     
-    sudo "$ENERGIBRIDGE" -o "$result_file" --summary sleep 20 > "$summary_file" 2>&1 &
+    # Pinned runs start EnergiBridge and the benchmark on their own cores via taskset
+    local meter_pin=()
+    local workload_pin=()
+    local placement_file="${output_dir}/placement_${script_name}_${pyversion}_${label}_run${run}.json"
+    if [[ -n "$METER_CPUS" ]]; then
+        meter_pin=(taskset -c "$METER_CPUS")
+        workload_pin=(taskset -c "$WORKLOAD_CPUS")
+        python3 cpu_affinity.py record "$placement_file" --orchestrator "$ORCHESTRATOR_CPUS" --meter "$METER_CPUS" \
+            --workload "$WORKLOAD_CPUS"
+    fi
+
+    python3 campaign_manifest.py start "$MANIFEST" "$run_id"
+    sudo "${meter_pin[@]}" "$ENERGIBRIDGE" -o "$result_file" --summary sleep 20 > "$summary_file" 2>&1 &
     ENERGY_PID=$!
     sleep 1
 
     
-    local end_time=$(( $(date +%s) + 20 ))
-    while [ "$(date +%s)" -lt "$end_time" ]; do
-        $python_cmd "$script" >/dev/null
-    done
+    # A benchmark that fails leaves the meter sampling an idle machine; such runs are marked failed
+    local benchmark_status=0
+    if [[ "$WORKER_MODE" == "1" ]]; then
+        BENCHMARK_LAUNCH_TIME=$(date +%s.%N) BENCHMARK_PHASE_FILE="$phase_file" "${workload_pin[@]}" $python_cmd benchmark_worker.py "$script" "${size_args[@]}" \
+            "${memory_args[@]}" --duration 19 --report "$worker_file" >/dev/null
+        benchmark_status=$?
+    else
+        local end_time=$(( $(date +%s) + 20 ))
+        while [ "$(date +%s)" -lt "$end_time" ]; do
+            BENCHMARK_PHASE_FILE="$phase_file" "${workload_pin[@]}" $python_cmd "${launcher[@]}" "$script" \
+                $size >/dev/null
+            benchmark_status=$?
+            [[ $benchmark_status -ne 0 ]] && break
+        done
+    fi
 
     wait "$ENERGY_PID"
+    [[ -n "$METER_CPUS" ]] && python3 cpu_affinity.py end "$placement_file"
 
-   
-    echo "⏸ Resting for $REST_TIME seconds..."
-    sleep "$REST_TIME"
+    # Only runs with valid output files are done; the others are re-queued on resume
+    local manifest_files=(--file csv "$result_file" --file summary "$summary_file")
+    [[ "$WORKER_MODE" == "1" ]] && manifest_files+=(--file worker "$worker_file")
+    [[ $benchmark_status -ne 0 ]] && manifest_files+=(--problem "benchmark exited with code $benchmark_status")
+    python3 campaign_manifest.py finish "$MANIFEST" "$run_id" "${manifest_files[@]}"
+
+    # Profiling perturbs the measurement, so it only runs in a shadow run before the rest period
+    if [[ "$PROFILE_SHADOW" == "1" ]]; then
+        local profile_file="${output_dir}/profile_${script_name}_${pyversion}_${label}_run${run}.json"
+        "${workload_pin[@]}" $python_cmd benchmark_worker.py "$script" "${size_args[@]}" --duration "$PROFILE_DURATION" \
+            --profile "$profile_file" --profile-method "$PROFILE_METHOD" >/dev/null \
+            || echo "Warning: profiling shadow run failed"
+    fi
+
+    # Refresh the running statistics (live_summary.json) with the finished run
+    python3 live_stats.py >/dev/null 2>&1 || echo "Warning: could not refresh live statistics"
 }
 
-for pyversion in "${PYTHON_VERSIONS[@]}"; do
+# Cooldown after a run; callers run their own helpers (statistics, stopping check) first,
+# so the rest absorbs their load before the next measurement
+rest_after_run() {
+    if [[ "$FIXED_SLEEPS" == "1" ]]; then
+        echo "⏸ Resting for $REST_TIME seconds..."
+        sleep "$REST_TIME"
+    else
+        echo "⏸ Resting until readings are stable (at most $REST_TIME seconds)..."
+        python3 steady_state.py cooldown --max-duration "$REST_TIME" --energibridge sudo "$ENERGIBRIDGE"
+    fi
+}
+
+# Manifest identifier of a run (campaign_manifest.run_id)
+run_id() {
+    local pyversion=$1
+    local mode=$2
+    local script=$3
+    local run=$4
+    local sweep_size=$5
+    echo "${pyversion}:${mode}:$(basename "$script"):${sweep_size}:run${run}"
+}
+
+# Print the arguments after the seed in a shuffled order that only depends on the seed
+# (Python's random, as main.py; sort -R and shuf are unseeded or missing on macOS)
+seeded_shuffle() {
+    python3 -c 'import random, sys; items = sys.argv[2:]; random.Random(sys.argv[1]).shuffle(items); print(*items, sep="\n")' "$@"
+}
+
+run_adaptive() {
+    local mode=$1
+    local script=$2
+    local sweep_size=$3
+
+    for run in $(seq 1 $TOTAL_RUNS); do
+        local measured=0
+        # Every round runs each Python version once, in an order seeded by the campaign seed and
+        # the round, so a resumed or replayed campaign repeats the same schedule
+        for pyversion in $(seeded_shuffle "$CAMPAIGN_SEED:$mode:$script:$sweep_size:$run" "${PYTHON_VERSIONS[@]}"); do
+            local id
+            id=$(run_id "$pyversion" "$mode" "$script" "$run" "$sweep_size")
+            if python3 campaign_manifest.py check "$MANIFEST" "$id"; then
+                echo "⏭ $id already done"
+                continue
+            fi
+            # The round's last run rests only after the stopping check below
+            [[ $measured -eq 1 ]] && rest_after_run
+            run_experiment "$pyversion" "$mode" "$script" "$run" "$sweep_size" "$id"
+            measured=1
+        done
+
+        # Exit code 0 stops, ADAPTIVE_CONTINUE keeps going; anything else is a failed check
+        python3 adaptive_stopping.py "$RESULTS_DIR/${PYTHON_VERSIONS[0]}" "$RESULTS_DIR/${PYTHON_VERSIONS[1]}" \
+            --benchmark "$(basename "$script")" --mode "$(mode_label "$mode" "$(basename "$script")" "$sweep_size")" \
+            --target-width "$ADAPTIVE_WIDTH" --min-runs "$MIN_RUNS" --max-runs "$TOTAL_RUNS"
+        local status=$?
+        [[ $measured -eq 1 ]] && rest_after_run
+        if [[ $status -eq 0 ]]; then
+            break
+        elif [[ $status -ne $ADAPTIVE_CONTINUE ]]; then
+            echo "Warning: adaptive stopping check failed (exit code $status); stopping this configuration"
+            break
+        fi
+    done
+}
+
+# Create the manifest, or resume it when it belongs to a campaign with the same settings
+fresh_args=()
+if [[ "$FRESH_CAMPAIGN" == "1" ]]; then
+    fresh_args=(--fresh)
+    # Results of the replaced campaign would otherwise flow into the analysis of the new one
+    python3 campaign_manifest.py archive "$MANIFEST" "${PYTHON_VERSIONS[@]/#/$RESULTS_DIR/}" || exit 1
+fi
+python3 campaign_manifest.py plan "$MANIFEST" --versions "${PYTHON_VERSIONS[@]}" --modes "${MODES[@]}" \
+    --scripts "${BENCHMARK_SCRIPTS[@]}" --runs "$TOTAL_RUNS" ${SWEEP_STEPS:+--sweep-steps "$SWEEP_STEPS"} \
+    --seed "$CAMPAIGN_SEED" "${fresh_args[@]}" \
+    --config "ADAPTIVE_WIDTH=$ADAPTIVE_WIDTH" "WORKER_MODE=$WORKER_MODE" "TRACE_MEMORY=$TRACE_MEMORY" "MEMORY_PROBE=$MEMORY_PROBE" \
+    "MATRIX_KERNEL=$MATRIX_KERNEL" "COLLATZ_STRATEGY=$COLLATZ_STRATEGY" "PARALLEL_EXECUTOR=$PARALLEL_EXECUTOR" \
+    "PARALLEL_WORKERS=$PARALLEL_WORKERS" "PIN_CPUS=$PIN_CPUS" "PIN_GROUPS=$PIN_GROUPS" \
+    "CALIBRATION_TARGET=$CALIBRATION_TARGET" || exit 1
+
+if [[ -n "$ADAPTIVE_WIDTH" ]]; then
     for mode in "${MODES[@]}"; do
         for script in "${BENCHMARK_SCRIPTS[@]}"; do
-            
-            # Generate a **shuffled** list of unique run numbers
-            run_numbers=($(seq 1 $TOTAL_RUNS | sort -R))
-
-            # Execute the shuffled 30 runs **without duplicates**
-            for run in "${run_numbers[@]}"; do
-                run_experiment "$pyversion" "$mode" "$script" "$run"
+            sizes=($(sizes_for "$script"))
+            for size in "${sizes[@]:-}"; do
+                run_adaptive "$mode" "$script" "$size"
             done
         done
     done
-done
+else
+    # The remaining runs in the manifest's seeded order: per version, mode, script and sweep
+    # size, the 30 run numbers shuffled without duplicates (fd 3 keeps stdin free for the runs)
+    while IFS=$'\t' read -r -u 3 id pyversion mode script run size; do
+        run_experiment "$pyversion" "$mode" "$script" "$run" "$size" "$id"
+        rest_after_run
+    done 3< <(python3 campaign_manifest.py pending "$MANIFEST")
+fi
 
+# Runs left pending (failed runs retried on resume) keep the campaign unfinished
+python3 campaign_manifest.py complete "$MANIFEST" ${ADAPTIVE_WIDTH:+--stopped}
+python3 campaign_manifest.py status "$MANIFEST"
 echo "All runs complete! Results saved in $RESULTS_DIR"
@@ -0,0 +1,57 @@
+import argparse
+import os
+import re
+
+# Default size range swept per benchmark (smallest, largest problem size)
+SWEEP_RANGES = {
+    "matrix_benchmark.py": (32, 512),
+    "benchmark.py": (32, 512),
+    "collatz_range_benchmark.py": (10**4, 10**6),
+    "collatz_benchmark.py": (10**3, 10**5),
+}
+
+# Number of sizes per sweep, spaced geometrically between the range bounds
+SWEEP_STEPS = 5
+
+# Suffix that experiment.sh appends to the mode label of sweep runs, e.g. normal-n256
+SIZE_SUFFIX = re.compile(r"^(?P<mode>.+)-n(?P<size>\d+)$")
+
+
+def geometric_sizes(low, high, steps=SWEEP_STEPS):
+    """`steps` integer sizes from low to high with a constant ratio between neighbours."""
+    if steps < 2 or low == high:
+        return [int(low)]
+    ratio = (high / low) ** (1 / (steps - 1))
+    return sorted({int(round(low * ratio ** i)) for i in range(steps)})
+
+
+def sweep_sizes(script, steps=SWEEP_STEPS, low=None, high=None):
+    """Sizes to sweep for a benchmark script; explicit bounds override SWEEP_RANGES."""
+    default_low, default_high = SWEEP_RANGES.get(os.path.basename(script), (None, None))
+    low, high = low or default_low, high or default_high
+    if low is None or high is None:
+        raise ValueError(f"No sweep range known for {os.path.basename(script)}; pass --min and --max")
+    return geometric_sizes(low, high, steps)
+
+
+def size_label(mode, size):
+    return f"{mode}-n{size}"
+
+
+def split_size_label(mode):
+    """(mode without the size suffix, size) for a sweep label, or (mode, None) for other runs."""
+    match = SIZE_SUFFIX.match(mode)
+    if not match:
+        return mode, None
+    return match.group("mode"), int(match.group("size"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the problem sizes of a benchmark size sweep.")
+    parser.add_argument("script")
+    parser.add_argument("--steps", type=int, default=SWEEP_STEPS)
+    parser.add_argument("--min", type=int, help="smallest size (default from SWEEP_RANGES)")
+    parser.add_argument("--max", type=int, help="largest size (default from SWEEP_RANGES)")
+    args = parser.parse_args()
+
+    print(" ".join(str(size) for size in sweep_sizes(args.script, args.steps, args.min, args.max)))
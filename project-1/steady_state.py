@@ -0,0 +1,277 @@
+import argparse
+import csv
+import glob
+import multiprocessing
+import os
+import re
+import subprocess
+import tempfile
+import time
+from collections import deque
+
+from cpu_affinity import parse_cpu_list, pin
+
+# A metric is stable when its range over the window stays within these tolerances
+TOLERANCES = {
+    "power": 0.05,        # relative (5% of the window mean)
+    "frequency": 0.05,    # relative
+    "temperature": 1.0,   # absolute, degrees Celsius
+}
+
+# Number of consecutive samples that must be stable, and seconds between samples
+WINDOW = 10
+INTERVAL = 1.0
+
+
+def package_rapl_files():
+    """RAPL energy counters of the CPU packages only (intel-rapl:N, not the intel-rapl:N:M subzones).
+
+    The core, uncore and DRAM subzones are already part of their package's counter.
+    """
+    return [path for path in glob.glob("/sys/class/powercap/intel-rapl:[0-9]*/energy_uj")
+            if re.fullmatch(r"intel-rapl:\d+", os.path.basename(os.path.dirname(path)))]
+
+
+class SysfsSampler:
+    """Reads package power (RAPL), CPU frequency and temperature from /sys (Linux)."""
+
+    def __init__(self):
+        self.rapl_files = package_rapl_files()
+        self.freq_files = glob.glob("/sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq")
+        self.temp_files = glob.glob("/sys/class/thermal/thermal_zone[0-9]*/temp")
+        self._last_energy = None
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path) as file:
+                return float(file.read())
+        except (OSError, ValueError):
+            return None
+
+    def available(self):
+        """True when package power can be read; RAPL energy_uj is often readable by root only."""
+        return self._readable(self.rapl_files)
+
+    def partially_available(self):
+        """True when only frequency or temperature can be read."""
+        return self._readable(self.freq_files) or self._readable(self.temp_files)
+
+    def _readable(self, files):
+        return any(self._read(path) is not None for path in files)
+
+    def sample(self):
+        reading = {}
+        energies = [self._read(path) for path in self.rapl_files]
+        if energies and None not in energies:
+            now = time.monotonic()
+            energy = sum(energies) / 1e6
+            if self._last_energy is not None and energy >= self._last_energy[1]:
+                reading["power"] = (energy - self._last_energy[1]) / (now - self._last_energy[0])
+            self._last_energy = (now, energy)
+        freqs = [value for value in map(self._read, self.freq_files) if value is not None]
+        if freqs:
+            reading["frequency"] = sum(freqs) / len(freqs) / 1000  # kHz -> MHz
+        temps = [value for value in map(self._read, self.temp_files) if value is not None]
+        if temps:
+            reading["temperature"] = max(temps) / 1000  # millidegrees -> degrees
+        return reading
+
+    def close(self):
+        pass
+
+
+class EnergiBridgeSampler:
+    """Runs EnergiBridge in the background and reads the latest rows of its CSV output."""
+
+    def __init__(self, energibridge_cmd, max_duration):
+        handle, self.csv_path = tempfile.mkstemp(suffix=".csv", prefix="steady_state_")
+        os.close(handle)
+        # EnergiBridge needs a command to measure; "sleep"/"timeout" just keep it alive
+        keep_alive = ["timeout", str(int(max_duration) + 5)] if os.name == "nt" else ["sleep", str(int(max_duration) + 5)]
+        self.process = subprocess.Popen(list(energibridge_cmd) + ["-o", self.csv_path] + keep_alive,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # The trace is read incrementally: only lines appended since the last sample are parsed
+        self._offset = 0
+        self._header = None
+        self._records = deque(maxlen=5)
+
+    def available(self):
+        return self.process.poll() is None
+
+    def _read_new_rows(self):
+        with open(self.csv_path, "rb") as file:
+            file.seek(self._offset)
+            data = file.read()
+        # Leave a partially written last line for the next call
+        complete = data[:data.rfind(b"\n") + 1]
+        self._offset += len(complete)
+        for row in csv.reader(complete.decode(errors="replace").splitlines()):
+            if self._header is None:
+                self._header = row
+            elif row:
+                self._records.append(dict(zip(self._header, row)))
+
+    def sample(self):
+        try:
+            self._read_new_rows()
+        except OSError:
+            return {}
+        records = list(self._records)
+        if len(records) < 2:
+            return {}
+
+        def values(prefix, record):
+            result = []
+            for column, value in record.items():
+                if column and column.startswith(prefix):
+                    try:
+                        result.append(float(value))
+                    except (TypeError, ValueError):
+                        pass
+            return result
+
+        first, last = records[0], records[-1]
+        reading = {}
+        elapsed = (float(last["Time"]) - float(first["Time"])) / 1000
+        if "PACKAGE_ENERGY (J)" in last and elapsed > 0:
+            reading["power"] = (float(last["PACKAGE_ENERGY (J)"]) - float(first["PACKAGE_ENERGY (J)"])) / elapsed
+        elif "SYSTEM_POWER (Watts)" in last:
+            reading["power"] = float(last["SYSTEM_POWER (Watts)"])
+        freqs = values("CPU_FREQUENCY_", last)
+        if freqs:
+            reading["frequency"] = sum(freqs) / len(freqs)
+        temps = values("CPU_TEMP_", last)
+        if temps:
+            reading["temperature"] = max(temps)
+        return reading
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait()
+        try:
+            os.remove(self.csv_path)
+        except OSError:
+            pass
+
+
+def make_sampler(energibridge_cmd=None, max_duration=300):
+    """A sampler that includes power: /sys on Linux, otherwise EnergiBridge.
+
+    Without either, /sys frequency and temperature alone are used with a warning;
+    returns None when nothing can be read.
+    """
+    sampler = SysfsSampler()
+    if sampler.available():
+        return sampler
+    if energibridge_cmd:
+        return EnergiBridgeSampler(energibridge_cmd, max_duration)
+    if sampler.partially_available():
+        print("Warning: RAPL energy is not readable (root only?); steady state is judged on frequency and "
+              "temperature without power")
+        return sampler
+    return None
+
+
+def is_stable(window, tolerances=TOLERANCES):
+    """True when every metric seen in the window stays within its tolerance."""
+    metrics = set().union(*window)
+    if not metrics:
+        return False
+    for metric in metrics:
+        series = [reading[metric] for reading in window if metric in reading]
+        if len(series) < len(window):
+            return False
+        spread = max(series) - min(series)
+        limit = tolerances.get(metric, 0.05)
+        if metric != "temperature":
+            limit *= abs(sum(series) / len(series))
+        if spread > limit:
+            return False
+    return True
+
+
+def wait_for_steady_state(sampler, min_duration=0, max_duration=60, window=WINDOW, interval=INTERVAL,
+                          tolerances=TOLERANCES):
+    """Sample until readings are stable (after at least min_duration) or max_duration passed.
+
+    Without a sampler this simply waits max_duration, like the fixed sleeps it replaces.
+    Returns (elapsed seconds, True if steady state was reached).
+    """
+    start = time.monotonic()
+    if sampler is None:
+        time.sleep(max_duration)
+        return max_duration, False
+
+    readings = deque(maxlen=window)
+    while True:
+        elapsed = time.monotonic() - start
+        if elapsed >= max_duration:
+            return elapsed, False
+        readings.append(sampler.sample())
+        if elapsed >= min_duration and len(readings) == window and is_stable(readings, tolerances):
+            return elapsed, True
+        time.sleep(interval)
+
+
+def _burn(stop_event):
+    while not stop_event.is_set():
+        [x**2 for x in range(10**6)]  # Generate CPU load
+
+
+def warm_up(sampler, workers=1, min_duration=30, max_duration=300, cpus=None, **kwargs):
+    """Load `workers` cores (on `cpus` when given) until the machine reaches thermal/power equilibrium."""
+    stop_event = multiprocessing.Event()
+    processes = [multiprocessing.Process(target=_burn, args=(stop_event,), daemon=True) for _ in range(workers)]
+    for process in processes:
+        process.start()
+        pin(cpus, process.pid)
+    try:
+        return wait_for_steady_state(sampler, min_duration, max_duration, **kwargs)
+    finally:
+        stop_event.set()
+        for process in processes:
+            process.join()
+
+
+def cool_down(sampler, min_duration=5, max_duration=60, **kwargs):
+    """Rest until idle readings are stable again, at most max_duration seconds."""
+    return wait_for_steady_state(sampler, min_duration, max_duration, **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm up or cool down until power, frequency and temperature are stable.")
+    parser.add_argument("phase", choices=["warmup", "cooldown"])
+    parser.add_argument("--min-duration", type=float, default=None)
+    parser.add_argument("--max-duration", type=float, default=None)
+    parser.add_argument("--workers", default="1", help="warm-up processes, or 'all' for one per core")
+    parser.add_argument("--cpus", help="CPU list the warm-up processes are pinned to, e.g. 2-5 (Linux)")
+    parser.add_argument("--energibridge", nargs="+", metavar="CMD",
+                        help="EnergiBridge command used when /sys is not readable (e.g. sudo path/to/energibridge)")
+    args = parser.parse_args()
+
+    if args.phase == "warmup":
+        min_duration = 30 if args.min_duration is None else args.min_duration
+        max_duration = 300 if args.max_duration is None else args.max_duration
+    else:
+        min_duration = 5 if args.min_duration is None else args.min_duration
+        max_duration = 60 if args.max_duration is None else args.max_duration
+
+    sampler = make_sampler(args.energibridge, max_duration)
+    if sampler is None:
+        print("Warning: no power/frequency/temperature readings available; waiting the full duration")
+    try:
+        if args.phase == "warmup":
+            cpus = parse_cpu_list(args.cpus) if args.cpus else None
+            if args.workers == "all":
+                workers = len(cpus) if cpus else os.cpu_count()
+            else:
+                workers = int(args.workers)
+            elapsed, steady = warm_up(sampler, workers, min_duration, max_duration, cpus=cpus)
+        else:
+            elapsed, steady = cool_down(sampler, min_duration, max_duration)
+    finally:
+        if sampler is not None:
+            sampler.close()
+    print(f"{args.phase} finished after {elapsed:.0f} seconds ({'steady state' if steady else 'time limit'})")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The project is a set of top-level modules run as scripts; make them importable from the tests
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,21 @@
+import numpy as np
+
+from adaptive_stopping import hodges_lehmann_interval, welch_interval
+
+
+def test_hodges_lehmann_interval_small_sample():
+    # 5 x 5 pairwise differences 5j - i are the distinct values -4..20; at 95% the normal
+    # approximation gives k = 3 (the exact table value), so the bounds are the 3rd smallest
+    # and 3rd largest difference
+    a = np.arange(5.0)
+    b = 5.0 * np.arange(5.0)
+    assert hodges_lehmann_interval(a, b) == (-2.0, 18.0)
+
+
+def test_hodges_lehmann_interval_tiny_sample_spans_all_differences():
+    # k < 1 for 2 x 2 samples: the widest possible interval
+    assert hodges_lehmann_interval(np.array([0.0, 1.0]), np.array([3.0, 5.0])) == (2.0, 5.0)
+
+
+def test_welch_interval_without_spread():
+    assert welch_interval(np.full(5, 2.0), np.full(5, 3.0)) == (1.0, 1.0)
@@ -0,0 +1,72 @@
+import json
+import os
+
+import pytest
+
+from campaign_manifest import ARCHIVE_DIR, CampaignManifest, archive_campaign, is_unfinished
+
+RUNS = [{"id": "3.11:run1"}, {"id": "3.14:run1"}]
+
+
+def write_trace(path):
+    with open(path, "w") as file:
+        file.write("Delta,Time,PACKAGE_ENERGY (J)\n0,0,1.0\n200,200,2.0\n")
+
+
+def test_finished_runs_leave_the_pending_list(tmp_path):
+    manifest = CampaignManifest.open(tmp_path / "manifest.json", RUNS, seed=1, config={"size": 100})
+    trace = tmp_path / "run.csv"
+    write_trace(trace)
+    manifest.start("3.11:run1")
+    assert manifest.finish("3.11:run1", {"csv": trace}) is None
+    manifest.start("3.14:run1")
+    assert manifest.finish("3.14:run1", {"csv": tmp_path / "missing.csv"}) == "csv missing.csv: missing"
+
+    resumed = CampaignManifest.open(tmp_path / "manifest.json", RUNS, seed=1, config={"size": 100})
+    assert resumed.is_done("3.11:run1")
+    assert [run["id"] for run in resumed.pending()] == ["3.14:run1"]
+    assert is_unfinished(tmp_path / "manifest.json")
+
+
+def test_interrupted_and_corrupted_runs_are_requeued(tmp_path):
+    manifest = CampaignManifest.open(tmp_path / "manifest.json", RUNS)
+    trace = tmp_path / "run.csv"
+    write_trace(trace)
+    manifest.start("3.11:run1")
+    manifest.finish("3.11:run1", {"csv": trace})
+    manifest.start("3.14:run1")
+    os.remove(trace)
+
+    requeued = CampaignManifest.load(tmp_path / "manifest.json").requeue_invalid()
+    assert [(run["id"], run["error"]) for run in requeued] == [
+        ("3.11:run1", "csv run.csv: missing"), ("3.14:run1", "interrupted")]
+
+
+def test_completed_campaign_is_not_unfinished(tmp_path):
+    manifest = CampaignManifest.open(tmp_path / "manifest.json", RUNS)
+    manifest.complete()
+    assert not is_unfinished(tmp_path / "manifest.json")
+    assert not is_unfinished(tmp_path / "absent.json")
+
+
+def test_changed_config_is_refused(tmp_path):
+    CampaignManifest.open(tmp_path / "manifest.json", RUNS, config={"size": 100})
+    with pytest.raises(ValueError, match="different configuration"):
+        CampaignManifest.open(tmp_path / "manifest.json", RUNS, config={"size": 200})
+    fresh = CampaignManifest.open(tmp_path / "manifest.json", RUNS, config={"size": 200}, fresh=True)
+    assert fresh.data["config"] == {"size": 200}
+
+
+def test_archive_moves_manifest_and_results(tmp_path):
+    manifest = CampaignManifest.open(tmp_path / "manifest.json", RUNS)
+    results = tmp_path / "python3.11_runs"
+    results.mkdir()
+    write_trace(results / "run.csv")
+
+    target = archive_campaign(manifest.path, [results, tmp_path / "python3.14_runs"])
+    assert os.path.dirname(target) == str(tmp_path / ARCHIVE_DIR)
+    assert not (tmp_path / "manifest.json").exists() and not results.exists()
+    assert sorted(os.listdir(target)) == ["manifest.json", "python3.11_runs"]
+    with open(os.path.join(target, "manifest.json")) as file:
+        assert json.load(file)["created"] == manifest.data["created"]
+    assert archive_campaign(tmp_path / "manifest.json", [results]) is None
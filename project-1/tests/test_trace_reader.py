@@ -0,0 +1,48 @@
+import numpy as np
+
+from run_catalog import load_runs
+from trace_reader import energy_deltas, reduce_trace
+
+WRAP = 1000.0
+
+
+def write_trace(path, counter, interval_ms=100):
+    with open(path, "w") as file:
+        file.write("Delta,Time,PACKAGE_ENERGY (J)\n")
+        for i, value in enumerate(counter):
+            file.write(f"{interval_ms},{i * interval_ms},{value}\n")
+    return path
+
+
+def test_trace_without_wraps_matches_last_minus_first(tmp_path):
+    counter = [10.0, 12.5, 15.0, 21.0, 30.0]
+    stats = reduce_trace(write_trace(tmp_path / "trace.csv", counter), chunksize=2, wrap=WRAP)
+    assert stats["package_energy"] == counter[-1] - counter[0]
+    assert stats["wraparounds"] == 0 and stats["counter_glitches"] == 0
+
+
+def test_wrapped_counter_adds_the_counter_range(tmp_path):
+    # 990 -> 5 is a wrap over a 1000 J range: 15 J in 0.1 s
+    stats = reduce_trace(write_trace(tmp_path / "trace.csv", [980.0, 990.0, 5.0, 20.0]), chunksize=2, wrap=WRAP)
+    assert stats["package_energy"] == 40.0
+    assert stats["wraparounds"] == 1 and stats["counter_glitches"] == 0
+
+
+def test_implausible_drop_is_a_glitch(tmp_path):
+    # 500 -> 100 would be 600 J in 0.1 s after wrap correction: left out instead
+    stats = reduce_trace(write_trace(tmp_path / "trace.csv", [490.0, 500.0, 100.0, 110.0]), wrap=WRAP)
+    assert stats["package_energy"] == 20.0
+    assert stats["wraparounds"] == 0 and stats["counter_glitches"] == 1
+
+
+def test_energy_deltas_without_times_limits_wraps_to_a_share_of_the_range():
+    deltas, wraps, glitches = energy_deltas([995.0, 2.0, 1.0], wrap=WRAP)
+    assert deltas[0] == 7.0 and np.isnan(deltas[1])
+    assert (wraps, glitches) == (1, 1)
+
+
+def test_catalog_stores_and_reports_glitches(tmp_path, capsys):
+    write_trace(tmp_path / "energy_Python3.11_run1.csv", [490.0, 500.0, 100.0, 110.0])
+    runs = load_runs(tmp_path, catalog_path=tmp_path / "catalog.sqlite", workers=1)
+    assert runs[["wraparounds", "counter_glitches"]].values.tolist() == [[0, 1]]
+    assert "1 package counter step(s)" in capsys.readouterr().out
@@ -0,0 +1,199 @@
+import argparse
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+# Only these columns are needed to reduce a trace
+TRACE_COLUMNS = ["Time", "PACKAGE_ENERGY (J)", "SYSTEM_POWER (Watts)", "USED_MEMORY"]
+
+# Rows parsed per chunk; bounds memory regardless of the sampling rate and run length
+CHUNK_ROWS = 200_000
+
+# Range of the RAPL package energy counter in joules, used when /sys does not expose it
+# (32-bit counter in ~61 uJ units, the value of max_energy_range_uj on most Intel CPUs)
+RAPL_WRAP_JOULES = 262143.328850
+
+RAPL_RANGE_FILE = "/sys/class/powercap/intel-rapl:0/max_energy_range_uj"
+
+# A negative step is only a wraparound when the corrected energy is plausible: at most this
+# power (W) over the sample interval, or, without sample times, this share of the counter range
+MAX_PACKAGE_POWER = 1000
+MAX_WRAP_SHARE = 0.01
+
+
+def rapl_wrap_range():
+    """Range of the RAPL package energy counter in joules on this host."""
+    try:
+        with open(RAPL_RANGE_FILE) as file:
+            return int(file.read()) / 1e6
+    except (OSError, ValueError):
+        return RAPL_WRAP_JOULES
+
+
+def energy_deltas(counter, previous=None, wrap=RAPL_WRAP_JOULES, intervals=None):
+    """Energy consumed between consecutive counter readings, correcting RAPL wraparound.
+
+    `previous` is the last reading of the preceding chunk (None for the first chunk)
+    and `intervals` the seconds between the readings (one per delta), if known. A
+    negative step whose wrap-corrected energy is implausible (a counter reset or a
+    sampling glitch, not a wrap) becomes NaN. Returns (deltas, number of
+    wraparounds, number of glitches).
+    """
+    counter = np.asarray(counter, dtype=float)
+    if previous is not None:
+        counter = np.concatenate(([previous], counter))
+    deltas = np.diff(counter)
+    negative = deltas < 0
+    if intervals is None:
+        limit = MAX_WRAP_SHARE * wrap
+    else:
+        limit = MAX_PACKAGE_POWER * np.asarray(intervals, dtype=float)
+    wrapped = negative & (deltas + wrap <= limit)
+    deltas[wrapped] += wrap
+    deltas[negative & ~wrapped] = np.nan
+    return deltas, int(wrapped.sum()), int((negative & ~wrapped).sum())
+
+
+def unwrap_energy(counter, wrap=RAPL_WRAP_JOULES, times=None):
+    """Energy consumed since the first reading, for every reading of a RAPL counter.
+
+    `times` (ms) are the reading times; glitched steps count as no energy.
+    """
+    intervals = np.diff(np.asarray(times, dtype=float)) / 1000 if times is not None else None
+    deltas, _, _ = energy_deltas(counter, wrap=wrap, intervals=intervals)
+    return np.concatenate(([0.0], np.nancumsum(deltas)))
+
+
+def glitch_warning(csv_path, glitches):
+    """Warning for package counter steps that energy_deltas left out of a trace's energy."""
+    return (f"Warning: {glitches} package counter step(s) in {csv_path} were neither an increase nor a "
+            "plausible wraparound and were left out")
+
+
+def read_chunks(csv_path, columns=TRACE_COLUMNS, chunksize=CHUNK_ROWS):
+    """Iterate over a trace in chunks, parsing only the requested columns as floats."""
+    return pd.read_csv(csv_path, usecols=lambda column: column in columns, dtype=np.float64,
+                       chunksize=chunksize)
+
+
+class TraceReduction:
+    """Single-pass reduction of an EnergiBridge trace, fed chunk by chunk.
+
+    Tracks the package energy (corrected for counter wraparound, without steps
+    that are neither increments nor plausible wraps), the mean system
+    power per sample, the time-weighted (trapezoidal) integral of system power and
+    the system-wide used memory (bytes).
+    """
+
+    def __init__(self, wrap=RAPL_WRAP_JOULES):
+        self.wrap = wrap
+        self.samples = 0
+        self.columns = set()
+        self.start_time = None
+        self.end_time = None
+        self.package_energy = 0.0
+        self.wraparounds = 0
+        self.counter_glitches = 0
+        self.power_sum = 0.0
+        self.power_count = 0
+        self.system_energy = 0.0
+        self.first_used_memory = None
+        self.peak_used_memory = None
+        self._last_counter = None
+        self._last_power = None
+
+    def update(self, chunk):
+        if chunk.empty:
+            return
+        self.columns.update(chunk.columns)
+        self.samples += len(chunk)
+        times = chunk["Time"].to_numpy() if "Time" in chunk.columns else None
+        if times is not None:
+            if self.start_time is None:
+                self.start_time = float(times[0])
+
+        if "PACKAGE_ENERGY (J)" in chunk.columns:
+            counter = chunk["PACKAGE_ENERGY (J)"].to_numpy()
+            intervals = None
+            if times is not None:
+                previous_times = times if self._last_counter is None else np.concatenate(([self.end_time], times))
+                intervals = np.diff(previous_times) / 1000
+            deltas, wraps, glitches = energy_deltas(counter, self._last_counter, self.wrap, intervals)
+            self.package_energy += float(np.nansum(deltas))
+            self.wraparounds += wraps
+            self.counter_glitches += glitches
+            self._last_counter = counter[-1]
+
+        if "SYSTEM_POWER (Watts)" in chunk.columns:
+            power = chunk["SYSTEM_POWER (Watts)"].to_numpy()
+            valid = ~np.isnan(power)
+            self.power_sum += float(power[valid].sum())
+            self.power_count += int(valid.sum())
+            if times is not None:
+                # Carry the last sample over so the integral spans chunk boundaries
+                if self._last_power is not None:
+                    times = np.concatenate(([self.end_time], times))
+                    power = np.concatenate(([self._last_power], power))
+                segments = (power[1:] + power[:-1]) / 2 * np.diff(times) / 1000
+                self.system_energy += float(np.nansum(segments))
+                self._last_power = power[-1]
+
+        if "USED_MEMORY" in chunk.columns:
+            memory = chunk["USED_MEMORY"].to_numpy()
+            if self.first_used_memory is None:
+                self.first_used_memory = float(memory[0])
+            peak = float(np.nanmax(memory)) if not np.isnan(memory).all() else None
+            if peak is not None and (self.peak_used_memory is None or peak > self.peak_used_memory):
+                self.peak_used_memory = peak
+
+        if times is not None:
+            self.end_time = float(times[-1])
+
+    def result(self):
+        duration = (self.end_time - self.start_time) / 1000 if self.start_time is not None else None
+        has_power = "SYSTEM_POWER (Watts)" in self.columns and self.power_count > 0
+        return {
+            "samples": self.samples,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "trace_duration": duration,
+            "package_energy": self.package_energy if "PACKAGE_ENERGY (J)" in self.columns and self.samples else None,
+            "wraparounds": self.wraparounds,
+            "counter_glitches": self.counter_glitches,
+            "avg_system_power": self.power_sum / self.power_count if has_power else None,
+            "system_energy": self.system_energy if has_power and duration is not None else None,
+            "time_weighted_power": (self.system_energy / duration
+                                    if has_power and duration else None),
+            "used_memory_peak": self.peak_used_memory,
+            "used_memory_increase": (self.peak_used_memory - self.first_used_memory
+                                     if self.peak_used_memory is not None and self.first_used_memory is not None
+                                     else None),
+        }
+
+
+def reduce_trace(csv_path, chunksize=CHUNK_ROWS, wrap=None):
+    """Reduce a trace file to energy and power figures in one pass with bounded memory."""
+    reduction = TraceReduction(rapl_wrap_range() if wrap is None else wrap)
+    for chunk in read_chunks(csv_path, chunksize=chunksize):
+        reduction.update(chunk)
+    return reduction.result()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reduce EnergiBridge traces to energy and power figures.")
+    parser.add_argument("paths", nargs="+", help="trace CSV files or folders containing them")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    for path in args.paths:
+        files = sorted(glob.glob(os.path.join(path, "energy_*.csv"))) if os.path.isdir(path) else [path]
+        for csv_path in files:
+            stats = reduce_trace(csv_path, args.chunksize)
+            energy = f"{stats['package_energy']:.2f} J" if stats["package_energy"] is not None else "n/a"
+            power = f"{stats['time_weighted_power']:.2f} W" if stats["time_weighted_power"] is not None else "n/a"
+            print(f"{os.path.basename(csv_path)}: {stats['samples']} samples, package {energy}, "
+                  f"system power {power}, {stats['wraparounds']} wraparounds")
+            if stats["counter_glitches"]:
+                print(glitch_warning(csv_path, stats["counter_glitches"]))